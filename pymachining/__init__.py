@@ -1,7 +1,27 @@
 from .base import *
+from .batch import *
+from .calibration import *
+from .catalog import *
+from .compact import *
+from .cycle_time import *
+from .duty_cycle import *
+from .feasibility import *
+from .fitting import *
+from .fusion import *
+from .interval import *
+from .iso_materials import *
+from .jobgraph import *
 from .machines import *
 from .materials import *
 from .operations import *
+from .power_trace import *
+from .report import *
+from .serialization import *
+from .snapshot import *
+from .solvers import *
+from .spindle_log import *
+from .tool_life import *
 from .tool_materials import *
 from .tools import *
+from .uncertainty import *
 from .units import *
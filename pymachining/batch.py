@@ -0,0 +1,258 @@
+import numpy as np
+
+from .base import *
+from .units import *
+from .materials import *
+from .tool_materials import *
+from .tools import *
+
+# Structure-of-arrays containers for large sets of drills and taps.
+#
+# A batch holds one NumPy column per attribute instead of one Python object per tool.
+# Diameters are stored in mm; drill style, tool material and size name are stored as small
+# integer codes into per-batch category lists. The drill and tap operations are evaluated
+# with the array-capable DrillHSS and Tap table lookups, once per drill style.
+#
+# The drill feed and thrust tables are for HSS drills, so DrillBatch.feed_rate and thrust are
+# nan for rows of other tool materials, e.g., carbide, rather than giving them HSS values, and
+# DrillBatch.tool raises BatchUnsupportedTool for those rows, as the drill classes are HSS.
+#
+# Slicing with a slice returns views of the columns. Filtering with a mask or an index array
+# shares the columns with the parent batch and keeps only an index array; the selected rows
+# are gathered when an operation is evaluated.
+
+
+class BatchColumnMismatch(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+class BatchUnsupportedTool(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+_tool_material_names = ['hss', 'carbide']
+_tool_materials = {'hss': ToolMaterialHSS, 'carbide': ToolMaterialCarbide}
+
+
+def _tool_material_name(tool_material):
+    if isinstance(tool_material, ToolMaterialHSS):
+        return 'hss'
+    elif isinstance(tool_material, ToolMaterialCarbide):
+        return 'carbide'
+    return tool_material if isinstance(tool_material, str) and tool_material else 'hss'
+
+
+def _codes(values, categories):
+    # Integer codes of values, adding unseen values to categories. Only the distinct values are
+    # looked up in Python; the codes themselves are built with NumPy.
+    unique, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    lookup = {c: i for i, c in enumerate(categories)}
+    unique_codes = np.empty(len(unique), dtype=np.int32)
+    for i, v in enumerate(unique):
+        v = str(v)
+        if v not in lookup:
+            lookup[v] = len(categories)
+            categories.append(v)
+        unique_codes[i] = lookup[v]
+    return unique_codes[inverse.reshape(-1)]
+
+
+def _size_diameter(size):
+    # Diameter in mm of a named drill size, e.g., '#7', 'F' or '1⁄4'
+    return Drill.letters_and_numbers_and_fractions[size][1]
+
+
+class ToolBatch(PyMachiningBase):
+    def __init__(self, columns, categories, index=None):
+        PyMachiningBase.__init__(self)
+        n = len(columns['diameter'])
+        for name, column in columns.items():
+            if len(column) != n:
+                raise BatchColumnMismatch(f'column {name} has {len(column)} rows, expected {n}')
+        self._columns = columns
+        self._categories = categories
+        self._index = index
+
+    def _new(self, columns, index):
+        return type(self)(columns, self._categories, index)
+
+    def __len__(self):
+        if self._index is not None:
+            return len(self._index)
+        return len(self._columns['diameter'])
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if self._index is not None:
+                return self._new(self._columns, self._index[key])
+            return self._new({k: v[key] for k, v in self._columns.items()}, None)
+        if isinstance(key, (int, np.integer)):
+            return self.tool(key)
+        return self.where(key)
+
+    def where(self, selection):
+        # selection is a boolean mask or an array of row numbers
+        selection = np.asarray(selection)
+        if selection.dtype == bool:
+            if len(selection) != len(self):
+                raise BatchColumnMismatch(f'mask has {len(selection)} rows, expected {len(self)}')
+            selection = np.flatnonzero(selection)
+        if self._index is not None:
+            selection = self._index[selection]
+        return self._new(self._columns, selection)
+
+    def column(self, name):
+        column = self._columns[name]
+        if self._index is not None:
+            column = column[self._index]
+        return column
+
+    def _value(self, name, i):
+        # Row i of a column, without gathering the whole column
+        return self._columns[name][i if self._index is None else self._index[i]]
+
+    def _category_value(self, name, i):
+        return self._categories[name][self._value(name, i)]
+
+    def category_values(self, name):
+        # Column of category values, e.g., the drill style of each row as a string
+        return np.asarray(self._categories[name], dtype=object)[self.column(name)]
+
+    @property
+    def diameter(self):
+        return Q_(self.column('diameter'), 'mm')
+
+    @property
+    def size_names(self):
+        return self.category_values('size')
+
+    @property
+    def tool_material_names(self):
+        return self.category_values('tool_material')
+
+    @classmethod
+    def _from_columns(cls, diameter, categories, **category_columns):
+        diameter = np.asarray(diameter, dtype=float)
+        n = len(diameter)
+        columns = {'diameter': diameter}
+        for name, values in category_columns.items():
+            if isinstance(values, str) or values is None:
+                # Same value for every row
+                columns[name] = np.full(n, _codes([values or ''], categories[name])[0], dtype=np.int32)
+            else:
+                columns[name] = _codes(values, categories[name])
+        return columns
+
+
+class DrillBatch(ToolBatch):
+    _drill_classes = {'jobber': DrillHSSJobber, 'stub': DrillHSSStub}
+
+    @classmethod
+    def from_arrays(cls, diameter, drill_style='jobber', tool_material='hss', size=''):
+        """
+
+        :param diameter: Quantity array, or an array of floats in mm
+        :param drill_style: 'jobber', 'stub', or an array of them
+        :param tool_material: 'hss', 'carbide', or an array of them
+        :param size: drill size names, or '' for unnamed sizes
+        :return:
+        """
+        if isinstance(diameter, ureg.Quantity):
+            diameter = diameter.m_as('mm')
+        categories = {'drill_style': ['jobber', 'stub'], 'tool_material': list(_tool_material_names), 'size': ['']}
+        columns = cls._from_columns(diameter, categories,
+                                    drill_style=drill_style, tool_material=tool_material, size=size)
+        return cls(columns, categories)
+
+    @classmethod
+    def from_sizes(cls, sizes, drill_style='jobber'):
+        # Batch of named drill sizes, e.g., ['#7', 'F', '1⁄4']
+        return cls.from_arrays([_size_diameter(s) for s in sizes], drill_style, size=list(sizes))
+
+    @classmethod
+    def from_tools(cls, drills):
+        return cls.from_arrays([d.diameter.m_as('mm') for d in drills],
+                               [d.drill_style for d in drills],
+                               [_tool_material_name(d.tool_material) for d in drills])
+
+    def tool(self, i):
+        tool_material = self._category_value('tool_material', i)
+        if tool_material != 'hss':
+            raise BatchUnsupportedTool(f'row {i} is a {tool_material} drill; the drill classes are HSS')
+        style = self._category_value('drill_style', i)
+        return self._drill_classes.get(style, DrillHSS)(Q_(float(self._value('diameter', i)), 'mm'))
+
+    def to_tools(self):
+        return [self.tool(i) for i in range(len(self))]
+
+    @property
+    def drill_styles(self):
+        return self.category_values('drill_style')
+
+    def _hss_only(self, q):
+        # nan for the rows without an HSS tool material, which the tables do not cover
+        hss = self.column('tool_material') == self._categories['tool_material'].index('hss')
+        return Q_(np.where(hss, q.magnitude, np.nan), q.units)
+
+    def feed_rate(self, stock_material, fit=True):
+        # The chart row of each drill style, then one chart lookup for the whole batch
+        style_rows = np.array([feed_chart_row(stock_material, style) for style in self._categories['drill_style']],
+                              dtype=int)
+        return self._hss_only(feed_chart_rate(style_rows[self.column('drill_style')],
+                                              Q_(self.column('diameter'), 'mm'), fit))
+
+    def thrust(self, stock_material, fit=True):
+        return self._hss_only(DrillHSS(self.diameter).thrust(stock_material, fit))
+
+    def thrust2(self, stock_material, feed_rate):
+        return DrillHSS(self.diameter).thrust2(stock_material, feed_rate)
+
+
+class TapBatch(ToolBatch):
+    @classmethod
+    def from_arrays(cls, diameter, pitch=None, tool_material='hss', size=''):
+        """
+
+        :param diameter: Quantity array, or an array of floats in mm
+        :param pitch: Quantity array of thread pitches, an array of floats in mm / turn, or None
+        :param tool_material: 'hss', 'carbide', or an array of them
+        :param size: size names, or '' for unnamed sizes
+        :return:
+        """
+        if isinstance(diameter, ureg.Quantity):
+            diameter = diameter.m_as('mm')
+        if pitch is None:
+            pitch = np.full(len(diameter), np.nan)
+        elif isinstance(pitch, ureg.Quantity):
+            pitch = pitch.m_as('mm / turn')
+        categories = {'tool_material': list(_tool_material_names), 'size': ['']}
+        columns = cls._from_columns(diameter, categories, tool_material=tool_material, size=size)
+        columns['pitch'] = np.asarray(pitch, dtype=float)
+        return cls(columns, categories)
+
+    @classmethod
+    def from_tools(cls, taps):
+        return cls.from_arrays([t.diameter.m_as('mm') for t in taps],
+                               [np.nan if t.pitch is None else t.pitch.m_as('mm / turn') for t in taps],
+                               [_tool_material_name(t.tool_material) for t in taps])
+
+    def tool(self, i):
+        pitch = float(self._value('pitch', i))
+        tool_material = self._category_value('tool_material', i)
+        tool_material = _tool_materials[tool_material]() if tool_material in _tool_materials else tool_material
+        return Tap(Q_(float(self._value('diameter', i)), 'mm'), tool_material,
+                   pitch=None if np.isnan(pitch) else Q_(pitch, 'mm / turn'))
+
+    def to_tools(self):
+        return [self.tool(i) for i in range(len(self))]
+
+    @property
+    def pitch(self):
+        return Q_(self.column('pitch'), 'mm / turn')
+
+    def torque(self, stock_material, fit=True):
+        return Tap(self.diameter).torque(stock_material, fit=fit)
@@ -0,0 +1,200 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from .base import *
+from .units import *
+from .machines import *
+from .materials import *
+from .operations import *
+from .tools import *
+
+# Calibration of specific cutting energy from measured spindle power.
+#
+# A drilling record is (tool, stock material, spindle rpm, feed per revolution, measured
+# spindle power). The measured power is electrical input power, so the cutting power is
+#
+#   P_net = (P_measured - idle_power) * efficiency
+#
+# and the model is P_net = u_s Q, with Q the metal removal rate. u_s is estimated per material
+# by least squares through the origin, which needs only the running sums of Q^2, Q P_net and
+# P_net^2, so records are added one at a time or in chunks and never kept.
+
+
+class CalibrationNoData(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+# Units of the running sums
+_mrr_unit = 'cm ** 3 / min'
+_power_unit = 'kilowatt'
+_specific_cutting_energy_unit = 'kilowatt / (cm ** 3 / min)'
+
+
+def material_key(stock_material):
+    # Estimates are kept per material name, or per material class for unnamed materials
+    if isinstance(stock_material, str):
+        return stock_material
+    return stock_material.name or type(stock_material).__name__
+
+
+class RunningThroughOrigin(PyMachiningBase):
+    # Sufficient statistics for the least-squares fit y = b x
+    def __init__(self):
+        PyMachiningBase.__init__(self)
+        self.n = 0
+        self.sxx = 0.
+        self.sxy = 0.
+        self.syy = 0.
+
+    def add(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.n += x.size
+        self.sxx += float(np.sum(x * x))
+        self.sxy += float(np.sum(x * y))
+        self.syy += float(np.sum(y * y))
+
+    def merge(self, other):
+        # Combine with statistics gathered separately, e.g., from another log file
+        self.n += other.n
+        self.sxx += other.sxx
+        self.sxy += other.sxy
+        self.syy += other.syy
+
+    def slope(self):
+        if self.sxx <= 0.:
+            return float('nan')
+        return self.sxy / self.sxx
+
+    def residual_variance(self):
+        if self.n < 2 or self.sxx <= 0.:
+            return float('nan')
+        # Σ (y - b x)^2 = Σ y^2 - b Σ x y
+        rss = max(self.syy - self.sxy * self.sxy / self.sxx, 0.)
+        return rss / (self.n - 1)
+
+    def slope_standard_error(self):
+        return math.sqrt(self.residual_variance() / self.sxx) if self.sxx > 0. else float('nan')
+
+
+class CalibrationEstimate(PyMachiningBase):
+    def __init__(self, material, n, specific_cutting_energy, standard_error, confidence, interval):
+        PyMachiningBase.__init__(self)
+        self.material = material
+        self.n = n
+        self.specific_cutting_energy = specific_cutting_energy
+        self.standard_error = standard_error
+        self.confidence = confidence
+        self.interval = interval
+
+    def __str__(self):
+        low, high = self.interval
+        return f'{self.material}: u_s = {self.specific_cutting_energy:.4g~P} ' \
+               f'({self.confidence:.0%} CI {low.magnitude:.4g} - {high:.4g~P}, n = {self.n})'
+
+
+class SpecificCuttingEnergyCalibration(PyMachiningBase):
+    """
+    Streaming estimate of specific cutting energy per material from drilling records measured
+    on one machine.
+
+    >>> m = MachinePM25MV()
+    >>> cal = SpecificCuttingEnergyCalibration(m)
+    >>> cal.add(DrillHSS(Q_(.25, 'inch')), MaterialAluminum(), Q_(2500, 'tpm'), Q_(.005, 'inch / turn'), Q_(160, 'watt'))
+    """
+
+    def __init__(self, machine):
+        PyMachiningBase.__init__(self)
+        self.machine = machine
+        self._idle_power = machine.idle_power.m_as(_power_unit)
+        self._efficiency = machine.efficiency
+        self.statistics = {}
+
+    def _statistics(self, key):
+        if key not in self.statistics:
+            self.statistics[key] = RunningThroughOrigin()
+        return self.statistics[key]
+
+    def net_power(self, measured_power):
+        # Cutting power from measured spindle input power, in kW
+        return (np.asarray(measured_power, dtype=float) - self._idle_power) * self._efficiency
+
+    def add(self, tool, stock_material, spindle_rpm, feed_per_revolution, measured_power):
+        """
+        Add one record, or several records of one material with array quantities.
+
+        :param tool: drill, or anything with a diameter (a Quantity, possibly an array)
+        :param stock_material: material instance, or a material key
+        :param spindle_rpm:
+        :param feed_per_revolution:
+        :param measured_power: spindle input power, including idle power
+        """
+        diameter = tool.diameter if hasattr(tool, 'diameter') else tool
+        Q = DrillOp.metal_removal_rate_(diameter, feed_per_revolution, spindle_rpm).m_as(_mrr_unit)
+        P = self.net_power(measured_power.m_as(_power_unit))
+        Q, P = np.broadcast_arrays(Q, P)
+        self._statistics(material_key(stock_material)).add(Q, P)
+
+    def add_arrays(self, material_keys, diameter, spindle_rpm, feed_per_revolution, measured_power):
+        """
+        Add a chunk of records given as arrays of magnitudes, e.g., read from a log. Rows are
+        grouped by material.
+
+        :param material_keys: material key per row, or one key for all rows
+        :param diameter: [mm]
+        :param spindle_rpm: [turn / min]
+        :param feed_per_revolution: [mm / turn]
+        :param measured_power: [W]
+        """
+        D = np.asarray(diameter, dtype=float)
+        # Q = π (D / 2)^2 f n, mm^3 / min to cm^3 / min
+        Q = np.pi * (D / 2.) ** 2 * np.asarray(feed_per_revolution, dtype=float) \
+            * np.asarray(spindle_rpm, dtype=float) * 1e-3
+        P = self.net_power(np.asarray(measured_power, dtype=float) * 1e-3)
+        Q, P = np.broadcast_arrays(Q, P)
+        if isinstance(material_keys, str):
+            self._statistics(material_keys).add(Q, P)
+            return
+        keys, inverse = np.unique(np.asarray(material_keys, dtype=str), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for i, key in enumerate(keys):
+            rows = inverse == i
+            self._statistics(str(key)).add(Q[rows], P[rows])
+
+    def ingest(self, records):
+        # records is an iterable of (tool, stock_material, spindle_rpm, feed_per_revolution,
+        # measured_power) tuples, consumed one at a time.
+        for record in records:
+            self.add(*record)
+
+    def estimate(self, stock_material, confidence=.95):
+        """
+        Current estimate for a material. The confidence interval uses the normal approximation
+        to the sampling distribution of the slope, which is narrow for small numbers of records.
+
+        :param stock_material: material instance or material key
+        :param confidence:
+        :return: CalibrationEstimate
+        """
+        key = material_key(stock_material)
+        if key not in self.statistics or self.statistics[key].n == 0:
+            raise CalibrationNoData(key)
+        s = self.statistics[key]
+        u = s.slope()
+        se = s.slope_standard_error()
+        z = NormalDist().inv_cdf(.5 + confidence / 2.)
+        interval = (Q_(u - z * se, _specific_cutting_energy_unit), Q_(u + z * se, _specific_cutting_energy_unit))
+        return CalibrationEstimate(key, s.n, Q_(u, _specific_cutting_energy_unit),
+                                   Q_(se, _specific_cutting_energy_unit), confidence, interval)
+
+    def estimates(self, confidence=.95):
+        return {key: self.estimate(key, confidence) for key, s in self.statistics.items() if s.n > 0}
+
+    def apply(self, stock_material):
+        # Update a material's specific_cutting_energy with the current estimate
+        stock_material.specific_cutting_energy = self.estimate(stock_material).specific_cutting_energy
+        return stock_material
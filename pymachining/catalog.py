@@ -0,0 +1,340 @@
+import csv
+
+import numpy as np
+
+from .base import *
+from .units import *
+from .tools import *
+from .batch import *
+from .batch import _codes
+
+# Vendor tool catalogs.
+#
+# A ToolCatalog holds one NumPy column per attribute, like the tool batches, with the rows
+# sorted by diameter. Diameter ranges are found with a binary search (np.searchsorted) and
+# the other conditions (kind, style, tool material, coating, vendor, stock, flute length) are
+# masks over the rows in range. Lengths are stored in mm and pitches in mm / turn.
+#
+# CSV catalogs have a header row naming their columns; sku and diameter are required:
+#   sku            vendor part number
+#   diameter       a number in length_unit, or a drill size name such as #7, F or 1/4
+#   flute_length   number in length_unit
+#   style          drill style: jobber or stub (as DrillHSSJobber and DrillHSSStub)
+#   material       tool material, e.g., hss, cobalt or carbide
+#   coating        e.g., bright, black oxide or TiN
+#   stock          quantity on hand
+#   price
+#   kind           drill or tap, default drill
+#   pitch          tap pitch in length_unit per turn
+#   vendor
+# Other columns are ignored.
+
+
+class CatalogFormatError(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+_category_columns = ['kind', 'drill_style', 'tool_material', 'coating', 'vendor']
+_csv_names = {'style': 'drill_style', 'material': 'tool_material'}
+_defaults = {'kind': 'drill', 'drill_style': 'jobber', 'tool_material': 'hss', 'coating': '', 'vendor': ''}
+
+
+def _parse_length(v, mm_per_unit):
+    # mm from a number in the file's length unit or from a drill size name
+    v = v.strip()
+    try:
+        return float(v) * mm_per_unit
+    except ValueError:
+        pass
+    sizes = Drill.letters_and_numbers_and_fractions
+    name = v.replace('/', '⁄')
+    if name in sizes:
+        return sizes[name][1]
+    raise CatalogFormatError(f'cannot read the length {v!r}')
+
+
+def _category_value(name, v):
+    # Category values compare without case, except vendor names; empty values take the default
+    v = str(v).strip()
+    if name != 'vendor':
+        v = v.lower()
+    return v or _defaults[name]
+
+
+def _number(v, default=float('nan')):
+    v = v.strip()
+    return float(v) if v else default
+
+
+class ToolCatalog(PyMachiningBase):
+    def __init__(self, columns, categories):
+        PyMachiningBase.__init__(self)
+        self._columns = columns
+        self._categories = categories
+
+    @classmethod
+    def from_arrays(cls, sku, diameter, flute_length=None, drill_style='jobber', tool_material='hss', coating='',
+                    stock=None, price=None, kind='drill', pitch=None, vendor=''):
+        """
+        Catalog from one value or array per column, in any order; the rows are sorted by
+        diameter.
+
+        :param sku:
+        :param diameter: Quantity array, or an array of floats in mm
+        :param flute_length: Quantity array, floats in mm, or None if unknown
+        :param drill_style:
+        :param tool_material:
+        :param coating:
+        :param stock: quantity on hand, None for unknown (treated as out of stock)
+        :param price:
+        :param kind: 'drill' or 'tap'
+        :param pitch: Quantity array, floats in mm / turn, or None
+        :param vendor:
+        :return:
+        """
+        def floats(v, unit=None):
+            if v is None:
+                return np.full(n, np.nan)
+            if isinstance(v, ureg.Quantity):
+                v = v.m_as(unit)
+            return np.broadcast_to(np.asarray(v, dtype=float), (n,)).copy()
+
+        if isinstance(diameter, ureg.Quantity):
+            diameter = diameter.m_as('mm')
+        diameter = np.asarray(diameter, dtype=float)
+        n = len(diameter)
+        sku = np.asarray([str(x).strip() for x in sku], dtype=str)
+        if len(sku) != n:
+            raise BatchColumnMismatch(f'column sku has {len(sku)} rows, expected {n}')
+        columns = {'sku': sku, 'diameter': diameter, 'flute_length': floats(flute_length, 'mm'),
+                   'stock': np.zeros(n, dtype=np.int64) if stock is None else
+                   np.broadcast_to(np.asarray(stock, dtype=np.int64), (n,)).copy(),
+                   'price': floats(price), 'pitch': floats(pitch, 'mm / turn')}
+        categories = {name: [] for name in _category_columns}
+        values = {'kind': kind, 'drill_style': drill_style, 'tool_material': tool_material, 'coating': coating,
+                  'vendor': vendor}
+        for name in _category_columns:
+            v = values[name]
+            if isinstance(v, str) or v is None:
+                v = [v or '']
+            elif len(v) != n:
+                raise BatchColumnMismatch(f'column {name} has {len(v)} rows, expected {n}')
+            codes = _codes([_category_value(name, x) for x in v], categories[name])
+            columns[name] = np.broadcast_to(codes, (n,)).copy() if len(codes) == 1 else codes
+
+        # Sorted by diameter, then SKU so the order does not depend on the input order
+        order = np.lexsort((columns['sku'], columns['diameter']))
+        columns = {k: v[order] for k, v in columns.items()}
+        return cls(columns, categories)
+
+    @classmethod
+    def from_csv(cls, fn, length_unit='mm', vendor=None, delimiter=','):
+        """
+        Load a catalog from a CSV file with a header row, see the module notes.
+
+        :param fn:
+        :param length_unit: unit of the diameter, flute_length and pitch columns, e.g., 'inch'
+        :param vendor: vendor of every row, if the file has no vendor column
+        :return: ToolCatalog
+        """
+        with open(fn, newline='') as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            try:
+                header = [h.strip().lower() for h in next(reader)]
+            except StopIteration:
+                raise CatalogFormatError(f'{fn} is empty')
+            header = [_csv_names.get(h, h) for h in header]
+            for required in ['sku', 'diameter']:
+                if required not in header:
+                    raise CatalogFormatError(f'{fn} has no {required} column')
+            values = {h: [] for h in header}
+            for row in reader:
+                if not row or all(not v.strip() for v in row):
+                    continue
+                if len(row) != len(header):
+                    raise CatalogFormatError(f'{fn} line {reader.line_num} has {len(row)} fields, '
+                                             f'expected {len(header)}')
+                for h, v in zip(header, row):
+                    values[h].append(v)
+
+        mm_per_unit = Q_(1., length_unit).m_as('mm')
+
+        def lengths(name):
+            if name not in values:
+                return None
+            return [_parse_length(v, mm_per_unit) if v.strip() else np.nan for v in values[name]]
+
+        def numbers(name, default=float('nan')):
+            return [_number(v, default) for v in values[name]] if name in values else None
+
+        pitch = numbers('pitch')
+        return cls.from_arrays(values['sku'], lengths('diameter'), lengths('flute_length'),
+                               values.get('drill_style', ''), values.get('tool_material', ''),
+                               values.get('coating', ''), numbers('stock', 0), numbers('price'),
+                               values.get('kind', ''),
+                               None if pitch is None else Q_(np.asarray(pitch), f'{length_unit} / turn'),
+                               values.get('vendor', vendor or ''))
+
+    @classmethod
+    def merge(cls, catalogs):
+        # One catalog of the rows of several, e.g., one per vendor
+        arrays = [c.to_arrays() for c in catalogs]
+        merged = {k: np.concatenate([a[k] for a in arrays]) for k in arrays[0]}
+        return cls.from_arrays(**merged)
+
+    def to_arrays(self):
+        # Columns with category values as strings, the arguments of from_arrays
+        out = {k: self._columns[k] for k in ['sku', 'diameter', 'flute_length', 'stock', 'price', 'pitch']}
+        for name in _category_columns:
+            out[name] = self.category_values(name)
+        return out
+
+    def __len__(self):
+        return len(self._columns['diameter'])
+
+    def column(self, name, rows=None):
+        column = self._columns[name]
+        return column if rows is None else column[rows]
+
+    def category_values(self, name, rows=None):
+        return np.asarray(self._categories[name], dtype=object)[self.column(name, rows)]
+
+    @property
+    def sku(self):
+        return self._columns['sku']
+
+    @property
+    def diameter(self):
+        return Q_(self._columns['diameter'], 'mm')
+
+    def _mask(self, rows, kind=None, drill_style=None, tool_material=None, coating=None, vendor=None,
+              in_stock=False, min_flute_length=None):
+        # Conditions that do not depend on the hole, over the catalog rows in rows
+        mask = np.ones(len(rows), dtype=bool)
+        for name, value in [('kind', kind), ('drill_style', drill_style), ('tool_material', tool_material),
+                            ('coating', coating), ('vendor', vendor)]:
+            if value is None:
+                continue
+            values = [_category_value(name, v) for v in ([value] if isinstance(value, str) else value)]
+            codes = [self._categories[name].index(v) for v in values if v in self._categories[name]]
+            mask &= np.isin(self._columns[name][rows], codes)
+        if in_stock:
+            mask &= self._columns['stock'][rows] > 0
+        if min_flute_length is not None:
+            mask &= self._columns['flute_length'][rows] >= min_flute_length.m_as('mm')
+        return mask
+
+    def range(self, low, high, **conditions):
+        """
+        Rows with low <= diameter <= high that meet the conditions (kind, drill_style,
+        tool_material, coating, vendor: a value or a list of values; in_stock; min_flute_length).
+
+        :return: array of row numbers, in diameter order
+        """
+        d = self._columns['diameter']
+        i0 = np.searchsorted(d, low.m_as('mm'), side='left')
+        i1 = np.searchsorted(d, high.m_as('mm'), side='right')
+        rows = np.arange(i0, i1)
+        return rows[self._mask(rows, **conditions)]
+
+    def nearest(self, diameter, **conditions):
+        """
+        Row with the diameter nearest each of the diameters, among the rows meeting the
+        conditions of range(). -1 where no row meets them.
+        """
+        rows = np.arange(len(self))
+        rows = rows[self._mask(rows, **conditions)]
+        x = np.atleast_1d(np.asarray(diameter.m_as('mm'), dtype=float))
+        if len(rows) == 0:
+            return np.full(x.shape, -1)
+        d = self._columns['diameter'][rows]
+        k = np.searchsorted(d, x)
+        below = np.maximum(k - 1, 0)
+        above = np.minimum(k, len(d) - 1)
+        pick = np.where(np.abs(d[below] - x) <= np.abs(d[above] - x), below, above)
+        return rows[pick]
+
+    def best_for_holes(self, hole_diameter, hole_depth=None, undersize=Q_(0, 'mm'), oversize=Q_(.1, 'mm'),
+                       in_stock=True, **conditions):
+        """
+        Best tool in the catalog for each hole: a diameter within [hole - undersize,
+        hole + oversize], a flute length of at least the hole depth, and the conditions of
+        range(). The nearest diameter wins; ties go to the tool in stock with the most on hand,
+        then the lowest price.
+
+        The candidates of all holes are found with two binary searches and ranked with one
+        sort, so thousands of holes are matched at once.
+
+        :param hole_diameter: Quantity, a single value or one per hole
+        :param hole_depth: Quantity, a single value or one per hole, or None for any flute length
+        :param undersize:
+        :param oversize:
+        :param in_stock: only tools with stock > 0
+        :return: CatalogSelection
+        """
+        x = np.atleast_1d(np.asarray(hole_diameter.m_as('mm'), dtype=float))
+        n = len(x)
+        depth = np.zeros(n) if hole_depth is None else np.broadcast_to(hole_depth.m_as('mm'), (n,))
+        d = self._columns['diameter']
+        i0 = np.searchsorted(d, x - undersize.m_as('mm'), side='left')
+        i1 = np.searchsorted(d, x + oversize.m_as('mm'), side='right')
+        counts = np.maximum(i1 - i0, 0)
+
+        # Every (hole, row) candidate pair, holes in order
+        hole = np.repeat(np.arange(n), counts)
+        starts = np.repeat(i0 - np.cumsum(counts) + counts, counts)
+        rows = starts + np.arange(len(hole))
+        ok = self._mask(rows, in_stock=in_stock, **conditions)
+        if hole_depth is not None:
+            ok &= self._columns['flute_length'][rows] >= depth[hole]
+        hole, rows = hole[ok], rows[ok]
+
+        error = np.abs(d[rows] - x[hole])
+        price = self._columns['price'][rows]
+        order = np.lexsort((np.where(np.isnan(price), np.inf, price), -self._columns['stock'][rows], error, hole))
+        hole, rows = hole[order], rows[order]
+        first = np.ones(len(hole), dtype=bool)
+        first[1:] = hole[1:] != hole[:-1]
+        best = np.full(n, -1)
+        best[hole[first]] = rows[first]
+        return CatalogSelection(self, best)
+
+    def drill_batch(self, rows):
+        # DrillBatch of catalog rows, in the given order
+        rows = np.asarray(rows)
+        return DrillBatch.from_arrays(self._columns['diameter'][rows],
+                                      list(self.category_values('drill_style', rows)),
+                                      list(self.category_values('tool_material', rows)),
+                                      size=list(self._columns['sku'][rows]))
+
+    def tap_batch(self, rows):
+        rows = np.asarray(rows)
+        return TapBatch.from_arrays(self._columns['diameter'][rows], self._columns['pitch'][rows],
+                                    list(self.category_values('tool_material', rows)),
+                                    size=list(self._columns['sku'][rows]))
+
+
+class CatalogSelection(PyMachiningBase):
+    # Catalog row chosen for each hole, -1 where none qualified
+    def __init__(self, catalog, rows):
+        PyMachiningBase.__init__(self)
+        self.catalog = catalog
+        self.rows = rows
+        self.found = rows >= 0
+
+    @property
+    def sku(self):
+        return np.where(self.found, self.catalog.sku[np.maximum(self.rows, 0)], '')
+
+    def batch(self):
+        """
+        Batch of the chosen tools of the holes with one, in hole order; the batch's size
+        names are the SKUs. Catalogs of taps give a TapBatch.
+        """
+        rows = self.rows[self.found]
+        kinds = set(self.catalog.category_values('kind', rows))
+        if kinds == {'tap'}:
+            return self.catalog.tap_batch(rows)
+        return self.catalog.drill_batch(rows)
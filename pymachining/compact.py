@@ -0,0 +1,298 @@
+import math
+
+import numpy as np
+
+from .base import *
+from .units import *
+from .machines import *
+from .materials import *
+from .operations import *
+from .tool_materials import *
+from .tools import *
+
+# Compact, __slots__ based variants of the tool, material, machine and drilling operation
+# classes for sweeps that create one object per point.
+#
+# Values are stored as floats in canonical units (below) rather than as Pint quantities.
+# Constructors accept quantities or plain floats already in the canonical units. Quantities
+# are only created when an attribute such as diameter is first read, and are then kept.
+# Table lookups and torque curves are shared with the full classes: the
+# material-dependent lookups are passed one cached instance of the full material class.
+#
+# The compact classes do not derive from PyMachiningBase since a base class without
+# __slots__ would give every instance a __dict__ again.
+
+# Canonical units of the stored magnitudes
+_length_unit = 'mm'
+_speed_unit = 'tpm'
+_feed_unit = 'mm / turn'
+_power_unit = 'watt'
+_force_unit = 'lbs'  # the machine and drill tables express thrust as pounds
+_specific_cutting_energy_unit = 'kilowatt / (cm ** 3 / min)'
+
+_prototypes = {}
+_conversion_factors = {}
+
+
+def _magnitude(q, unit):
+    # Magnitude of q in unit. Pint conversions are slow compared to creating a compact object,
+    # so the factor for each (units, unit) pair is found once and cached. Plain numbers are
+    # taken to already be in the canonical unit.
+    if not isinstance(q, ureg.Quantity):
+        return float(q)
+    key = (q.units, unit)
+    if key not in _conversion_factors:
+        _conversion_factors[key] = Q_(1., q.units).m_as(unit)
+    return q.magnitude * _conversion_factors[key]
+
+
+def _prototype(cls):
+    # One shared instance of a full material class, used only for its type and tables.
+    # setdefault keeps the first instance if two threads create one at the same time
+    if cls not in _prototypes:
+        _prototypes.setdefault(cls, cls())
+    return _prototypes[cls]
+
+
+def _full_material(stock_material):
+    if isinstance(stock_material, CompactMaterial):
+        return stock_material.prototype
+    return stock_material
+
+
+class CompactMaterial:
+    __slots__ = ('kind', 'name', 'specific_cutting_energy_m', '_specific_cutting_energy')
+
+    def __init__(self, kind, name=None, specific_cutting_energy=None):
+        self.kind = kind
+        self.name = name
+        if specific_cutting_energy is None:
+            specific_cutting_energy = _prototype(kind).specific_cutting_energy
+        self.specific_cutting_energy_m = _magnitude(specific_cutting_energy, _specific_cutting_energy_unit)
+        self._specific_cutting_energy = None
+
+    @classmethod
+    def from_material(cls, material):
+        return cls(type(material), material.name, material.specific_cutting_energy)
+
+    def to_material(self):
+        m = self.kind(self.name)
+        m.specific_cutting_energy = self.specific_cutting_energy
+        return m
+
+    @property
+    def prototype(self):
+        return _prototype(self.kind)
+
+    @property
+    def description(self):
+        return self.prototype.description
+
+    @property
+    def specific_cutting_energy(self):
+        if self._specific_cutting_energy is None:
+            self._specific_cutting_energy = Q_(self.specific_cutting_energy_m, _specific_cutting_energy_unit)
+        return self._specific_cutting_energy
+
+    def sfm(self, tool_material=None):
+        return self.prototype.sfm(tool_material)
+
+    def machinability(self):
+        return self.prototype.machinability()
+
+
+class CompactTool:
+    __slots__ = ('diameter_m', 'tool_material', '_diameter')
+
+    def __init__(self, diameter, tool_material):
+        if isinstance(diameter, str) and diameter in Drill.letters_and_numbers_and_fractions:
+            diameter = Q_(Drill.letters_and_numbers_and_fractions[diameter][1], 'mm')
+        self.diameter_m = _magnitude(diameter, _length_unit)
+        self.tool_material = tool_material
+        self._diameter = None
+
+    @property
+    def diameter(self):
+        if self._diameter is None:
+            self._diameter = Q_(self.diameter_m, _length_unit)
+        return self._diameter
+
+
+class CompactDrill(CompactTool):
+    # Equivalent of DrillHSS, DrillHSSJobber and DrillHSSStub, selected by drill_style.
+    __slots__ = ('drill_style',)
+
+    _tool_material = ToolMaterialHSS()
+    _descriptions = {'jobber': 'HSS jobber drill', 'stub': 'HSS stub drill'}
+    _classes = {'jobber': DrillHSSJobber, 'stub': DrillHSSStub}
+
+    def __init__(self, diameter, drill_style='jobber'):
+        CompactTool.__init__(self, diameter, self._tool_material)
+        self.drill_style = drill_style
+
+    @classmethod
+    def from_drill(cls, drill):
+        return cls(drill.diameter, drill.drill_style)
+
+    def to_drill(self):
+        return self._classes.get(self.drill_style, DrillHSS)(self.diameter)
+
+    @property
+    def description(self):
+        return self._descriptions.get(self.drill_style, 'HSS (jobber?) drill')
+
+    # The DrillHSS table methods only read self.diameter, so they are shared as is.
+
+    def feed_rate(self, stock_material, fit=True):
+        return DrillHSS.feed_rate_(self, _full_material(stock_material), self.drill_style, fit=fit)
+
+    def thrust(self, stock_material, fit=True):
+        return DrillHSS.thrust(self, _full_material(stock_material), fit)
+
+    def thrust2(self, stock_material, feed_rate):
+        return DrillHSS.thrust2(self, _full_material(stock_material), feed_rate)
+
+
+class CompactTap(CompactTool):
+    __slots__ = ('pitch_m', '_pitch')
+
+    description = 'Unknown tap'
+
+    def __init__(self, diameter, tool_material='', pitch=None):
+        CompactTool.__init__(self, diameter, tool_material)
+        self.pitch_m = float('nan') if pitch is None else _magnitude(pitch, _feed_unit)
+        self._pitch = None
+
+    @classmethod
+    def from_tap(cls, tap):
+        return cls(tap.diameter, tap.tool_material, tap.pitch)
+
+    def to_tap(self):
+        return Tap(self.diameter, self.tool_material, self.pitch)
+
+    @property
+    def pitch(self):
+        if math.isnan(self.pitch_m):
+            return None
+        if self._pitch is None:
+            self._pitch = Q_(self.pitch_m, _feed_unit)
+        return self._pitch
+
+    def feed(self, stock_material):
+        return self.pitch
+
+    def speed(self, stock_material):
+        return Tap.speed(self, _full_material(stock_material))
+
+    def sfm(self, stock_material):
+        return self.speed(stock_material)
+
+    def torque(self, stock_material, fit=True):
+        return Tap.torque_(self, _full_material(stock_material), fit=fit)
+
+
+class CompactMachine:
+    # Speed, power and force limits of a machine, with its torque curves sampled once into
+    # arrays and evaluated by interpolation. Sampling rounds off the corners of piecewise
+    # curves to within one sample spacing.
+    __slots__ = ('kind', 'name', 'min_rpm_m', 'max_rpm_m', 'gear_ratio', 'efficiency', 'idle_power_m',
+                 'max_feed_force_m', '_curve_x', '_curve_continuous', '_curve_intermittent')
+
+    def __init__(self, machine, samples=1024):
+        self.kind = type(machine)
+        self.name = machine.name
+        self.min_rpm_m = _magnitude(machine.min_rpm, _speed_unit)
+        self.max_rpm_m = _magnitude(machine.max_rpm, _speed_unit)
+        self.gear_ratio = machine.gear_ratio
+        self.efficiency = machine.efficiency
+        self.idle_power_m = _magnitude(machine.idle_power, _power_unit)
+        self.max_feed_force_m = _magnitude(machine.max_feed_force, _force_unit)
+
+        x = Q_(np.linspace(0., self.max_rpm_m / self.gear_ratio, samples), _speed_unit)
+        self._curve_x = x.magnitude
+        self._curve_continuous = machine.torque_continuous(x).m_as('newton meter')
+        self._curve_intermittent = machine.torque_intermittent(x).m_as('newton meter')
+
+    @property
+    def min_rpm(self):
+        return Q_(self.min_rpm_m, _speed_unit)
+
+    @property
+    def max_rpm(self):
+        return Q_(self.max_rpm_m, _speed_unit)
+
+    @property
+    def idle_power(self):
+        return Q_(self.idle_power_m, _power_unit)
+
+    @property
+    def max_feed_force(self):
+        return Q_(self.max_feed_force_m, _force_unit)
+
+    def _torque(self, curve, rpm):
+        rpm_ = _magnitude(rpm, _speed_unit) if isinstance(rpm, ureg.Quantity) else rpm
+        # Negative for negative speeds, as MachineType; at standstill the stall torque
+        T = np.interp(np.abs(rpm_), self._curve_x, curve, right=0.) * np.where(np.less(rpm_, 0), -1., 1.)
+        return Q_(T if np.ndim(T) > 0 else float(T), 'newton meter')
+
+    def torque_continuous(self, rpm):
+        return self._torque(self._curve_continuous, rpm)
+
+    def torque_intermittent(self, rpm):
+        return self._torque(self._curve_intermittent, rpm)
+
+    def _power(self, T, rpm):
+        rpm_ = _magnitude(rpm, _speed_unit) if isinstance(rpm, ureg.Quantity) else rpm
+        # P [W] = T [N m] * n [turn / min] * 2π / 60
+        return Q_(T.magnitude * rpm_ * (2 * math.pi / 60.) / self.efficiency + self.idle_power_m, _power_unit)
+
+    def power_continuous(self, rpm):
+        return self._power(self.torque_continuous(rpm), rpm)
+
+    def power_intermittent(self, rpm):
+        return self._power(self.torque_intermittent(rpm), rpm)
+
+    def clamp_speed(self, rpm):
+        # As MachineType.clamp_speed, adjusted is a boolean array for an array of speeds
+        rpm_ = _magnitude(rpm, _speed_unit)
+        clamped = np.clip(rpm_, self.min_rpm_m, self.max_rpm_m)
+        if np.ndim(clamped) == 0:
+            return Q_(float(clamped), _speed_unit), bool(clamped != rpm_)
+        return Q_(clamped, _speed_unit), clamped != rpm_
+
+
+class CompactDrillOp:
+    # Equivalent of DrillOp for sweeps; arithmetic is done on magnitudes in canonical units.
+    __slots__ = ('tool', 'stock_material')
+
+    description = 'Drilling operation'
+
+    def __init__(self, drill, stock_material):
+        self.tool = drill
+        self.stock_material = stock_material
+
+    @property
+    def cutter_diameter(self):
+        return self.tool.diameter
+
+    def rrpm(self, speed):
+        # n = v / (π D)
+        return Q_(_magnitude(speed, 'mm turn / minute') / (math.pi * self.tool.diameter_m), _speed_unit)
+
+    def metal_removal_rate(self, feed_per_rev, spindle_rpm):
+        # Q = π (D / 2)^2 f n
+        D = self.tool.diameter_m
+        Q = math.pi * (D / 2.) ** 2 * _magnitude(feed_per_rev, _feed_unit) * _magnitude(spindle_rpm, _speed_unit)
+        return Q_(Q, 'mm ** 3 / minute')
+
+    def net_power(self, feed_per_revolution, spindle_rpm):
+        # P = Q u_s; 1 kW / (cm^3 / min) = 1e-3 kW / (mm^3 / min), so P [W] = Q [mm^3 / min] * u_s
+        Q = self.metal_removal_rate(feed_per_revolution, spindle_rpm).magnitude
+        if isinstance(self.stock_material, CompactMaterial):
+            u_s = self.stock_material.specific_cutting_energy_m
+        else:
+            u_s = _magnitude(self.stock_material.specific_cutting_energy, _specific_cutting_energy_unit)
+        return Q_(Q * u_s, _power_unit)
+
+    def torque(self, net_power, spindle_speed):
+        return DrillOp.torque_(net_power, spindle_speed)
@@ -0,0 +1,140 @@
+import numpy as np
+
+from .base import *
+from .units import *
+from .machines import *
+
+# Cycle time of canned drilling cycles.
+#
+# Heights are measured from the top of the hole: the retract (R) plane is retract_height above
+# it and the bottom of the hole is depth below it. Each hole starts and ends at the R plane, as
+# with G99. The cycles are:
+#
+#   G81  feed from R to the bottom, rapid back to R
+#   G82  G81 with a dwell at the bottom
+#   G83  peck drilling: feed peck_depth deeper each peck and rapid back to R after each one;
+#        later pecks rapid down to peck_clearance above the previous peck's bottom first
+#   G73  chip breaking: as G83, but only backing off by peck_clearance between pecks, with a
+#        single rapid back to R at the end
+#
+# Every move, rapid or feed, follows a trapezoidal velocity profile limited by the axis
+# acceleration, so short moves never reach their programmed rate. Times are computed for arrays
+# of holes at once; pecks are iterated, each iteration covering every hole that has that peck.
+#
+# The machines' axis accelerations are not known, so MillingMachine leaves them unlimited (inf),
+# which makes every move run at its programmed rate from start to end. Set max_z_accel, and
+# max_x_accel and max_y_accel for the XY rapids, to measured values to use the trapezoidal
+# profile.
+
+
+class CycleTimeUnknownCycle(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+def trapezoid_move_time_(distance, max_rate, max_accel):
+    """
+    Time of a point-to-point move starting and ending at rest.
+
+    The move accelerates at max_accel up to max_rate, cruises, and decelerates at max_accel;
+    a move shorter than max_rate^2 / max_accel never reaches max_rate and takes
+    2 sqrt(distance / max_accel).
+
+    :param distance: magnitudes, any consistent units
+    :param max_rate: magnitudes in the same length unit per time unit
+    :param max_accel: magnitudes in the same length unit per time unit squared, may be inf
+    :return: time in the time unit
+    """
+    d = np.abs(np.asarray(distance, dtype=float))
+    v = np.asarray(max_rate, dtype=float)
+    a = np.asarray(max_accel, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ramp = v * v / a
+        t = np.where(d >= ramp, d / v + v / a, 2. * np.sqrt(d / a))
+    return np.where(d > 0, t, 0.)
+
+
+def trapezoid_move_time(distance, max_rate, max_accel):
+    return Q_(trapezoid_move_time_(distance.m_as('inch'), max_rate.m_as('inch / s'), max_accel.m_as('inch / s ** 2')),
+              'second')
+
+
+def drill_cycle_time(machine, depth, penetration_rate, cycle='G81', retract_height=Q_(.1, 'inch'),
+                     peck_depth=None, peck_clearance=Q_(.02, 'inch'), dwell=Q_(0, 'second'), x=None, y=None):
+    """
+    Time of a canned drilling cycle for each hole.
+
+    :param machine: MillingMachine, for max_z_rate, max_z_accel and, with x and y, the X and Y
+        rates and accelerations; an unlimited (inf) acceleration, the default, gives moves at a
+        constant rate
+    :param depth: hole depth, a single value or one per hole
+    :param penetration_rate: feed rate along Z, e.g., DrillOp.penetration_rate(), a single value
+        or one per hole
+    :param cycle: 'G81', 'G82', 'G83' or 'G73'
+    :param retract_height: height of the R plane above the top of the hole
+    :param peck_depth: depth of each peck for G83 and G73, a single value or one per hole
+    :param peck_clearance: G83 rapid stop above the previous peck, G73 back off distance
+    :param dwell: dwell at the bottom of each hole (G82), or at the bottom of the final peck
+    :param x: optional hole positions; the XY rapid from the previous hole is added to each
+        hole, and the first hole has none
+    :param y:
+    :return: time per hole [s]
+    """
+    cycle = cycle.upper()
+    if cycle not in ['G81', 'G82', 'G83', 'G73']:
+        raise CycleTimeUnknownCycle(cycle)
+
+    h = np.atleast_1d(np.asarray(depth.m_as('inch'), dtype=float))
+    v_f = penetration_rate.m_as('inch / s')
+    h, v_f = np.broadcast_arrays(h, v_f)
+    r = retract_height.m_as('inch')
+    v_z = machine.max_z_rate.m_as('inch / s')
+    a_z = machine.max_z_accel.m_as('inch / s ** 2')
+
+    def rapid(d):
+        return trapezoid_move_time_(d, v_z, a_z)
+
+    def feed(d):
+        return trapezoid_move_time_(d, v_f, a_z)
+
+    if cycle in ['G81', 'G82']:
+        t = feed(r + h) + rapid(r + h)
+    else:
+        if peck_depth is None:
+            raise PyMachiningException(f'{cycle} requires a peck_depth')
+        q = np.broadcast_to(peck_depth.m_as('inch'), h.shape)
+        c = peck_clearance.m_as('inch')
+        n_pecks = np.maximum(np.ceil(h / q), 1).astype(int)
+        t = np.zeros(h.shape)
+        for k in range(int(n_pecks.max(initial=0))):
+            has = k < n_pecks
+            top = np.minimum(k * q, h)  # depth reached by the previous pecks
+            bottom = np.minimum((k + 1) * q, h)
+            if k == 0:
+                t_k = feed(r + bottom)
+            elif cycle == 'G83':
+                # rapid down to the clearance plane, then feed through the clearance and the peck
+                t_k = rapid(r + top - c) + feed(bottom - top + c)
+            else:
+                # G73 backed off by c after the previous peck
+                t_k = feed(bottom - top + c)
+            if cycle == 'G83':
+                t_k = t_k + rapid(r + bottom)
+            else:
+                last = k == n_pecks - 1
+                t_k = t_k + np.where(last, rapid(r + bottom), rapid(c))
+            t += np.where(has, t_k, 0.)
+    t = t + dwell.m_as('second')
+
+    if x is not None and y is not None:
+        dx = np.diff(np.atleast_1d(x.m_as('inch')), prepend=x.m_as('inch')[0])
+        dy = np.diff(np.atleast_1d(y.m_as('inch')), prepend=y.m_as('inch')[0])
+        # X and Y move together; the slower axis sets the time
+        t_xy = np.maximum(trapezoid_move_time_(dx, machine.max_x_rate.m_as('inch / s'),
+                                               machine.max_x_accel.m_as('inch / s ** 2')),
+                          trapezoid_move_time_(dy, machine.max_y_rate.m_as('inch / s'),
+                                               machine.max_y_accel.m_as('inch / s ** 2')))
+        t = t + t_xy
+
+    return Q_(t, 'second')
@@ -0,0 +1,192 @@
+import numpy as np
+
+from .base import *
+from .units import *
+from .machines import *
+
+# Duty cycle of a job against a spindle's continuous and intermittent torque ratings.
+#
+# A job is a sequence of operations, each with a duration, a demanded torque and a spindle
+# speed; idle time between cuts is an operation with zero torque. The load ratio of an
+# operation is its torque over the continuous torque rating at its speed. Three limits are
+# checked, for every operation at once:
+#
+#   peak      torque at most the intermittent rating at the operation's speed
+#   RMS       root mean square load ratio over any window of rms_window at most 1
+#   thermal   a first order thermal model, with the winding temperature rise as a fraction of
+#             the rise at the continuous rating, at most 1
+#
+# The thermal model is dθ/dt = (r^2 - θ) / τ for the load ratio r and time constant τ, so
+# over an operation of duration d, θ goes from θ_s to r^2 + (θ_s - r^2) exp(-d / τ). The RMS
+# windows are evaluated from the cumulative integral of r^2 over the job's timeline; the
+# largest window integral is at a window starting or ending at an operation boundary, so
+# checking those windows is exact.
+#
+# Where the thermal limit is exceeded, a dwell (an idle operation) before an operation lets the
+# temperature fall to what the operation can start from and stay within the limit. The
+# smallest dwells are found as a prefix scan of the maps from the temperature at the start of
+# one operation to the next, each of the form θ -> min(p θ + q, s), which compose to the same
+# form. The dwells do not consider the RMS windows, so check a job again with its dwells.
+#
+# The time constant is not given by the machines' data; the default is a guess for small
+# spindle motors and should be measured, e.g., from the cooling curve of the spindle housing.
+
+default_thermal_time_constant = Q_(10, 'minute')
+
+
+class DutyCycleReport(PyMachiningBase):
+    # Arrays are indexed by operation; scalars summarize the job
+    def __init__(self, **columns):
+        PyMachiningBase.__init__(self)
+        for k, v in columns.items():
+            setattr(self, k, v)
+
+
+def _compose_scan(p, q, s):
+    # Inclusive prefix composition of g_k(x) = min(p_k x + q_k, s_k): the k-th result is
+    # g_k(...g_0(x)). Hillis-Steele, log2(n) steps over the whole arrays.
+    p = p.copy()
+    q = q.copy()
+    s = s.copy()
+    d = 1
+    while d < len(p):
+        # g_k o g_{k-d}, the later map applied to the earlier one
+        p2, q2, s2 = p[d:], q[d:], s[d:]
+        p1, q1, s1 = p[:-d], q[:-d], s[:-d]
+        with np.errstate(invalid='ignore'):
+            s_new = np.minimum(np.where(np.isinf(s1), np.inf, p2 * s1 + q2), s2)
+        q_new = p2 * q1 + q2
+        p_new = p2 * p1
+        p[d:], q[d:], s[d:] = p_new, q_new, s_new
+        d *= 2
+    return p, q, s
+
+
+def _window_integrals(t, E, start, width):
+    # Integrals of r^2 over [start, start + width]; E is the cumulative integral at the
+    # boundaries t, constant outside the job
+    return np.interp(start + width, t, E) - np.interp(start, t, E)
+
+
+def check_duty_cycle(machine, duration, torque, spindle_rpm, rms_window=None, time_constant=None,
+                     initial_temperature=0.):
+    """
+    Check a job sequence against the machine's torque ratings.
+
+    :param machine: machine, or a SpindleRange of one
+    :param duration: array of operation durations
+    :param torque: array of demanded spindle torques
+    :param spindle_rpm: array of spindle speeds
+    :param rms_window: length of the RMS windows; by default the thermal time constant
+    :param time_constant: thermal time constant, default_thermal_time_constant by default
+    :param initial_temperature: temperature rise at the start of the job, as a fraction of
+        the rise at the continuous rating
+    :return: DutyCycleReport of
+        start, end                      operation times from the start of the job
+        load_ratio                      torque over the continuous rating
+        peak_ok                         torque within the intermittent rating
+        rms                             RMS load ratio over the window ending with the operation
+        temperature                     temperature rise at the end of the operation
+        thermal_ok                      temperature within the limit
+        dwell                           dwell recommended before the operation; inf when the
+                                        operation exceeds the limit even from ambient
+        max_rms, max_temperature, total_dwell, and ok, True when every limit is met
+    """
+    if time_constant is None:
+        time_constant = default_thermal_time_constant
+    if rms_window is None:
+        rms_window = time_constant
+    tau = time_constant.m_as('second')
+    w = rms_window.m_as('second')
+
+    d = np.atleast_1d(duration.m_as('second')).astype(float)
+    T = np.abs(np.atleast_1d(torque.m_as('newton meter')).astype(float))
+    rpm = Q_(np.broadcast_to(np.atleast_1d(spindle_rpm.m_as('tpm')), d.shape).astype(float), 'tpm')
+    n = len(d)
+
+    T_continuous = np.abs(np.atleast_1d(machine.torque_continuous(rpm).m_as('newton meter')))
+    T_intermittent = np.abs(np.atleast_1d(machine.torque_intermittent(rpm).m_as('newton meter')))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.where(T > 0, T / T_continuous, 0.)
+    peak_ok = T <= T_intermittent
+    r2 = r * r
+
+    # RMS over windows, from the cumulative integral of r^2 at the operation boundaries
+    t = np.concatenate([[0.], np.cumsum(d)])
+    with np.errstate(invalid='ignore'):
+        E = np.concatenate([[0.], np.cumsum(r2 * d)])
+    finite = np.isfinite(E[-1])
+    if finite:
+        rms = np.sqrt(np.maximum(_window_integrals(t, E, t[1:] - w, w), 0.) / w)
+        max_rms = float(np.sqrt(max(np.max(_window_integrals(t, E, t - w, w)),
+                                    np.max(_window_integrals(t, E, t, w)), 0.) / w))
+    else:
+        # A torque demanded outside the speed range has no continuous rating
+        rms = np.full(n, np.inf)
+        max_rms = np.inf
+
+    # Thermal model: θ_end = a θ_start + b over each operation
+    a = np.exp(-d / tau)
+    b = r2 * (1. - a)
+    with np.errstate(invalid='ignore'):
+        b = np.where(np.isfinite(r2), b, np.inf)
+    p, q, _ = _compose_scan(a, b, np.full(n, np.inf))
+    with np.errstate(invalid='ignore'):
+        temperature = p * initial_temperature + q
+    thermal_ok = temperature <= 1. + 1e-12
+
+    # Highest start temperature from which an operation stays within the limit
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c = np.where(a > 0, (1. - b) / a, np.where(b <= 1., np.inf, -np.inf))
+    # An operation exceeding the limit even from ambient gets no dwell; the later dwells
+    # account for the heat it leaves
+    reachable = c >= 0.
+    c_ = np.where(reachable, c, np.inf)
+    # Temperature at the start of each operation with the dwells: u_0, then g_k(u_k) with
+    # g_k(x) = a_k min(x, c_k) + b_k = min(a_k x + b_k, a_k c_k + b_k)
+    with np.errstate(invalid='ignore'):
+        s = np.where(np.isinf(c_), np.inf, a * c_ + b)
+    p, q, s = _compose_scan(a, b, s)
+    with np.errstate(invalid='ignore'):
+        u = np.concatenate([[initial_temperature], np.minimum(p * initial_temperature + q, s)[:-1]])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dwell = np.where(u > c_, tau * np.log(u / c_), 0.)
+    dwell = np.where(reachable, dwell, np.inf)
+
+    ok = bool(np.all(peak_ok) & np.all(thermal_ok) & (max_rms <= 1. + 1e-12))
+    return DutyCycleReport(
+        start=Q_(t[:-1], 'second'),
+        end=Q_(t[1:], 'second'),
+        load_ratio=r,
+        peak_ok=peak_ok,
+        rms=rms,
+        temperature=temperature,
+        thermal_ok=thermal_ok,
+        dwell=Q_(dwell, 'second'),
+        max_rms=max_rms,
+        max_temperature=float(np.max(temperature)) if n else 0.,
+        total_dwell=Q_(float(np.sum(dwell[np.isfinite(dwell)])), 'second'),
+        ok=ok,
+    )
+
+
+def insert_dwells(duration, torque, spindle_rpm, dwell):
+    """
+    The job with an idle operation of each positive dwell inserted before its operation.
+
+    Idle operations have zero torque and the speed of the operation they precede.
+
+    :param dwell: array of dwells, e.g., DutyCycleReport.dwell; non-finite dwells are not inserted
+    :return: (duration, torque, spindle_rpm, index of each original operation in the new job)
+    """
+    d = np.atleast_1d(duration.m_as('second'))
+    T = np.atleast_1d(torque.m_as('newton meter'))
+    rpm = np.broadcast_to(np.atleast_1d(spindle_rpm.m_as('tpm')), d.shape)
+    dw = np.atleast_1d(dwell.m_as('second'))
+    add = np.flatnonzero(np.isfinite(dw) & (dw > 0))
+
+    index = np.arange(len(d)) + np.searchsorted(add, np.arange(len(d)), side='right')
+    return (Q_(np.insert(d, add, dw[add]), 'second'),
+            Q_(np.insert(T.astype(float), add, 0.), 'newton meter'),
+            Q_(np.insert(rpm.astype(float), add, rpm[add]), 'tpm'),
+            index)
@@ -0,0 +1,223 @@
+import collections
+import hashlib
+import threading
+import weakref
+
+import numpy as np
+
+from .base import *
+from .units import *
+from .machines import *
+from .materials import *
+from .operations import *
+from .tools import *
+
+# Precomputed drilling feasibility over a diameter x spindle speed grid.
+#
+# For a machine, stock material and drill style, a FeasibilityMap holds the power margin
+# (continuous power less the power drawn at the table feed) at every grid point and the thrust
+# margin (max_feed_force less thrust) at every grid diameter, as float32, together with a
+# boolean map of the points meeting the power, thrust and speed limits. A query is an index
+# computation and a bilinear interpolation of the margins, for any number of points at once.
+#
+# The power margin is the continuous (or intermittent) power rating less the input power drawn
+# at the table feed, net power / efficiency + idle_power; the ratings are input powers, as in
+# solvers.max_feed and spindle_log.compare_segments.
+#
+# The drill tables are for HSS drills, so a map is for HSS drills of the style.
+#
+# Maps are cached by a fingerprint of everything they depend on, in a least recently used cache
+# of max_maps maps. The machine's fingerprint includes its limits and a sample of its torque
+# curve, so a changed machine definition, such as a new gear ratio, builds a new map while an
+# unchanged one is looked up. Sampling the curve is slow next to a lookup, so the fingerprint is
+# kept per machine and recomputed when one of the attributes it reads changes; a change the
+# attributes do not show, e.g., a replaced torque curve method, needs
+# invalidate_machine_fingerprint().
+
+
+class FeasibilityOutsideMap(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+def machine_fingerprint(machine, samples=64):
+    h = hashlib.sha1()
+    h.update(type(machine).__name__.encode())
+    for q, unit in [(machine.min_rpm, 'tpm'), (machine.max_rpm, 'tpm'), (machine.idle_power, 'watt'),
+                    (machine.max_feed_force, 'lbs')]:
+        h.update(np.float64(q.m_as(unit)).tobytes())
+    h.update(np.float64(machine.gear_ratio).tobytes())
+    h.update(np.float64(machine.efficiency).tobytes())
+    rpm = Q_(np.linspace(machine.min_rpm.m_as('tpm'), machine.max_rpm.m_as('tpm'), samples), 'tpm')
+    h.update(np.ascontiguousarray(machine.torque_continuous(rpm).m_as('newton meter'), dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(machine.torque_intermittent(rpm).m_as('newton meter'), dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+# Machine attributes read by machine_fingerprint(), besides tabulated curves such as _torque_x
+_fingerprint_attributes = ['min_rpm', 'max_rpm', 'idle_power', 'max_feed_force', 'gear_ratio', 'efficiency']
+
+_machine_fingerprints = weakref.WeakKeyDictionary()
+_machine_fingerprints_lock = threading.Lock()
+
+
+def _fingerprint_state(machine):
+    state = []
+    for k in _fingerprint_attributes:
+        v = getattr(machine, k)
+        state.append((v.magnitude, v.units) if isinstance(v, ureg.Quantity) else v)
+    for k, v in sorted(vars(machine).items()):
+        if k.startswith('_torque') and isinstance(v, (list, tuple, np.ndarray)):
+            state.append((k, tuple(np.ravel(v).tolist())))
+    return tuple(state)
+
+
+def cached_machine_fingerprint(machine):
+    # machine_fingerprint(), recomputed only when the machine's attributes change
+    state = _fingerprint_state(machine)
+    with _machine_fingerprints_lock:
+        entry = _machine_fingerprints.get(machine)
+    if entry is None or entry[0] != state:
+        entry = (state, machine_fingerprint(machine))
+        with _machine_fingerprints_lock:
+            _machine_fingerprints[machine] = entry
+    return entry[1]
+
+
+def invalidate_machine_fingerprint(machine):
+    with _machine_fingerprints_lock:
+        _machine_fingerprints.pop(machine, None)
+
+
+def material_fingerprint(stock_material):
+    # The class, the specific cutting energy and the table rows, and the group of a material
+    # defined by its group's tables rather than its class, e.g., IsoMaterial. The energy is
+    # taken without a unit conversion, which would cost more than the rest of a cache lookup.
+    u_s = stock_material.specific_cutting_energy
+    return (type(stock_material).__name__, float(u_s.magnitude), str(u_s.units),
+            tuple(sorted(getattr(stock_material, 'feed_chart_rows', {}).items())),
+            getattr(stock_material, 'tap_speed_class', None), getattr(stock_material, 'tap_torque_class', None),
+            getattr(getattr(stock_material, 'group', None), 'amg', None))
+
+
+class FeasibilityMap(PyMachiningBase):
+    def __init__(self, machine, stock_material, drill_style='jobber',
+                 diameter_range=(Q_(.5, 'mm'), Q_(26, 'mm')), n_diameters=256, n_rpm=256, intermittent=False):
+        PyMachiningBase.__init__(self)
+        self.drill_style = drill_style
+        self.intermittent = intermittent
+
+        # Uniform grids, so a query's cell is found by arithmetic
+        self.d0 = diameter_range[0].m_as('mm')
+        self.d1 = diameter_range[1].m_as('mm')
+        self.r0 = machine.min_rpm.m_as('tpm')
+        self.r1 = machine.max_rpm.m_as('tpm')
+        self.diameters = np.linspace(self.d0, self.d1, n_diameters)
+        self.rpms = np.linspace(self.r0, self.r1, n_rpm)
+
+        # The drill tables are for HSS drills; the drill style selects the feed column
+        drill = DrillHSS(Q_(self.diameters, 'mm'))
+        feed = drill.feed_rate_(stock_material, drill_style)
+        rpm = Q_(self.rpms, 'tpm')
+
+        # P = π (D / 2)^2 f n u_s, as an outer product over (diameter, rpm)
+        power_per_rpm = DrillOp.net_power_(drill.diameter, feed, Q_(1., 'tpm'), stock_material.specific_cutting_energy)
+        net_power = np.outer(power_per_rpm.m_as('watt'), self.rpms)
+        if intermittent:
+            available = machine.power_intermittent(rpm).m_as('watt')
+        else:
+            available = machine.power_continuous(rpm).m_as('watt')
+        drawn = net_power / machine.efficiency + machine.idle_power.m_as('watt')
+        self.power_margin = (available[None, :] - drawn).astype(np.float32)
+        self.thrust_margin = (machine.max_feed_force.m_as('lbs') -
+                              drill.thrust2(stock_material, feed).m_as('lbs')).astype(np.float32)
+        self.feasible = (self.power_margin >= 0) & (self.thrust_margin >= 0)[:, None]
+
+    @property
+    def nbytes(self):
+        return self.power_margin.nbytes + self.thrust_margin.nbytes + self.feasible.nbytes
+
+    def _coordinates(self, diameter, rpm):
+        d = np.asarray(diameter.m_as('mm'), dtype=float)
+        r = np.asarray(rpm.m_as('tpm'), dtype=float)
+        d, r = np.broadcast_arrays(d, r)
+        u = (d - self.d0) / (self.d1 - self.d0) * (len(self.diameters) - 1)
+        v = (r - self.r0) / (self.r1 - self.r0) * (len(self.rpms) - 1) if self.r1 > self.r0 else np.zeros(r.shape)
+        inside = (u >= 0) & (u <= len(self.diameters) - 1) & (v >= 0) & (v <= len(self.rpms) - 1)
+        return u, v, inside
+
+    def margins(self, diameter, rpm):
+        """
+        Interpolated power and thrust margins. Points outside the map's diameter range, or
+        outside the machine's speed range, are nan.
+
+        :return: (power margin [W], thrust margin [lbs])
+        """
+        u, v, inside = self._coordinates(diameter, rpm)
+        u = np.clip(u, 0, len(self.diameters) - 1)
+        v = np.clip(v, 0, len(self.rpms) - 1)
+        i = np.minimum(u.astype(int), len(self.diameters) - 2)
+        j = np.minimum(v.astype(int), len(self.rpms) - 2)
+        fu = u - i
+        fv = v - j
+        pm = self.power_margin
+        power = (pm[i, j] * (1 - fu) * (1 - fv) + pm[i + 1, j] * fu * (1 - fv) +
+                 pm[i, j + 1] * (1 - fu) * fv + pm[i + 1, j + 1] * fu * fv)
+        thrust = self.thrust_margin[i] * (1 - fu) + self.thrust_margin[i + 1] * fu
+        power = np.where(inside, power, np.nan)
+        thrust = np.where(inside, thrust, np.nan)
+        return Q_(power, 'watt'), Q_(thrust, 'lbs')
+
+    def query(self, diameter, rpm):
+        # True where the drill at the speed is within the machine's power, thrust and speed limits
+        power, thrust = self.margins(diameter, rpm)
+        return (power.magnitude >= 0) & (thrust.magnitude >= 0)
+
+    def query_nearest(self, diameter, rpm):
+        # Feasibility of the nearest grid point, from the boolean map only
+        u, v, inside = self._coordinates(diameter, rpm)
+        if not np.all(inside):
+            raise FeasibilityOutsideMap('query outside the map')
+        return self.feasible[np.rint(u).astype(int), np.rint(v).astype(int)]
+
+
+class FeasibilityMapCache(PyMachiningBase):
+    def __init__(self, max_maps=32):
+        PyMachiningBase.__init__(self)
+        # Least recently used first
+        self._maps = collections.OrderedDict()
+        self.max_maps = max_maps
+        self.builds = 0
+        # Held while building, so threads asking for the same map build it once
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._maps)
+
+    def get(self, machine, stock_material, drill_style='jobber', **kwargs):
+        key = (cached_machine_fingerprint(machine), material_fingerprint(stock_material), drill_style,
+               tuple(sorted((k, str(v)) for k, v in kwargs.items())))
+        with self._lock:
+            fmap = self._maps.get(key)
+            if fmap is None:
+                fmap = FeasibilityMap(machine, stock_material, drill_style, **kwargs)
+                self.builds += 1
+                self._maps[key] = fmap
+                while len(self._maps) > self.max_maps:
+                    self._maps.popitem(last=False)
+            else:
+                self._maps.move_to_end(key)
+            return fmap
+
+    def clear(self):
+        with self._lock:
+            self._maps = collections.OrderedDict()
+
+
+_feasibility_maps = FeasibilityMapCache()
+
+
+def feasibility_map(machine, stock_material, drill_style='jobber', **kwargs):
+    # Map from the module's cache, built on first use and when the machine or material changes
+    return _feasibility_maps.get(machine, stock_material, drill_style, **kwargs)
@@ -0,0 +1,240 @@
+import abc
+import bisect
+
+import numpy as np
+
+from .base import *
+
+# Curves through tabulated data, e.g., feed per revolution or tap torque against diameter.
+#
+# A fit is built once per table and keeps its coefficients as arrays; evaluating it is a
+# searchsorted and a Horner step for any number of points. Fits are cached by method and table
+# values, so the tables may stay written out in the functions that use them.
+#
+# Methods:
+#   linear  piecewise linear interpolation
+#   poly    least-squares polynomial, degree 4 by default. This was the only smooth fit, refit
+#           on every call. A quartic through 10-19 points may overshoot between them, e.g.,
+#           giving a larger drill a smaller feed.
+#   pchip   piecewise cubic Hermite interpolation with Fritsch-Carlson slopes. It passes through
+#           every point and is monotone wherever the table is, so it has no overshoot.
+#
+# table_fit_methods selects the method used for each named table when a caller asks for the
+# fitted curve (fit=True) instead of naming a method.
+
+
+class FittingUnknownMethod(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+class TableFit(PyMachiningBase, abc.ABC):
+    def __init__(self, table_x, table_y):
+        PyMachiningBase.__init__(self)
+        self.x = np.asarray(table_x, dtype=float)
+        self.y = np.asarray(table_y, dtype=float)
+        if self.x.ndim != 1 or self.x.shape != self.y.shape or len(self.x) < 2:
+            raise PyMachiningException('a table needs matching x and y with at least two points')
+        if np.any(np.diff(self.x) <= 0):
+            raise PyMachiningException('table x must be increasing')
+
+    @abc.abstractmethod
+    def __call__(self, x):
+        pass
+
+
+class LinearFit(TableFit):
+    def __init__(self, table_x, table_y):
+        TableFit.__init__(self, table_x, table_y)
+        # Piecewise coefficients in the form of MonotoneCubicFit's
+        zero = np.zeros(len(self.x) - 1)
+        self.coef = np.column_stack([self.y[:-1], np.diff(self.y) / np.diff(self.x), zero, zero])
+
+    def __call__(self, x):
+        return np.interp(x, self.x, self.y)
+
+
+class PolynomialFit(TableFit):
+    def __init__(self, table_x, table_y, deg=4):
+        TableFit.__init__(self, table_x, table_y)
+        import numpy.polynomial.polynomial as poly
+        self.deg = deg
+        self.coef = poly.polyfit(self.x, self.y, deg)
+
+    def __call__(self, x):
+        import numpy.polynomial.polynomial as poly
+        return poly.polyval(np.asarray(x, dtype=float), self.coef)
+
+
+class MonotoneCubicFit(TableFit):
+    def __init__(self, table_x, table_y):
+        TableFit.__init__(self, table_x, table_y)
+        x, y = self.x, self.y
+        h = np.diff(x)
+        delta = np.diff(y) / h
+        d = self._slopes(h, delta)
+        # y = c0 + c1 t + c2 t^2 + c3 t^3 on each interval, t = x - x_k; shape (intervals, 4)
+        self.coef = np.column_stack([y[:-1], d[:-1],
+                                     (3. * delta - 2. * d[:-1] - d[1:]) / h,
+                                     (d[:-1] + d[1:] - 2. * delta) / h ** 2])
+        # Rows of the coefficients, and the table x as floats, for the evaluation
+        self._c = [c.copy() for c in self.coef.T]
+        self._x = self.x.tolist()
+
+    @staticmethod
+    def _slopes(h, delta):
+        n = len(h) + 1
+        d = np.zeros(n)
+        if n == 2:
+            d[:] = delta[0]
+            return d
+        # Interior: weighted harmonic mean of the neighbouring secants, zero at a local extremum
+        w1 = 2. * h[1:] + h[:-1]
+        w2 = h[1:] + 2. * h[:-1]
+        same = delta[:-1] * delta[1:] > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d[1:-1] = np.where(same, (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:]), 0.)
+
+        # Ends: three point estimate, limited to keep the end intervals monotone
+        def end(h0, h1, m0, m1):
+            s = ((2. * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+            if np.sign(s) != np.sign(m0):
+                return 0.
+            if np.sign(m0) != np.sign(m1) and abs(s) > abs(3. * m0):
+                return 3. * m0
+            return s
+
+        d[0] = end(h[0], h[1], delta[0], delta[1])
+        d[-1] = end(h[-1], h[-2], delta[-1], delta[-2])
+        return d
+
+    def __call__(self, x):
+        c0, c1, c2, c3 = self._c
+        if np.ndim(x) == 0:
+            # A single value is most of the calls, one per tool
+            xc = min(max(float(x), self._x[0]), self._x[-1])
+            k = min(bisect.bisect_right(self._x, xc) - 1, len(self._x) - 2)
+            t = xc - self._x[k]
+            return np.float64(c0[k] + t * (c1[k] + t * (c2[k] + t * c3[k])))
+        x = np.asarray(x, dtype=float)
+        # Outside the table the end intervals' cubics are held at their end values
+        xc = np.clip(x, self.x[0], self.x[-1])
+        k = np.searchsorted(self.x, xc, side='right') - 1
+        k = np.minimum(k, len(self.x) - 2)
+        t = xc - self.x[k]
+        return c0[k] + t * (c1[k] + t * (c2[k] + t * c3[k]))
+
+
+class TableRowsFit(PyMachiningBase):
+    # Fits of every row of a 2D table sharing one x, e.g., a feed chart of material groups by
+    # diameter, evaluated for arrays of (row, x) pairs at once. A row may be shorter than x;
+    # its missing trailing values are nan and it is held at its last value past its end.
+    def __init__(self, table_x, table_y, method='pchip'):
+        PyMachiningBase.__init__(self)
+        self.x = np.asarray(table_x, dtype=float)
+        y = np.atleast_2d(np.asarray(table_y, dtype=float))
+        self.method = method
+        valid = ~np.isnan(y)
+        self.n_valid = valid.sum(axis=1)
+        if np.any(self.n_valid < 2) or np.any(valid[:, 1:] & ~valid[:, :-1]):
+            raise PyMachiningException('each row needs at least two values, with nan only at its end')
+        r = np.arange(len(y))
+        self.y_first = y[:, 0]
+        self.y_last = y[r, self.n_valid - 1]
+        self.x_last = self.x[self.n_valid - 1]
+
+        fits = [fit_methods[method](self.x[:m], row[:m]) for row, m in zip(y, self.n_valid)]
+        if method == 'poly':
+            self.coef = np.array([f.coef for f in fits])
+        else:
+            # Piecewise coefficients, shape (rows, intervals, 4); intervals past a row's end
+            # are constant at its last value
+            self.coef = np.zeros((len(y), len(self.x) - 1, 4))
+            self.coef[:, :, 0] = self.y_last[:, None]
+            for i, (f, m) in enumerate(zip(fits, self.n_valid)):
+                self.coef[i, :m - 1] = f.coef
+        self._c = [c.copy() for c in np.moveaxis(self.coef, -1, 0)]
+
+    def __call__(self, rows, x):
+        """
+        Values at each (row, x), with rows and x broadcast together.
+
+        :param rows: row indices
+        :param x: floats in the units of table_x
+        """
+        rows = np.asarray(rows, dtype=int)
+        x = np.asarray(x, dtype=float)
+        rows, x = np.broadcast_arrays(rows, x)
+        if self.method == 'poly':
+            c = self.coef[rows]
+            y = c[..., -1]
+            for j in range(c.shape[-1] - 2, -1, -1):
+                y = c[..., j] + x * y
+        else:
+            xc = np.clip(x, self.x[0], self.x[-1])
+            k = np.searchsorted(self.x, xc, side='right') - 1
+            k = np.minimum(k, len(self.x) - 2)
+            t = xc - self.x[k]
+            c0, c1, c2, c3 = self._c
+            y = c0[rows, k] + t * (c1[rows, k] + t * (c2[rows, k] + t * c3[rows, k]))
+        # Held at the ends of each row, as a single table is
+        y = np.where(x < self.x[0], self.y_first[rows], y)
+        y = np.where(x >= self.x_last[rows], self.y_last[rows], y)
+        return y
+
+
+fit_methods = {'linear': LinearFit, 'poly': PolynomialFit, 'pchip': MonotoneCubicFit}
+
+# Method of the fitted curve of each named table, and of unnamed ones
+table_fit_methods = {
+    'drill_feed': 'pchip',
+    'drill_thrust': 'pchip',
+    'tap_torque': 'pchip',
+}
+default_fit_method = 'pchip'
+
+_fits = {}
+
+
+_rows_fits = {}
+
+
+def table_rows_fit(table_x, table_y, method='pchip'):
+    # TableRowsFit of a 2D table, built on first use and cached as table_fit() does
+    if method not in fit_methods:
+        raise FittingUnknownMethod(f'fit must be from [{", ".join(fit_methods)}], not {method}')
+    table_y = np.asarray(table_y, dtype=float)
+    key = (method, tuple(table_x), table_y.shape, table_y.tobytes())
+    fit = _rows_fits.get(key)
+    if fit is None:
+        fit = _rows_fits.setdefault(key, TableRowsFit(table_x, table_y, method))
+    return fit
+
+
+def fit_method(fit, table=None):
+    # Method name for a fit argument: True for the table's method, False for linear, or a name
+    if isinstance(fit, str):
+        if fit not in fit_methods:
+            raise FittingUnknownMethod(f'fit must be from [{", ".join(fit_methods)}], not {fit}')
+        return fit
+    return table_fit_methods.get(table, default_fit_method) if fit else 'linear'
+
+
+def table_fit(table_x, table_y, method='pchip'):
+    """
+    Fit of a table, built on first use and cached.
+
+    :param table_x: increasing x values
+    :param table_y:
+    :param method: from fit_methods
+    :return: TableFit, callable on a float or an array of floats
+    """
+    if method not in fit_methods:
+        raise FittingUnknownMethod(f'fit must be from [{", ".join(fit_methods)}], not {method}')
+    key = (method, tuple(table_x), tuple(table_y))
+    fit = _fits.get(key)
+    if fit is None:
+        # Two threads may both build a fit; the first one stored is kept
+        fit = _fits.setdefault(key, fit_methods[method](table_x, table_y))
+    return fit
@@ -0,0 +1,190 @@
+import json
+import uuid
+
+import numpy as np
+
+from .base import *
+from .units import *
+from .materials import *
+from .operations import *
+from .tool_materials import *
+from .tools import *
+
+# Export and import of Autodesk Fusion 360 tool libraries (the JSON files written by
+# Fusion's Tool Library > Export). Only the fields PyMachining can fill are written;
+# Fusion supplies defaults for the rest when the library is imported.
+#
+# Feeds and speeds are calculated for the whole library at once by evaluate_tool_library(), with
+# operations.evaluate_tools().
+
+
+class FusionLibraryError(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+# Fusion geometry and preset values are in the library's unit, either inches or millimeters.
+_fusion_units = {'inches': {'length': 'inch', 'speed': 'feet * turn / minute'},
+                 'millimeters': {'length': 'mm', 'speed': 'meter * turn / minute'}}
+
+# Flute length as a multiple of diameter, from the drill sets noted in DrillHSS.feed_rate_
+# (jobber DIN338/ANSI 4xD, screw machine ANSI 2.5xD).
+_flute_length_ratio = {'jobber': 4., 'stub': 2.5}
+
+_point_angle = 118.
+
+_drill_classes = {'DrillHSS': DrillHSS,
+                  'DrillHSSJobber': DrillHSSJobber,
+                  'DrillHSSStub': DrillHSSStub}
+
+
+def _tool_material_code(tool_material):
+    if isinstance(tool_material, ToolMaterialHSS):
+        return 'hss'
+    elif isinstance(tool_material, ToolMaterialCarbide):
+        return 'carbide'
+    return 'unspecified'
+
+
+def evaluate_tool_library(tools, stock_material, machine=None):
+    """
+
+    :param tools: list of DrillHSS, DrillHSSJobber, DrillHSSStub and Tap
+    :param stock_material:
+    :param machine: if given, spindle speeds are clamped to the machine's range
+    :return: arrays of spindle speed and feed per revolution, one entry per tool.
+        Tap feeds are nan when the tap's pitch is unknown.
+    """
+    try:
+        return evaluate_tools(tools, stock_material, machine)
+    except OperationUnsupportedTool as e:
+        raise FusionLibraryError(f'unsupported tool {e.description}')
+
+
+def _fusion_entry(number, tool, diam, rpm, cutting_speed, feed, feed_rate, stock_material, unit):
+    preset = {'guid': str(uuid.uuid4()),
+              'name': stock_material.description,
+              'n': rpm,
+              'v_c': cutting_speed,
+              'tool-coolant': 'flood'}
+    if not np.isnan(feed):
+        preset.update({'f_n': feed,
+                       'v_f': feed_rate,
+                       'v_f_plunge': feed_rate,
+                       'v_f_retract': feed_rate})
+
+    if isinstance(tool, Tap):
+        tool_type = 'tap right hand'
+        geometry = {'DC': diam, 'NOF': 4}
+        if not np.isnan(feed):
+            # A tap's feed per revolution is its pitch.
+            geometry['TP'] = feed
+            geometry['thread-profile-angle'] = 60.
+    else:
+        tool_type = 'drill'
+        geometry = {'DC': diam,
+                    'LCF': diam * _flute_length_ratio.get(tool.drill_style, 4.),
+                    'NOF': 2,
+                    'SIG': _point_angle}
+
+    return {'type': tool_type,
+            'unit': unit,
+            'guid': str(uuid.uuid4()),
+            'description': tool.description,
+            'BMC': _tool_material_code(tool.tool_material),
+            'vendor': '',
+            'product-id': '',
+            'geometry': geometry,
+            'post-process': {'number': number, 'comment': tool.description},
+            'start-values': {'presets': [preset]},
+            'pymachining': {'class': type(tool).__name__}}
+
+
+def export_fusion_tool_library(tools, stock_material, machine, fp, unit='inches', first_tool_number=1):
+    """
+
+    :param tools: list of DrillHSS, DrillHSSJobber, DrillHSSStub and Tap
+    :param stock_material:
+    :param machine:
+    :param fp: file path or a writable text file object
+    :param unit: 'inches' or 'millimeters'
+    :param first_tool_number: post-processor tool number of the first tool
+    :return: number of tools written
+    """
+    if unit not in _fusion_units:
+        raise FusionLibraryError(f'unit must be from {list(_fusion_units)}')
+
+    if isinstance(fp, str):
+        with open(fp, 'w') as f:
+            return export_fusion_tool_library(tools, stock_material, machine, f, unit, first_tool_number)
+
+    rpm, feed = evaluate_tool_library(tools, stock_material, machine)
+
+    # Convert the columns to the library's units once, rather than once per tool.
+    length_unit = _fusion_units[unit]['length']
+    diam = Q_(np.array([t.diameter.m_as('inch') for t in tools]), 'inch')
+    diam_ = diam.m_as(length_unit)
+    rpm_ = rpm.m_as('tpm')
+    cutting_speed_ = DrillOp.speed_(diam, rpm).m_as(_fusion_units[unit]['speed'])
+    feed_ = feed.m_as(f'{length_unit} / turn')
+    feed_rate_ = (feed * rpm).m_as(f'{length_unit} / minute')
+
+    # Entries are written one at a time so the whole document never exists as a single string.
+    fp.write('{"data": [')
+    for i, tool in enumerate(tools):
+        if i > 0:
+            fp.write(',')
+        fp.write('\n')
+        entry = _fusion_entry(first_tool_number + i, tool, float(diam_[i]), float(rpm_[i]), float(cutting_speed_[i]),
+                              float(feed_[i]), float(feed_rate_[i]), stock_material, unit)
+        fp.write(json.dumps(entry))
+    fp.write('\n], "version": 2}\n')
+
+    return len(tools)
+
+
+def import_fusion_tool_library(fp):
+    """
+
+    :param fp: file path or a readable text file object
+    :return: list of DrillHSS and Tap tools. Entries of other types (mills, holders, ...) are skipped.
+    """
+    if isinstance(fp, str):
+        with open(fp) as f:
+            return import_fusion_tool_library(f)
+
+    try:
+        library = json.load(fp)
+    except json.JSONDecodeError as e:
+        raise FusionLibraryError(f'not a Fusion tool library: {e}')
+
+    tools = []
+    for entry in library.get('data', []):
+        tool_type = entry.get('type', '')
+        unit = entry.get('unit', 'millimeters')
+        if unit not in _fusion_units:
+            raise FusionLibraryError(f'unknown unit {unit}')
+        length_unit = _fusion_units[unit]['length']
+        geometry = entry.get('geometry', {})
+        if 'DC' not in geometry:
+            continue
+        diam = Q_(float(geometry['DC']), length_unit)
+
+        if tool_type == 'drill':
+            cls_name = entry.get('pymachining', {}).get('class')
+            if cls_name not in _drill_classes:
+                # Infer the drill style from the flute length.
+                lcf = geometry.get('LCF')
+                if lcf is not None and lcf <= _flute_length_ratio['stub'] * geometry['DC']:
+                    cls_name = 'DrillHSSStub'
+                else:
+                    cls_name = 'DrillHSSJobber'
+            tools.append(_drill_classes[cls_name](diam))
+        elif tool_type.startswith('tap'):
+            pitch = None
+            if 'TP' in geometry:
+                pitch = Q_(float(geometry['TP']), f'{length_unit} / turn')
+            tools.append(Tap(diam, pitch=pitch))
+
+    return tools
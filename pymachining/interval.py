@@ -0,0 +1,253 @@
+import numpy as np
+
+from .base import *
+from .units import *
+from .machines import *
+from .materials import *
+from .operations import *
+from .tools import *
+
+# Interval evaluation of the drilling calculations.
+#
+# Each uncertain value is an Interval holding [low, high] bounds, as quantities that may be
+# arrays. The material ranges (specific cutting energy, SFM) and the ± 25% of the feed chart
+# become intervals, and DrillOpBounds carries them through spindle speed, metal removal rate,
+# net power, torque and thrust, and through the machine's speed, torque, power and thrust
+# limits. The drilling formulas are monotone in each input, so most bounds are the formula
+# evaluated once at the low corner and once at the high corner of the inputs.
+
+
+class IntervalError(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+def _bounds(x):
+    if isinstance(x, Interval):
+        return x.low, x.high
+    return x, x
+
+
+class Interval(PyMachiningBase):
+    def __init__(self, low, high=None):
+        PyMachiningBase.__init__(self)
+        if high is None:
+            high = low
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def from_range(cls, value_range):
+        # From a [low, high] Quantity, e.g., MaterialType.specific_cutting_energy_range
+        return cls(value_range[0], value_range[1])
+
+    @classmethod
+    def around(cls, value, fraction):
+        # value ± fraction * value, for a non-negative value
+        return cls(value * (1. - fraction), value * (1. + fraction))
+
+    def __repr__(self):
+        return f'Interval({self.low}, {self.high})'
+
+    @property
+    def mid(self):
+        return (self.low + self.high) / 2.
+
+    @property
+    def width(self):
+        return self.high - self.low
+
+    def to(self, units):
+        return Interval(self.low.to(units), self.high.to(units))
+
+    def m_as(self, units):
+        return self.low.m_as(units), self.high.m_as(units)
+
+    def contains(self, x):
+        return (self.low <= x) & (x <= self.high)
+
+    def __neg__(self):
+        return Interval(-self.high, -self.low)
+
+    def __add__(self, other):
+        lo, hi = _bounds(other)
+        return Interval(self.low + lo, self.high + hi)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        lo, hi = _bounds(other)
+        return Interval(self.low - hi, self.high - lo)
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        lo, hi = _bounds(other)
+        if np.all(_magnitude(self.low) >= 0) and np.all(_magnitude(lo) >= 0):
+            # Both non-negative, the common case of physical magnitudes
+            return Interval(self.low * lo, self.high * hi)
+        products = [self.low * lo, self.low * hi, self.high * lo, self.high * hi]
+        return Interval(_minimum(products), _maximum(products))
+
+    __rmul__ = __mul__
+
+    def reciprocal(self):
+        if np.any((_magnitude(self.low) <= 0) & (_magnitude(self.high) >= 0)):
+            raise IntervalError('division by an interval containing zero')
+        return Interval(1. / self.high, 1. / self.low)
+
+    def __truediv__(self, other):
+        return self * _as_interval(other).reciprocal()
+
+    def __rtruediv__(self, other):
+        return self.reciprocal() * other
+
+    def __pow__(self, p):
+        if p < 0 or np.any(_magnitude(self.low) < 0):
+            raise IntervalError('only non-negative intervals raised to non-negative powers are supported')
+        return Interval(self.low ** p, self.high ** p)
+
+    # Comparisons of bounds. "certainly" holds for every value in the intervals, "possibly" for
+    # at least one.
+
+    def certainly_le(self, other):
+        lo, hi = _bounds(other)
+        return self.high <= lo
+
+    def possibly_le(self, other):
+        lo, hi = _bounds(other)
+        return self.low <= hi
+
+
+def _magnitude(x):
+    return x.magnitude if isinstance(x, ureg.Quantity) else x
+
+
+def _minimum(xs):
+    out = xs[0]
+    for x in xs[1:]:
+        out = np.minimum(out, x)
+    return out
+
+
+def _maximum(xs):
+    out = xs[0]
+    for x in xs[1:]:
+        out = np.maximum(out, x)
+    return out
+
+
+def check(value, limit):
+    """
+    Compare an interval with an interval limit.
+
+    :return: array of 'ok' (value certainly within the limit), 'exceeds' (certainly not) or
+        'maybe'
+    """
+    certain = np.asarray(value.certainly_le(limit))
+    possible = np.asarray(value.possibly_le(limit))
+    return np.where(certain, 'ok', np.where(possible, 'maybe', 'exceeds'))
+
+
+def curve_bounds(curve, rpm, samples=65):
+    """
+    Bounds of a machine curve, e.g., machine.torque_continuous, over an interval of speeds. The
+    curves are not monotone, so each interval is sampled at both ends and samples - 2 interior
+    points; a curve that changes faster than the sample spacing can be underestimated between
+    samples.
+
+    :param curve: function of a speed Quantity array
+    :param rpm: Interval of speeds
+    :param samples:
+    :return: Interval
+    """
+    lo = np.atleast_1d(rpm.low.m_as('tpm'))
+    hi = np.atleast_1d(rpm.high.m_as('tpm'))
+    t = np.linspace(0., 1., samples)
+    x = lo[:, None] + (hi - lo)[:, None] * t[None, :]
+    y = curve(Q_(x.ravel(), 'tpm'))
+    units = y.units
+    y = y.magnitude.reshape(x.shape)
+    low, high = y.min(axis=1), y.max(axis=1)
+    if np.ndim(rpm.low.magnitude) == 0:
+        low, high = float(low[0]), float(high[0])
+    return Interval(Q_(low, units), Q_(high, units))
+
+
+class DrillOpBounds(PyMachiningBase):
+    """
+    Bounds of a drilling operation on a machine, for one drill holding one diameter or an
+    array of them.
+
+    By default the specific cutting energy and the SFM span the material's published ranges
+    and the feed is the chart feed ± 25%; pass a Quantity for a fixed value or an Interval for
+    other bounds. The spindle speed interval is clamped to the machine's speed range.
+    """
+
+    def __init__(self, drill, stock_material, machine, feed=None, sfm=None, specific_cutting_energy=None,
+                 intermittent=False):
+        PyMachiningBase.__init__(self)
+        self.drill = drill
+        self.stock_material = stock_material
+        self.machine = machine
+
+        if specific_cutting_energy is None:
+            specific_cutting_energy = Interval.from_range(stock_material.specific_cutting_energy_range)
+        if sfm is None:
+            sfm = Interval.from_range(stock_material.sfm_range(drill.tool_material))
+        if feed is None:
+            feed = Interval.around(drill.feed_rate(stock_material), .25)
+        self.specific_cutting_energy = _as_interval(specific_cutting_energy)
+        self.sfm = _as_interval(sfm)
+        self.feed = _as_interval(feed)
+
+        D = drill.diameter
+        u_s = self.specific_cutting_energy
+        f = self.feed
+
+        # n = v / (π D), increasing in v
+        rpm = Interval(DrillOp.rrpm_(D, self.sfm.low), DrillOp.rrpm_(D, self.sfm.high))
+        self.spindle_rpm = Interval(machine.clamp_speed(rpm.low)[0], machine.clamp_speed(rpm.high)[0])
+        n = self.spindle_rpm
+
+        # Q = π (D / 2)^2 f n and P = Q u_s are increasing in each of f, n and u_s
+        self.metal_removal_rate = Interval(DrillOp.metal_removal_rate_(D, f.low, n.low),
+                                           DrillOp.metal_removal_rate_(D, f.high, n.high))
+        self.net_power = Interval(DrillOp.net_power_(D, f.low, n.low, u_s.low),
+                                  DrillOp.net_power_(D, f.high, n.high, u_s.high)).to('watt')
+        # Torque M = P / n = π (D / 2)^2 f u_s does not depend on n. Dividing the power interval by
+        # the speed interval would widen the bounds, so the speed is cancelled out first.
+        unit_rpm = Q_(1., 'tpm')
+        self.torque = Interval(DrillOp.torque_(DrillOp.net_power_(D, f.low, unit_rpm, u_s.low), unit_rpm),
+                               DrillOp.torque_(DrillOp.net_power_(D, f.high, unit_rpm, u_s.high), unit_rpm))
+        # Thrust is increasing in feed
+        self.thrust = Interval(drill.thrust2(stock_material, f.low), drill.thrust2(stock_material, f.high))
+
+        if intermittent:
+            torque_curve, power_curve = machine.torque_intermittent, machine.power_intermittent
+        else:
+            torque_curve, power_curve = machine.torque_continuous, machine.power_continuous
+        self.torque_available = curve_bounds(torque_curve, n)
+        self.power_available = curve_bounds(power_curve, n)
+        self.max_thrust = Interval(machine.max_feed_force)
+
+    def power_check(self):
+        return check(self.net_power, self.power_available)
+
+    def torque_check(self):
+        return check(self.torque, self.torque_available)
+
+    def thrust_check(self):
+        return check(self.thrust, self.max_thrust)
+
+    def check(self):
+        # Combined check: 'exceeds' if any limit is certainly exceeded, 'ok' if all are certainly met
+        checks = np.stack(np.broadcast_arrays(self.power_check(), self.torque_check(), self.thrust_check()))
+        return np.where(np.any(checks == 'exceeds', axis=0), 'exceeds',
+                        np.where(np.all(checks == 'ok', axis=0), 'ok', 'maybe'))
+
+
+def _as_interval(x):
+    return x if isinstance(x, Interval) else Interval(x)
@@ -0,0 +1,351 @@
+import re
+
+import numpy as np
+
+from .base import *
+from .units import *
+from .materials import *
+from .tool_materials import *
+from .tools import *
+
+# ISO material groups (P steel, M stainless steel, K cast iron, N non-ferrous, S heat resistant
+# alloys and titanium, H hardened materials, O other) and the application material groups (AMG)
+# of the Dormer tables in DrillHSS.feed_rate_, with an index from alloy designations to groups.
+#
+# Each group carries what the drilling calculations need, so an alloy can be evaluated without
+# a MaterialType subclass of its own: IsoMaterial('17-4PH') is a material like any other.
+#
+# Sources of the group values:
+#   feed chart rows   7.2 and 7.3 from the Dormer style codes of the drill sets listed in
+#                     DrillHSS.feed_rate_ (e.g., jobber 7.2:98I); the steel groups as chosen by
+#                     MaterialSteelMild and MaterialSteelMedium
+#   HSS SFM           the steel and aluminum groups as their Material classes; other families
+#                     from the Norseman ranges noted in materials.py, titanium from Tap.speed
+#   carbide SFM       only where a Material class has one
+#   cutting energy    Metal Cutting Theory and Practice, Table 2.1 as the Material classes;
+#                     other families typical handbook ranges (e.g., Kalpakjian, converted from
+#                     W s / mm^3), inf where unknown
+# Values not taken from one of these are marked estimated; treat them as starting points.
+#
+# Tapping uses the rows of the Parlec speed and torque tables in Tap.speed and Tap.torque_ given
+# in _tap_classes, the torque column by the group's hardness; groups without a row raise
+# ToolIncompatibleMaterial there.
+#
+# Hardened steels (1.6 to 1.8) and cermets have no feed chart rows, so HSS drills are
+# ToolIncompatibleMaterial for them as for MaterialSteelHigh. Alloys listed in more than one
+# group, e.g., 4140 annealed (1.4) and hardened (1.5, 1.6), are indexed to the first one;
+# alloy_groups() returns all of them.
+
+
+class IsoMaterialGroup(PyMachiningBase):
+    def __init__(self, amg, description, alloys, hardness, iso, iso_subgroup, sfm_hss, sfm_carbide,
+                 specific_cutting_energy, feed_chart_rows, machinability=float('nan'), estimated=False,
+                 tap_speed_class=None, tap_torque_class=None):
+        PyMachiningBase.__init__(self)
+        self.amg = amg
+        self.description = description
+        self.alloys = alloys
+        self.hardness = hardness
+        self.iso = iso
+        self.iso_subgroup = iso_subgroup
+        # [low, high] ranges; sfm in feet tpm, specific cutting energy in kW / (cm^3 / min)
+        self.sfm_hss = sfm_hss
+        self.sfm_carbide = sfm_carbide
+        self.specific_cutting_energy = specific_cutting_energy
+        self.feed_chart_rows = feed_chart_rows
+        self.machinability = machinability
+        self.estimated = estimated
+        self.tap_speed_class = tap_speed_class
+        self.tap_torque_class = tap_torque_class
+
+
+_nan2 = [float('nan'), float('nan')]
+_inf2 = [float('inf'), float('inf')]
+_hardened_tool_steels = ['4140', '4340', '52100', '8620', 'H11', 'H12', 'H13', 'A2', 'D2', 'O1', 'P20', '420']
+_high_speed_tool_steels = ['A2', 'D2', 'H10', 'H11', 'H12', 'H13', 'L1', 'L6', 'M1', 'M2', 'M42', 'T1']
+
+iso_material_groups = [
+    # 1. Steel
+    IsoMaterialGroup('1.1', 'Magnetic soft steel', ['12L14', '12L15'], '<120 HB', 'P', 1,
+                     [30, 50], [60, 90], [0.05, 0.066], {'jobber': 'F', 'stub': 'J'}),
+    IsoMaterialGroup('1.2', 'Structural steel, case carburising steel',
+                     ['1005', '1006', '1008', '1010', '1012', '1015', '1016', '1017', '1018', '1019', '1020', '1021',
+                      '1022', '1023', '1025', '1214', '1215', 'A36'], '<200 HB', 'P', 1,
+                     [30, 50], [60, 90], [0.05, 0.066], {'jobber': 'F', 'stub': 'J'}),
+    IsoMaterialGroup('1.3', 'Plain carbon steel',
+                     ['1030', '1035', '1038', '1040', '1042', '1045', '1050', '1055', '1060', '1144', '1145', '1146'],
+                     '<24 HRC', 'P', 2, [15, 20], [60, 90], [0.065, 0.09], {'jobber': 'D', 'stub': 'E'}),
+    IsoMaterialGroup('1.4', 'Alloy steel', _hardened_tool_steels, '<24 HRC', 'P', 3,
+                     [15, 20], [60, 90], [0.065, 0.09], {'jobber': 'D', 'stub': 'E'}),
+    IsoMaterialGroup('1.5', 'Alloy steel, hardened and tempered steel', _hardened_tool_steels, '24-38 HRC', 'P', 4,
+                     [7, 15], [60, 90], [0.065, 0.09], {'jobber': 'C', 'stub': 'D'}, estimated=True),
+    IsoMaterialGroup('1.6', 'Alloy steel, hardened and tempered steel', _hardened_tool_steels, '>38 HRC', 'H', 1,
+                     [7, 15], [60, 90], [0.09, 0.2], {}),
+    IsoMaterialGroup('1.7', 'Alloy steel, hardened', _high_speed_tool_steels, '49-55 HRC', 'H', 3,
+                     [7, 15], [60, 90], [0.09, 0.2], {}),
+    IsoMaterialGroup('1.8', 'Alloy steel, hardened', _high_speed_tool_steels, '55-63 HRC', 'H', 4,
+                     [7, 15], [60, 90], [0.09, 0.2], {}),
+    # 2. Stainless steel
+    IsoMaterialGroup('2.1', 'Free machining stainless steel', ['303', '416', '420F', '430F', '440', '440A'],
+                     '<24 HRC', 'M', 1, [30, 50], _nan2, [0.033, 0.083], {'jobber': 'D', 'stub': 'E'},
+                     estimated=True),
+    IsoMaterialGroup('2.2', 'Austenitic stainless steel',
+                     ['301', '302', '304', '316', '321', '330', 'Custom 455', 'AM-350'], '<24 HRC', 'M', 3,
+                     [30, 50], _nan2, [0.033, 0.083], {'jobber': 'C', 'stub': 'D'}, estimated=True),
+    IsoMaterialGroup('2.3', 'Ferritic + austenitic, martensitic stainless steel',
+                     ['318', '329', '405', '409', '410', '430', '431', '434', '446', 'Duplex'], '<32 HRC', 'M', 2,
+                     [30, 50], _nan2, [0.033, 0.083], {'jobber': 'C', 'stub': 'D'}, estimated=True),
+    IsoMaterialGroup('2.4', 'Precipitation hardened stainless steel', ['15-5PH', 'Custom 450', '17-4PH'],
+                     '<32 HRC', 'S', 2, [30, 50], _nan2, [0.033, 0.083], {'jobber': 'B', 'stub': 'C'},
+                     estimated=True),
+    # 3. Cast iron
+    IsoMaterialGroup('3.1', 'Lamellar graphite (grey) cast iron',
+                     ['Grey cast iron', 'GG10', 'J431C', 'A48 class 20', 'ASTM class 20'], '<150 HB', 'K', 1,
+                     [75, 125], _nan2, [0.018, 0.09], {'jobber': 'G', 'stub': 'H'}, estimated=True),
+    IsoMaterialGroup('3.2', 'Lamellar graphite (grey) cast iron',
+                     ['GG25', 'GG30', 'GG35', 'GG40', 'J158', 'A48 class 40', 'A48 class 50', 'A48 class 60',
+                      'ASTM class 25', 'ASTM class 30', 'ASTM class 35', 'ASTM class 40', 'ASTM class 45',
+                      'ASTM class 50'], '150 HB-32 HRC', 'K', 2,
+                     [50, 100], _nan2, [0.018, 0.09], {'jobber': 'F', 'stub': 'G'}, estimated=True),
+    IsoMaterialGroup('3.3', 'Nodular graphite, malleable cast iron',
+                     ['A220', 'A436', 'A439', 'A602', 'Black malleable', 'GGG40', 'GGG50', 'GGG60', 'GGG70',
+                      '60-40-18', '65-45-12'], '<200 HB', 'K', 3,
+                     [80, 90], _nan2, [0.018, 0.09], {'jobber': 'E', 'stub': 'F'}, estimated=True),
+    IsoMaterialGroup('3.4', 'Nodular graphite, malleable cast iron', ['GTS', 'GTW', 'J434C', '80-55-06'],
+                     '200 HB-32 HRC', 'K', 4, [50, 100], _nan2, [0.018, 0.09], {'jobber': 'D', 'stub': 'E'},
+                     estimated=True),
+    # 4. Titanium
+    IsoMaterialGroup('4.1', 'Titanium, unalloyed',
+                     ['Titanium', 'CP titanium', 'Ti grade 1', 'Ti grade 2', 'Ti grade 3', 'Ti grade 4'],
+                     '<200 HB', 'S', 1, [10, 25], _nan2, [0.033, 0.083], {'jobber': 'D', 'stub': 'E'},
+                     estimated=True),
+    IsoMaterialGroup('4.2', 'Titanium, alloyed', ['6Al4V', 'Ti-6Al-4V', '6Al6V2Sn', 'Monel', 'Monel K'],
+                     '<28 HRC', 'S', 2, [10, 25], _nan2, [0.033, 0.083], {'jobber': 'C', 'stub': 'D'},
+                     estimated=True),
+    IsoMaterialGroup('4.3', 'Titanium, alloyed', ['6Al4V4Mo', '7Al4Mo'], '28-38 HRC', 'S', 3,
+                     [10, 25], _nan2, [0.033, 0.083], {'jobber': 'B', 'stub': 'C'}, estimated=True),
+    # 5. Nickel
+    IsoMaterialGroup('5.1', 'Nickel, unalloyed', ['Nickel', 'Nickel 200', 'Nickel 201'], '<150 HB', 'S', 1,
+                     [30, 50], _nan2, [0.08, 0.11], {'jobber': 'D', 'stub': 'E'}, estimated=True),
+    IsoMaterialGroup('5.2', 'Nickel, alloyed',
+                     ['Monel 400', 'Hastelloy C', 'Hastelloy X', 'Inconel 625', 'Waspaloy'], '<28 HRC', 'S', 2,
+                     [30, 50], _nan2, [0.08, 0.11], {'jobber': 'B', 'stub': 'C'}, estimated=True),
+    IsoMaterialGroup('5.3', 'Nickel, alloyed',
+                     ['Inconel 718', 'Nimonic 75', 'Nimonic 80', 'Nimonic 90', 'Rene 41', 'Inconel 825', 'A286'],
+                     '28-38 HRC', 'S', 3, [30, 50], _nan2, [0.053, 0.133], {'jobber': 'A', 'stub': 'B'},
+                     estimated=True),
+    # 6. Copper
+    IsoMaterialGroup('6.1', 'Copper', ['Copper', 'C101', 'C110'], '<100 HB', 'N', 3,
+                     [150, 300], _nan2, [0.023, 0.055], {'jobber': 'G', 'stub': 'H'}, estimated=True),
+    IsoMaterialGroup('6.2', 'Beta brass, bronze',
+                     ['Brass', 'Bronze', 'Beta brass', 'C314', 'C340', 'C350', 'C360', 'C370'], '<200 HB', 'N', 4,
+                     [150, 300], _nan2, [0.023, 0.055], {'jobber': 'H', 'stub': 'I'}, estimated=True),
+    IsoMaterialGroup('6.3', 'Alpha brass, alloyed Cu + Al + Fe, long chipping',
+                     ['Alpha brass', 'Aluminum bronze', 'C260', 'C630'], '<200 HB', 'N', 3,
+                     [150, 300], _nan2, [0.023, 0.055], {'jobber': 'G', 'stub': 'H'}, estimated=True),
+    IsoMaterialGroup('6.4', 'High strength bronze', ['Ampco 18', 'Ampco 21', 'Ampco 25', 'High strength bronze'],
+                     '<49 HRC', 'N', 4, [70, 150], _nan2, [0.023, 0.055], {'jobber': 'F', 'stub': 'G'},
+                     estimated=True),
+    # 7. Aluminium and magnesium
+    IsoMaterialGroup('7.1', 'Al, Mg, unalloyed', ['Pure aluminum', 'Pure magnesium', '1100'], '<100 HB', 'N', 1,
+                     [200, 300], [1200, 1200], [0.012, 0.022], {'jobber': 'H', 'stub': 'I'},
+                     machinability=machinability('aluminum, cold drawn'), estimated=True),
+    IsoMaterialGroup('7.2', 'Al alloyed, Si < 0.5%', ['6061', '6061-T6', '7075'], '<150 HB', 'N', 1,
+                     [200, 300], [1200, 1200], [0.012, 0.022], {'jobber': 'I', 'stub': 'J'},
+                     machinability=machinability('aluminum, cold drawn')),
+    IsoMaterialGroup('7.3', 'Al alloyed, 0.5% < Si < 10%', ['356', '380', 'A380', '383', '390'], '<120 HB', 'N', 1,
+                     [200, 300], [1200, 1200], [0.012, 0.022], {'jobber': 'H', 'stub': 'I'},
+                     machinability=machinability('aluminum, cast')),
+    IsoMaterialGroup('7.4', 'Al alloyed, Si > 10%, Mg alloys', ['AZ31', 'AZ91', 'Magnesium'], '<120 HB', 'N', 2,
+                     [200, 300], [1200, 1200], [0.012, 0.022], {'jobber': 'G', 'stub': 'H'},
+                     machinability=machinability('magnesium, cast'), estimated=True),
+    # 8. Synthetic materials
+    IsoMaterialGroup('8.1', 'Thermoplastics', ['Ultramid', 'Polystrol', 'Thermoplastic'], '', 'O', 1,
+                     [100, 300], _nan2, _inf2, {'jobber': 'H', 'stub': 'I'}, estimated=True),
+    IsoMaterialGroup('8.2', 'Thermosetting plastics', ['Bakelite', 'Pertinax', 'Thermoset'], '', 'O', 2,
+                     [100, 300], _nan2, _inf2, {'jobber': 'H', 'stub': 'I'}, estimated=True),
+    IsoMaterialGroup('8.3', 'Reinforced plastic materials', ['CFK', 'GFK', 'AFK', 'CFRP', 'GFRP'], '', 'O', 3,
+                     [100, 300], _nan2, _inf2, {'jobber': 'F', 'stub': 'G'}, estimated=True),
+    # 9. Hard materials
+    IsoMaterialGroup('9.1', 'Cermets (metal-ceramics)', ['Ferrotic', 'Cermet'], '<54 HRC', 'H', 4,
+                     _nan2, _nan2, _inf2, {}),
+    # 10. Graphite
+    IsoMaterialGroup('10.1', 'Standard graphite', ['Graphite'], '', 'O', 4,
+                     [100, 300], _nan2, _inf2, {'jobber': 'G', 'stub': 'H'}, estimated=True),
+]
+
+
+# (tapping speed row, tapping torque column) by group; the torque column is the first whose
+# hardness is at least the group's, e.g., 400 BHN for 24-38 HRC
+_tap_classes = {
+    '1.1': ('steel-free machining', 'steel 200 bhn'),
+    '1.2': ('steel-free machining', 'steel 200 bhn'),
+    '1.3': ('steel-alloy', 'steel 300 bhn'),
+    '1.4': ('steel-alloy', 'steel 300 bhn'),
+    '1.5': ('steel-alloy', 'steel 400 bhn'),
+    '2.1': ('steel-stainless', 'steel 300 bhn'),
+    '2.2': ('steel-stainless', 'steel 300 bhn'),
+    '2.3': ('steel-stainless', 'steel 400 bhn'),
+    '2.4': ('steel-stainless', 'steel 400 bhn'),
+    '3.1': ('iron-cast', 'steel 200 bhn'),
+    '3.2': ('iron-cast', 'steel 400 bhn'),
+    '3.3': ('iron-malleable', 'steel 200 bhn'),
+    '3.4': ('iron-malleable', 'steel 400 bhn'),
+    '4.1': ('titanium', None),
+    '4.2': ('titanium', None),
+    '4.3': ('titanium', None),
+    '5.2': ('inconel, hastalloy, waspalloy', None),
+    '5.3': ('inconel, hastalloy, waspalloy', None),
+    '6.1': ('copper', 'brass'),
+    '6.2': ('brass', 'brass'),
+    '6.3': ('brass', 'brass'),
+    '6.4': ('bronze', None),
+    '7.1': ('aluminum', 'aluminum'),
+    '7.2': ('aluminum', 'aluminum'),
+    '7.3': ('aluminum', 'aluminum'),
+    '7.4': ('magnesium', 'aluminum'),
+    '8.1': ('plastics', None),
+    '8.2': ('plastics', None),
+    '8.3': ('plastics', None),
+}
+for _g in iso_material_groups:
+    _g.tap_speed_class, _g.tap_torque_class = _tap_classes.get(_g.amg, (None, None))
+
+
+_key_separators = re.compile(r'[\s\-_]')
+
+
+def alloy_key(name):
+    # Designations compare without case, spaces, hyphens and underscores, e.g., 17-4PH == 17-4 ph
+    return _key_separators.sub('', str(name)).upper()
+
+
+# Machinability of the alloys in machinability_table, by the designation without its condition
+_alloy_machinability = {}
+for _name, _v in machinability_table.items():
+    _base = re.sub(r'[\s\-](annealed|aged|condition a|stressproof)$', '', _name, flags=re.IGNORECASE)
+    _alloy_machinability.setdefault(alloy_key(_base), _v)
+
+alloy_index = {}
+_alloy_all_groups = {}
+for _i, _g in enumerate(iso_material_groups):
+    for _alloy in _g.alloys:
+        alloy_index.setdefault(alloy_key(_alloy), _i)
+        _alloy_all_groups.setdefault(alloy_key(_alloy), []).append(_i)
+    # Group machinability, when not given, is the median of its alloys with a rating
+    if np.isnan(_g.machinability):
+        _ratings = [_alloy_machinability[alloy_key(a)] for a in _g.alloys if alloy_key(a) in _alloy_machinability]
+        if _ratings:
+            _g.machinability = float(np.median(_ratings))
+
+
+def _row_index(rows, style):
+    row = rows.get(style)
+    return -1 if row is None else feed_chart_rows.index(row)
+
+
+# Group columns for vectorized queries, indexed like iso_material_groups
+_columns = {
+    'amg': np.array([g.amg for g in iso_material_groups]),
+    'iso': np.array([g.iso for g in iso_material_groups]),
+    'iso_subgroup': np.array([g.iso_subgroup for g in iso_material_groups]),
+    'machinability': np.array([g.machinability for g in iso_material_groups], dtype=float),
+    'sfm_hss': np.array([g.sfm_hss for g in iso_material_groups], dtype=float),
+    'sfm_carbide': np.array([g.sfm_carbide for g in iso_material_groups], dtype=float),
+    'specific_cutting_energy': np.array([g.specific_cutting_energy for g in iso_material_groups], dtype=float),
+    'feed_row_jobber': np.array([_row_index(g.feed_chart_rows, 'jobber') for g in iso_material_groups]),
+    'feed_row_stub': np.array([_row_index(g.feed_chart_rows, 'stub') for g in iso_material_groups]),
+    'estimated': np.array([g.estimated for g in iso_material_groups]),
+}
+_missing = {'amg': '', 'iso': '', 'iso_subgroup': -1, 'machinability': np.nan, 'sfm_hss': np.nan,
+            'sfm_carbide': np.nan, 'specific_cutting_energy': np.nan, 'feed_row_jobber': -1, 'feed_row_stub': -1,
+            'estimated': False}
+
+
+def classify_alloy(name):
+    # The alloy's group, raising MaterialUnknown for an alloy not in the index
+    i = alloy_index.get(alloy_key(name))
+    if i is None:
+        raise MaterialUnknown(name)
+    return iso_material_groups[i]
+
+
+def alloy_groups(name):
+    # Every group listing the alloy, e.g., annealed and hardened conditions
+    return [iso_material_groups[i] for i in _alloy_all_groups.get(alloy_key(name), [])]
+
+
+def alloy_machinability(name):
+    # The alloy's own rating if it has one, otherwise its group's
+    v = _alloy_machinability.get(alloy_key(name))
+    return classify_alloy(name).machinability if v is None else v
+
+
+def classify_alloys(names):
+    """
+    Group values for many alloy names at once.
+
+    :param names: iterable of designations
+    :return: dict of arrays with one entry per name: known, group (index into
+        iso_material_groups, -1 if unknown), amg, iso, iso_subgroup, machinability (the alloy's
+        own rating where it has one), sfm_hss and sfm_carbide [low, high] in feet tpm,
+        specific_cutting_energy [low, high] in kW / (cm^3 / min), feed_row_jobber and
+        feed_row_stub (feed_ipr_chart rows, -1 for none) and estimated
+    """
+    # Each distinct name is looked up once
+    names, inverse = np.unique(np.asarray(list(names), dtype=str), return_inverse=True)
+    keys = [alloy_key(n) for n in names]
+    group = np.fromiter((alloy_index.get(k, -1) for k in keys), dtype=int, count=len(keys))[inverse]
+    known = group >= 0
+    gi = np.where(known, group, 0)
+    out = {'known': known, 'group': group}
+    for k, col in _columns.items():
+        v = col[gi]
+        mask = known.reshape(known.shape + (1,) * (v.ndim - 1))
+        out[k] = np.where(mask, v, np.asarray(_missing[k], dtype=col.dtype))
+    own = np.fromiter((_alloy_machinability.get(k, np.nan) for k in keys), dtype=float, count=len(keys))[inverse]
+    out['machinability'] = np.where(np.isnan(own), out['machinability'], own)
+    return out
+
+
+def alloy_feed_rates(names, diameter, drill_style='jobber', fit=True):
+    """
+    HSS drill feed per revolution for every alloy and diameter, shape (alloys, diameters), from
+    one feed chart lookup. Alloys that are unknown or without a chart row are nan.
+    """
+    rows = classify_alloys(names)['feed_row_stub' if drill_style == 'stub' else 'feed_row_jobber']
+    d = np.atleast_1d(diameter.m_as('inch'))
+    v = feed_chart_rate(np.maximum(rows, 0)[:, None], Q_(d[None, :], 'inch'), fit).m_as('inch / turn')
+    return Q_(np.where((rows >= 0)[:, None], v, np.nan), 'inch / turn')
+
+
+class IsoMaterial(MaterialType):
+    def __init__(self, name):
+        MaterialType.__init__(self, name)
+        group = classify_alloy(name)
+        self.group = group
+        self.description = f'{name}, {group.description}, ISO {group.iso}{group.iso_subgroup}, AMG {group.amg}'
+        self.specific_cutting_energy = Q_(group.specific_cutting_energy[0], 'kilowatt / (cm ** 3 / min)')
+        self.specific_cutting_energy_range = Q_(group.specific_cutting_energy, 'kilowatt / (cm ** 3 / min)')
+        self.feed_chart_rows = dict(group.feed_chart_rows)
+        self.tap_speed_class = group.tap_speed_class
+        self.tap_torque_class = group.tap_torque_class
+
+    def sfm_range(self, tool_material=None):
+        if tool_material is None:
+            print('Warning: Assuming HSS tooling while calculating SFM')
+            tool_material = ToolMaterialHSS()
+
+        if isinstance(tool_material, ToolMaterialHSS):
+            sfm_range = self.group.sfm_hss
+        elif isinstance(tool_material, ToolMaterialCarbide):
+            sfm_range = self.group.sfm_carbide
+        else:
+            sfm_range = _nan2
+        if np.any(np.isnan(sfm_range)):
+            raise ToolIncompatibleMaterial(f'no {tool_material.description} speeds for {self.description}')
+
+        return Q_([float(x) for x in sfm_range], 'feet tpm')
+
+    def machinability(self):
+        return alloy_machinability(self.name)
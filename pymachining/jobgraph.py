@@ -0,0 +1,158 @@
+from .base import *
+from .units import *
+from .machines import *
+from .materials import *
+from .operations import *
+from .tools import *
+
+# Derived-value graphs for "what-if" analysis of a job.
+#
+# Each node is either an input or a value computed from other nodes. Values are computed
+# lazily and cached. Changing an input discards the cached values of the nodes that depend
+# on it, directly or indirectly, so the next request recomputes only those nodes. Every node
+# of a job graph holds an array with one entry per hole, so a recompute is a handful of
+# NumPy operations regardless of the number of holes.
+
+
+class JobGraphUnknownNode(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+class DerivedGraph(PyMachiningBase):
+    def __init__(self):
+        PyMachiningBase.__init__(self)
+        self._inputs = {}
+        self._nodes = {}
+        self._dependents = {}
+        self._values = {}
+        # Number of times each node has been computed, to see what a change touched.
+        self.compute_count = {}
+
+    def add_input(self, name, value):
+        self._inputs[name] = value
+        self._dependents.setdefault(name, set())
+
+    def add_node(self, name, func, deps):
+        # func is called with the values of deps, in order.
+        for dep in deps:
+            if dep not in self._inputs and dep not in self._nodes:
+                raise JobGraphUnknownNode(dep)
+            self._dependents[dep].add(name)
+        self._nodes[name] = (func, tuple(deps))
+        self._dependents.setdefault(name, set())
+        self.compute_count[name] = 0
+
+    def set(self, name, value):
+        if name not in self._inputs:
+            raise JobGraphUnknownNode(name)
+        self._inputs[name] = value
+        self._invalidate(name)
+
+    def get(self, name):
+        if name in self._inputs:
+            return self._inputs[name]
+        if name not in self._nodes:
+            raise JobGraphUnknownNode(name)
+        if name not in self._values:
+            func, deps = self._nodes[name]
+            self._values[name] = func(*[self.get(dep) for dep in deps])
+            self.compute_count[name] += 1
+        return self._values[name]
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def is_stale(self, name):
+        return name in self._nodes and name not in self._values
+
+    def inputs_of(self, name):
+        # The inputs that a node depends on, directly or indirectly.
+        if name in self._inputs:
+            return {name}
+        if name not in self._nodes:
+            raise JobGraphUnknownNode(name)
+        inputs = set()
+        for dep in self._nodes[name][1]:
+            inputs |= self.inputs_of(dep)
+        return inputs
+
+    def dependents_of(self, name):
+        # The nodes that depend on a node, directly or indirectly.
+        if name not in self._dependents:
+            raise JobGraphUnknownNode(name)
+        dependents = set()
+        for dep in self._dependents[name]:
+            dependents |= {dep} | self.dependents_of(dep)
+        return dependents
+
+    def _invalidate(self, name):
+        for dep in self._dependents[name]:
+            if dep in self._values:
+                del self._values[dep]
+                self._invalidate(dep)
+
+
+class DrillJobGraph(DerivedGraph):
+    # Graph over a drilling job, one entry per hole:
+    #
+    #   diameter, sfm -> spindle_rpm -> clamped_rpm -> torque_available -> power_available
+    #   diameter, feed, clamped_rpm -> metal_removal_rate -> net_power
+    #   net_power, power_available -> feasible
+    #
+    # Machine inputs are gear_ratio, efficiency and idle_power; the material input is
+    # specific_cutting_energy. Use the set_* methods so the machine and material objects stay
+    # consistent with the graph.
+
+    def __init__(self, machine, stock_material, drills):
+        DerivedGraph.__init__(self)
+        self.machine = machine
+        self.stock_material = stock_material
+        self.drills = drills
+
+        _, feed = evaluate_tools(drills, stock_material)
+        sfm = stock_material.sfm(ToolMaterialHSS())
+
+        self.add_input('diameter', Q_(np.array([d.diameter.m_as('inch') for d in drills]), 'inch'))
+        self.add_input('feed', feed)
+        self.add_input('sfm', sfm)
+        self.add_input('gear_ratio', machine.gear_ratio)
+        self.add_input('efficiency', machine.efficiency)
+        self.add_input('idle_power', machine.idle_power)
+        self.add_input('specific_cutting_energy', stock_material.specific_cutting_energy)
+
+        self.add_node('spindle_rpm', DrillOp.rrpm_, ['diameter', 'sfm'])
+        self.add_node('clamped_rpm', lambda rpm: machine.clamp_speed(rpm)[0], ['spindle_rpm'])
+        self.add_node('torque_available', lambda rpm, gear_ratio: machine.torque_continuous(rpm, gear_ratio),
+                      ['clamped_rpm', 'gear_ratio'])
+        # Same as MachineType.power_continuous, but reusing the torque node.
+        self.add_node('power_available',
+                      lambda t, rpm, efficiency, idle_power: (t * rpm / efficiency).to('watt') + idle_power,
+                      ['torque_available', 'clamped_rpm', 'efficiency', 'idle_power'])
+        self.add_node('metal_removal_rate', DrillOp.metal_removal_rate_, ['diameter', 'feed', 'clamped_rpm'])
+        self.add_node('net_power', lambda Q, u_s: (Q * u_s).to('watt'),
+                      ['metal_removal_rate', 'specific_cutting_energy'])
+        self.add_node('feasible', lambda P, P_available: P <= P_available, ['net_power', 'power_available'])
+
+    def set_gear_ratio(self, gear_ratio):
+        self.machine.set_gear_ratio(gear_ratio)
+        self.set('gear_ratio', gear_ratio)
+
+    def set_efficiency(self, efficiency):
+        self.machine.efficiency = efficiency
+        self.set('efficiency', efficiency)
+
+    def set_idle_power(self, idle_power):
+        self.machine.idle_power = idle_power
+        self.set('idle_power', idle_power)
+
+    def set_specific_cutting_energy(self, specific_cutting_energy):
+        self.stock_material.specific_cutting_energy = specific_cutting_energy
+        self.set('specific_cutting_energy', specific_cutting_energy)
+
+    def set_sfm(self, sfm):
+        self.set('sfm', sfm)
+
+    def set_feed(self, feed):
+        self.set('feed', feed)
@@ -5,6 +5,69 @@ import pylab
 import numpy as np
 
 
+def _torque_quantity(T):
+    # Torque curves are evaluated with NumPy so that a whole array of speeds can be evaluated
+    # at once; return a plain float for a single speed.
+    T = np.asarray(T, dtype=float)
+    if T.ndim == 0:
+        T = float(T)
+    return Q_(T, 'newton meter')
+
+
+class SpindleRange(PyMachiningBase):
+    # One belt or gear range of a spindle. With a reduction of gear_ratio, the spindle turns
+    # gear_ratio times slower than the motor with gear_ratio times the torque. The machine's
+    # torque curves are taken as the curves at a gear ratio of 1 and are evaluated, for a whole
+    # array of speeds in one call, when the range is; the speeds, efficiency and idle power are
+    # also read from the machine then, so a range follows later changes to its machine.
+
+    def __init__(self, name, gear_ratio, machine):
+        PyMachiningBase.__init__(self)
+        self.name = name
+        self.gear_ratio = gear_ratio
+        self.machine = machine
+
+    @property
+    def efficiency(self):
+        return self.machine.efficiency
+
+    @property
+    def idle_power(self):
+        return self.machine.idle_power
+
+    @property
+    def min_rpm(self):
+        return self.machine.min_rpm / self.gear_ratio
+
+    @property
+    def max_rpm(self):
+        return self.machine.max_rpm / self.gear_ratio
+
+    def _motor_rpm(self, rpm):
+        if not isinstance(rpm, ureg.Quantity) or rpm.dimensionless:
+            rpm = rpm * ureg.tpm
+        return rpm * self.gear_ratio
+
+    # The machine's torque at the motor speed and a gear ratio of 1, passed explicitly rather
+    # than set on the machine, which other threads may be evaluating
+    def torque_continuous(self, rpm):
+        return self.machine.torque_continuous(self._motor_rpm(rpm), gear_ratio=1.) * self.gear_ratio
+
+    def torque_intermittent(self, rpm):
+        return self.machine.torque_intermittent(self._motor_rpm(rpm), gear_ratio=1.) * self.gear_ratio
+
+    def in_range(self, rpm):
+        rpm_ = np.abs(rpm.m_as('tpm'))
+        return (self.min_rpm.m_as('tpm') <= rpm_) & (rpm_ <= self.max_rpm.m_as('tpm'))
+
+    # As in MachineType.power_continuous()
+    def power_continuous(self, rpm):
+        return (self.torque_continuous(rpm) * abs(rpm) / self.efficiency).to('watt') + self.idle_power
+
+    def power_intermittent(self, rpm):
+        return (self.torque_intermittent(rpm) * abs(rpm) / self.efficiency).to('watt') + self.idle_power
+
+
 class MachineType(PyMachiningBase):
     def __init__(self):
         PyMachiningBase.__init__(self)
@@ -17,39 +80,92 @@ class MachineType(PyMachiningBase):
         self.idle_power = Q_(0., 'watt')  # tare power
         self.efficiency = 1.
         self.max_feed_force = Q_(0, 'lbs')
+        self.spindle_ranges = []
 
     def set_gear_ratio(self, gear_ratio):
         self.gear_ratio = gear_ratio
 
-    def _torque_continuous(self, rpm):
+    def add_spindle_range(self, name, gear_ratio):
+        self.spindle_ranges.append(SpindleRange(name, gear_ratio, self))
+
+    def get_spindle_ranges(self):
+        # A machine without declared ranges has the single range of its current gear ratio.
+        if self.spindle_ranges:
+            return self.spindle_ranges
+        return [SpindleRange('default', self.gear_ratio, self)]
+
+    def select_spindle_range(self, rpm, power, intermittent=False):
+        """
+        Select, for each operation, the spindle range with the largest power margin.
+
+        :param rpm: array of spindle speeds, one per operation
+        :param power: array of required net power, one per operation
+        :param intermittent: compare against the intermittent rather than continuous rating
+        :return: (array of range indexes into get_spindle_ranges(), array of power margins).
+            The margin is -inf when the speed is outside every range.
+        """
+        ranges = self.get_spindle_ranges()
+        power_ = np.atleast_1d(power.m_as('watt'))
+        margins = np.empty((len(ranges), len(power_)))
+        for i, r in enumerate(ranges):
+            available = r.power_intermittent(rpm) if intermittent else r.power_continuous(rpm)
+            margins[i] = np.where(r.in_range(rpm), np.atleast_1d(available.m_as('watt')) - power_, -np.inf)
+        selected = np.argmax(margins, axis=0)
+        margin = margins[selected, np.arange(len(power_))]
+        return selected, Q_(margin, 'watt')
+
+    @staticmethod
+    def count_range_changes(selected):
+        # Number of range changes when the operations are run in order
+        selected = np.asarray(selected)
+        return int(np.count_nonzero(selected[1:] != selected[:-1]))
+
+    def plan_spindle_ranges(self, rpm, power, intermittent=False):
+        # select_spindle_range() and count_range_changes() for a job sequence in one call
+        selected, margin = self.select_spindle_range(rpm, power, intermittent)
+        return selected, margin, self.count_range_changes(selected)
+
+    # The _torque methods give the spindle torque at gear_ratio, which the machine's curves may
+    # ignore if they do not depend on it
+    def _torque_continuous(self, rpm, gear_ratio):
         return float('inf')
 
-    def _torque_intermittent(self, rpm):
+    def _torque_intermittent(self, rpm, gear_ratio):
         return float('inf')
 
-    def torque_continuous(self, rpm):
+    def torque_continuous(self, rpm, gear_ratio=None):
+        # Torque at the machine's gear_ratio, or at the one given
         if not isinstance(rpm, ureg.Quantity) or rpm.dimensionless:
             rpm *= ureg.tpm
+        if gear_ratio is None:
+            gear_ratio = self.gear_ratio
 
         abs_rpm = abs(rpm)
 
-        T = self._torque_continuous(abs_rpm)
+        T = self._torque_continuous(abs_rpm, gear_ratio)
         # T = math.copysign(T, rpm)
-        if rpm < 0:
+        if np.ndim(rpm.magnitude) > 0:
+            T = T * np.where(rpm.magnitude < 0, -1., 1.)
+        elif rpm < 0:
             T *= -1
 
         # T *= self.gear_ratio
         return T
 
-    def torque_intermittent(self, rpm):
+    def torque_intermittent(self, rpm, gear_ratio=None):
+        # Torque at the machine's gear_ratio, or at the one given
         if not isinstance(rpm, ureg.Quantity) or rpm.dimensionless:
             rpm *= ureg.tpm
+        if gear_ratio is None:
+            gear_ratio = self.gear_ratio
 
         abs_rpm = abs(rpm)
 
-        T = self._torque_intermittent(abs_rpm)
+        T = self._torque_intermittent(abs_rpm, gear_ratio)
         # T = math.copysign(T, rpm)
-        if rpm < 0:
+        if np.ndim(rpm.magnitude) > 0:
+            T = T * np.where(rpm.magnitude < 0, -1., 1.)
+        elif rpm < 0:
             T *= -1
 
         # T *= self.gear_ratio
@@ -76,7 +192,8 @@ class MachineType(PyMachiningBase):
         # return t * rpm / 9.5488)
         return (t * rpm / self.efficiency).to('watt') + self.idle_power
 
-    def plot_torque_speed_curve(self, highlight_power=None, highlight_torque=None, highlight_rpm=None, embed=False, full_title=True):
+    def plot_torque_speed_curve(self, highlight_power=None, highlight_torque=None, highlight_rpm=None, embed=False, full_title=True,
+                                ax=None):
         x = np.linspace(self.min_rpm, self.max_rpm / self.gear_ratio, 100)  # * ureg.tpm
         # y1 = np.vectorize(m.torque_continuous)(x)
         # y2 = np.vectorize(m.torque_intermittent)(x)
@@ -85,7 +202,11 @@ class MachineType(PyMachiningBase):
         y1 = np.array([self.torque_continuous(x_).to(ureg.newton * ureg.meter).magnitude for x_ in x]) * (ureg.newton * ureg.meter)
         y2 = np.array([self.torque_intermittent(x_).to(ureg.newton * ureg.meter).magnitude for x_ in x]) * (ureg.newton * ureg.meter)
 
-        fig, ax1 = pylab.subplots()
+        # Drawn on ax when given, e.g., a Figure's axes outside pylab, which is then returned
+        if ax is None:
+            fig, ax1 = pylab.subplots()
+        else:
+            fig, ax1 = ax.figure, ax
 
         if full_title:
             ax1.set_title(self.name + " Torque, Power vs. Speed", fontsize=16.)
@@ -142,6 +263,8 @@ class MachineType(PyMachiningBase):
         ax2.legend(loc='upper right')
 
         fig.tight_layout()
+        if ax is not None:
+            return ax1
         if not embed:
             pylab.show()
             pylab.close()
@@ -157,6 +280,12 @@ class MachineType(PyMachiningBase):
             return img_str
 
     def clamp_speed(self, rpm):
+        if isinstance(rpm, ureg.Quantity) and np.ndim(rpm.magnitude) > 0:
+            # Array of speeds, e.g., one per tool of a tool library. Adjusted is then a boolean array.
+            rpm_ = rpm.m_as('tpm')
+            clamped = np.clip(rpm_, self.min_rpm.m_as('tpm'), self.max_rpm.m_as('tpm'))
+            return Q_(clamped, 'tpm'), clamped != rpm_
+
         adjusted = False
         if rpm < self.min_rpm:
             rpm = self.min_rpm
@@ -195,6 +324,10 @@ class MillingMachine(MachineType):
         self.max_z_rate = Q_(0, 'inch / min')
         self.max_x_rate = Q_(0, 'inch / min')
         self.max_y_rate = Q_(0, 'inch / min')
+        # Axis accelerations, unlimited unless measured
+        self.max_z_accel = Q_(float('inf'), 'inch / s ** 2')
+        self.max_x_accel = Q_(float('inf'), 'inch / s ** 2')
+        self.max_y_accel = Q_(float('inf'), 'inch / s ** 2')
 
 
 class VerticalMillingMachine(MillingMachine):
@@ -238,23 +371,22 @@ class MachinePM25MV(MachinePM25MV_LeadshineAxes):
 
     # I have no information on the actual torque-speed curve; these are guesses.
 
-    def _torque_continuous(self, abs_rpm):
-        x1, y1 = Q_(0, 'tpm'), Q_(0., 'newton meter')
-        x2, y2 = Q_(2500, 'tpm') / self.gear_ratio, Q_(2.85, 'newton meter') * self.gear_ratio
+    def _torque_continuous(self, abs_rpm, gear_ratio):
+        x1, y1 = 0., 0.
+        x2, y2 = 2500. / gear_ratio, 2.85 * gear_ratio
         dx = x1 - x2
         dy = y1 - y2
         m = dy / dx
         b = y1 - m * x1
 
-        if self.min_rpm / self.gear_ratio <= abs_rpm <= self.max_rpm / self.gear_ratio:
-            T = m * abs_rpm + b
-        else:
-            T = Q_(0, 'newton meter')
+        x = abs_rpm.m_as('tpm')
+        in_range = (self.min_rpm.m_as('tpm') / gear_ratio <= x) & (x <= self.max_rpm.m_as('tpm') / gear_ratio)
+        T = np.where(in_range, m * x + b, 0.)
 
-        return T
+        return _torque_quantity(T)
 
-    def _torque_intermittent(self, rpm):
-        return self._torque_continuous(rpm)
+    def _torque_intermittent(self, rpm, gear_ratio):
+        return self._torque_continuous(rpm, gear_ratio)
 
     def torque_range(self):
         return [Q_(0, 'newton meter'), Q_(2.85, 'newton meter')]
@@ -277,43 +409,33 @@ class MachinePM25MV_DMMServo(MachinePM25MV_LeadshineAxes):
     # 1.494459493	4969.465649	3.168628417	4979.643766
     # 0.275055405	4989.821883	0.26540261	4979.643766
 
-    def _torque_continuous(self, abs_rpm):
-        x1, y1 = Q_(2994.910941, 'tpm'), Q_(2.592785028, 'newton meter')
-        x2, y2 = Q_(4969.465649, 'tpm'), Q_(1.494459493, 'newton meter')
+    def _torque_continuous(self, abs_rpm, gear_ratio):
+        x1, y1 = 2994.910941, 2.592785028
+        x2, y2 = 4969.465649, 1.494459493
         dx = x1 - x2
         dy = y1 - y2
         m = dy / dx
         b = y1 - m * x1
 
-        if Q_(0, 'tpm') <= abs_rpm <= Q_(3000, 'tpm'):
-            T = 2.6 * (ureg.newton * ureg.meter)
-        elif Q_(3000, 'tpm') < abs_rpm < Q_(5000, 'tpm'):
-            T = m * abs_rpm + b
-        elif abs_rpm == Q_(5000, 'tpm'):
-            T = Q_(1.5, 'newton meter')
-        else:
-            T = Q_(0, 'newton meter')
+        x = abs_rpm.m_as('tpm')
+        T = np.select([(0 <= x) & (x <= 3000), (3000 < x) & (x < 5000), x == 5000],
+                      [2.6, m * x + b, 1.5], 0.)
 
-        return T
+        return _torque_quantity(T)
 
-    def _torque_intermittent(self, abs_rpm):
-        x1, y1 = Q_(3137.40458, 'tpm'), Q_(7.160182221, 'newton meter')
-        x2, y2 = Q_(4979.643766, 'tpm'), Q_(3.168628417, 'newton meter')
+    def _torque_intermittent(self, abs_rpm, gear_ratio):
+        x1, y1 = 3137.40458, 7.160182221
+        x2, y2 = 4979.643766, 3.168628417
         dx = x1 - x2
         dy = y1 - y2
         m = dy / dx
         b = y1 - m * x1
 
-        if Q_(0, 'tpm') <= abs_rpm <= Q_(3100, 'tpm'):
-            T = 7.2 * (ureg.newton * ureg.meter)
-        elif Q_(3100, 'tpm') < abs_rpm < Q_(5000, 'tpm'):
-            T = m * abs_rpm + b
-        elif abs_rpm == Q_(5000, 'tpm'):
-            T = Q_(3.2, 'newton meter')
-        else:
-            T = Q_(0, 'newton meter')
+        x = abs_rpm.m_as('tpm')
+        T = np.select([(0 <= x) & (x <= 3100), (3100 < x) & (x < 5000), x == 5000],
+                      [7.2, m * x + b, 3.2], 0.)
 
-        return T
+        return _torque_quantity(T)
 
     def torque_range(self):
         return [Q_(2.6, 'newton meter'), Q_(7.2, 'newton meter')]
@@ -337,22 +459,16 @@ class MachinePM25MV_HS(MachinePM25MV_LeadshineAxes):
         # https://apps.automeris.io/wpd/
         coeffs = np.polyfit(self._torque_x, self._torque_y, 2)
 
-        if Q_(0, 'tpm') <= abs_rpm <= Q_(18000, 'tpm'):
-            T = self._torque_y[0] * (ureg.newton * ureg.meter)
-        elif Q_(18000, 'tpm') < abs_rpm < Q_(24000, 'tpm'):
-            x_ = abs_rpm.to('turn / minute').magnitude
-            T = coeffs.dot([x_ ** 2, x_, 1]) * (ureg.newton * ureg.meter)
-        elif abs_rpm == Q_(24000, 'tpm'):
-            T = Q_(self._torque_y[-1], 'newton meter')
-        else:
-            T = Q_(0, 'newton meter')
+        x = abs_rpm.m_as('tpm')
+        T = np.select([(0 <= x) & (x <= 18000), (18000 < x) & (x < 24000), x == 24000],
+                      [self._torque_y[0], np.polyval(coeffs, x), self._torque_y[-1]], 0.)
 
-        return T
+        return _torque_quantity(T)
 
-    def _torque_continuous(self, abs_rpm):
+    def _torque_continuous(self, abs_rpm, gear_ratio):
         return self._torque_both(abs_rpm)
 
-    def _torque_intermittent(self, abs_rpm):
+    def _torque_intermittent(self, abs_rpm, gear_ratio):
         # The VFD can increase torque, briefly, up to seemingly 200%, depending
         # on VFD settings, but lets conservatively estimate 120%.
         return self._torque_both(abs_rpm) * 1.2
@@ -24,7 +24,9 @@ def Material(material_name):
         # high-carbon steel, tool steel, 0.61% to 1.50% carbon
         return MaterialSteelHigh(x)
     else:
-        raise MaterialUnknown(material_name)
+        # Other alloys through the ISO material group index, which raises MaterialUnknown
+        from .iso_materials import IsoMaterial
+        return IsoMaterial(material_name)
 
 
 class MaterialType(PyMachiningBase):
@@ -34,12 +36,30 @@ class MaterialType(PyMachiningBase):
         self.name = name
         self.specific_cutting_force = float('inf')
         self.specific_cutting_energy = float('inf')
+        # Published [low, high] range that specific_cutting_energy was selected from
+        self.specific_cutting_energy_range = Q_([float('inf'), float('inf')], 'kilowatt / (cm ** 3 / min)')
+        # Rows of tools.feed_ipr_chart for HSS drills by drill style; no entry for materials
+        # that HSS drills should not cut
+        self.feed_chart_rows = {'jobber': 'H', 'stub': 'H'}
+        # Rows of the tapping speed and torque tables in Tap.speed and Tap.torque_; None for
+        # materials without tapping data
+        self.tap_speed_class = None
+        self.tap_torque_class = None
+
+    def sfm_range(self, tool_material=None):
+        # Published [low, high] SFM range for the tool material
+        return Q_([float('inf'), float('inf')], 'feet tpm')
 
-    def sfm(self):
+    def sfm(self, tool_material=None):
         # Roughing and finishing cuts could have different sfms, as could different operations
         # E.g., https://engmachineshop.wustl.edu/items/cutting-speeds-for-materials/
         # and https://www.autodesk.com/products/fusion-360/blog/speeds-feeds-new-cnc-machinists/
-        return Q_(float('inf'), 'feet tpm')
+        sfm_range = self.sfm_range(tool_material)
+
+        v = (sfm_range[0] + sfm_range[1]) / 2.
+        v = sfm_range[0]
+
+        return v
 
     def speed(self):
         return self.sfm().to('mm * turn / minute')
@@ -69,8 +89,12 @@ class MaterialAluminum(MaterialType):
         specific_cutting_energy_avg = (specific_cutting_energy[0] + specific_cutting_energy[1]) / 2.
         self.specific_cutting_energy = Q_(specific_cutting_energy_avg, 'kilowatt / (cm ** 3 / min)')
         self.specific_cutting_energy = Q_(specific_cutting_energy[0], 'kilowatt / (cm ** 3 / min)')
+        self.specific_cutting_energy_range = Q_(specific_cutting_energy, 'kilowatt / (cm ** 3 / min)')
+        self.feed_chart_rows = {'jobber': 'H', 'stub': 'I'}  # stub J is also reasonable
+        self.tap_speed_class = 'aluminum'
+        self.tap_torque_class = 'aluminum'
 
-    def sfm(self, tool_material=None):
+    def sfm_range(self, tool_material=None):
         if tool_material is None:
             print('Warning: Assuming HSS tooling while calculating SFM')
             tool_material = ToolMaterialHSS()
@@ -82,10 +106,7 @@ class MaterialAluminum(MaterialType):
             sfm_range = [1200, 1200]
             # The upper limit could be max(1200, f(spindle.max_rpm, ...))
 
-        v = Q_((sfm_range[0] + sfm_range[1]) / 2., 'feet tpm')
-        v = Q_(sfm_range[0], 'feet tpm')
-
-        return v
+        return Q_([float(x) for x in sfm_range], 'feet tpm')
 
     def machinability(self):
         return machinability('aluminum, cold drawn')
@@ -171,8 +192,12 @@ class MaterialSteelMild(MaterialSteel):
         specific_cutting_energy_avg = (specific_cutting_energy[0] + specific_cutting_energy[1]) / 2.
         self.specific_cutting_energy = Q_(specific_cutting_energy_avg, 'kilowatt / (cm ** 3 / min)')
         self.specific_cutting_energy = Q_(specific_cutting_energy[0], 'kilowatt / (cm ** 3 / min)')
+        self.specific_cutting_energy_range = Q_(specific_cutting_energy, 'kilowatt / (cm ** 3 / min)')
+        self.feed_chart_rows = {'jobber': 'F', 'stub': 'J'}
+        self.tap_speed_class = 'steel-free machining'
+        self.tap_torque_class = 'steel 200 bhn'
 
-    def sfm(self, tool_material=None):
+    def sfm_range(self, tool_material=None):
         if tool_material is None:
             print('Warning: Assuming HSS tooling while calculating SFM')
             tool_material = ToolMaterialHSS()
@@ -183,10 +208,7 @@ class MaterialSteelMild(MaterialSteel):
         elif isinstance(tool_material, ToolMaterialCarbide):
             sfm_range = [60, 90]
 
-        v = Q_((sfm_range[0] + sfm_range[1]) / 2., 'feet tpm')
-        v = Q_(sfm_range[0], 'feet tpm')
-
-        return v
+        return Q_([float(x) for x in sfm_range], 'feet tpm')
 
     def machinability(self):
         return machinability('1212')
@@ -202,8 +224,12 @@ class MaterialSteelMedium(MaterialSteel):
         specific_cutting_energy_avg = (specific_cutting_energy[0] + specific_cutting_energy[1]) / 2.
         self.specific_cutting_energy = Q_(specific_cutting_energy_avg, 'kilowatt / (cm ** 3 / min)')
         self.specific_cutting_energy = Q_(specific_cutting_energy[0], 'kilowatt / (cm ** 3 / min)')
+        self.specific_cutting_energy_range = Q_(specific_cutting_energy, 'kilowatt / (cm ** 3 / min)')
+        self.feed_chart_rows = {'jobber': 'D', 'stub': 'E'}
+        self.tap_speed_class = 'steel-alloy'
+        self.tap_torque_class = 'steel 300 bhn'
 
-    def sfm(self, tool_material=None):
+    def sfm_range(self, tool_material=None):
         if tool_material is None:
             print('Warning: Assuming HSS tooling while calculating SFM')
             tool_material = ToolMaterialHSS()
@@ -214,10 +240,7 @@ class MaterialSteelMedium(MaterialSteel):
         elif isinstance(tool_material, ToolMaterialCarbide):
             sfm_range = [60, 90]
 
-        v = Q_((sfm_range[0] + sfm_range[1]) / 2., 'feet tpm')
-        v = Q_(sfm_range[0], 'feet tpm')
-
-        return v
+        return Q_([float(x) for x in sfm_range], 'feet tpm')
 
     def machinability(self):
         return machinability('1050')
@@ -233,8 +256,10 @@ class MaterialSteelHigh(MaterialSteel):
         specific_cutting_energy_avg = (specific_cutting_energy[0] + specific_cutting_energy[1]) / 2.
         self.specific_cutting_energy = Q_(specific_cutting_energy_avg, 'kilowatt / (cm ** 3 / min)')
         self.specific_cutting_energy = Q_(specific_cutting_energy[0], 'kilowatt / (cm ** 3 / min)')
+        self.specific_cutting_energy_range = Q_(specific_cutting_energy, 'kilowatt / (cm ** 3 / min)')
+        self.feed_chart_rows = {}
 
-    def sfm(self, tool_material=None):
+    def sfm_range(self, tool_material=None):
         if tool_material is None:
             print('Warning: Assuming HSS tooling while calculating SFM')
             tool_material = ToolMaterialHSS()
@@ -245,109 +270,108 @@ class MaterialSteelHigh(MaterialSteel):
         elif isinstance(tool_material, ToolMaterialCarbide):
             sfm_range = [60, 90]
 
-        v = Q_((sfm_range[0] + sfm_range[1]) / 2., 'feet tpm')
-        v = Q_(sfm_range[0], 'feet tpm')
-
-        return v
+        return Q_([float(x) for x in sfm_range], 'feet tpm')
 
     def machinability(self):
         return machinability('A-2')
 
 
+# machinability table from: http://www.carbidedepot.com/formulas-machinability.htm
+# Ratings relative to 1212 steel at 1.00
+machinability_table = {
+    # Carbon steels
+    '1015': .72,
+    '1018': .78,
+    '1020': .72,
+    '1022': .78,
+    '1030': .70,
+    '1040': .64,
+    '1042': .64,
+    '1050': .54,
+    '1095': .42,
+    '1117': .91,
+    '1137': .72,
+    '1141': .70,
+    '1141-annealed': .81,
+    '1144': .76,
+    '1144-annealed': .85,
+    '1144-stressproof': .83,
+    '1212': 1.00,
+    '1213': 1.36,
+    '12L14': 1.70,
+    '1215': 1.36,
+
+    # Alloy steels:
+    '2355-annealed': .70,
+    '4130-annealed': .72,
+    '4140-annealed': .66,
+    '4142-annealed': .66,
+    '41L42-annealed': .77,
+    '4150-annealed': .60,
+    '4340-annealed': .57,
+    '4620': .66,
+    '4820-annealed': .49,
+    '52100-annealed': .40,
+    '6150-annealed': .60,
+    '8620': .66,
+    '86L20': .77,
+    '9310-annealed': .51,
+
+    # Stainless Steels and Super Alloys:
+    '302-annealed': .45,
+    '303-annealed': .78,
+    '304-annealed': .45,
+    '316-annealed': .45,
+    '321-annealed': .36,
+    '347-annealed': .36,
+    '410-annealed': .54,
+    '416-annealed': 1.10,
+    '420-annealed': .45,
+    '430-annealed': .54,
+    '431-annealed': .45,
+    '440A': .45,
+    '15-5PH condition A': .48,
+    '17-4PH condition A': .48,
+    'A286 aged': .33,
+    'Hastelloy X': .19,
+
+    # Tool Steels
+    'A-2': .42,
+    'A-6': .33,
+    'D-2': .27,
+    'D-3': .27,
+    'M-2': .39,
+    'O-1': .42,
+    'O-2': .42,
+
+    # Gray Cast Iron
+    'ASTM class 20 annealed': .73,
+    'ASTM class 25': .55,
+    'ASTM class 30': .48,
+    'ASTM class 35': .48,
+    'ASTM class 40': .48,
+    'ASTM class 45': .36,
+    'ASTM class 50': .36,
+
+    # Nodular Iron
+    '60-40-18 annealed': .61,
+    '65-45-12 annealed': .61,
+    '80-55-06': .39,
+
+    # Aluminum and Magnesium Alloys:
+    'aluminum, cold drawn': 3.60,
+    'aluminum, cast': 4.50,
+    'aluminum, die cast': .76,
+    'magnesium, cold drawn': 4.80,
+    'magnesium, cast': 4.80
+}
+
+
 def machinability(s):
     # May be able to scale cutting parameters, SFM in particular, using machinability values.
     # https://en.wikipedia.org/wiki/Machinability
 
-    # machinability table from: http://www.carbidedepot.com/formulas-machinability.htm
-    d = {
-        # Carbon steels
-        '1015': .72,
-        '1018': .78,
-        '1020': .72,
-        '1022': .78,
-        '1030': .70,
-        '1040': .64,
-        '1042': .64,
-        '1050': .54,
-        '1095': .42,
-        '1117': .91,
-        '1137': .72,
-        '1141': .70,
-        '1141-annealed': .81,
-        '1144': .76,
-        '1144-annealed': .85,
-        '1144-stressproof': .83,
-        '1212': 1.00,
-        '1213': 1.36,
-        '12L14': 1.70,
-        '1215': 1.36,
-
-        # Alloy steels:
-        '2355-annealed': .70,
-        '4130-annealed': .72,
-        '4140-annealed': .66,
-        '4142-annealed': .66,
-        '41L42-annealed': .77,
-        '4150-annealed': .60,
-        '4340-annealed': .57,
-        '4620': .66,
-        '4820-annealed': .49,
-        '52100-annealed': .40,
-        '6150-annealed': .60,
-        '8620': .66,
-        '86L20': .77,
-        '9310-annealed': .51,
-
-        # Stainless Steels and Super Alloys:
-        '302-annealed': .45,
-        '303-annealed': .78,
-        '304-annealed': .45,
-        '316-annealed': .45,
-        '321-annealed': .36,
-        '347-annealed': .36,
-        '410-annealed': .54,
-        '416-annealed': 1.10,
-        '420-annealed': .45,
-        '430-annealed': .54,
-        '431-annealed': .45,
-        '440A': .45,
-        '15-5PH condition A': .48,
-        '17-4PH condition A': .48,
-        'A286 aged': .33,
-        'Hastelloy X': .19,
-
-        # Tool Steels
-        'A-2': .42,
-        'A-6': .33,
-        'D-2': .27,
-        'D-3': .27,
-        'M-2': .39,
-        'O-1': .42,
-        'O-2': .42,
-
-        # Gray Cast Iron
-        'ASTM class 20 annealed': .73,
-        'ASTM class 25': .55,
-        'ASTM class 30': .48,
-        'ASTM class 35': .48,
-        'ASTM class 40': .48,
-        'ASTM class 45': .36,
-        'ASTM class 50': .36,
-
-        # Nodular Iron
-        '60-40-18 annealed': .61,
-        '65-45-12 annealed': .61,
-        '80-55-06': .39,
-
-        # Aluminum and Magnesium Alloys:
-        'aluminum, cold drawn': 3.60,
-        'aluminum, cast': 4.50,
-        'aluminum, die cast': .76,
-        'magnesium, cold drawn': 4.80,
-        'magnesium, cast': 4.80
-    }
-
     try:
-        return d[s]
-    except IndexError:
+        return machinability_table[s]
+    except KeyError:
         raise MaterialUnknown(s)
@@ -1,11 +1,19 @@
 import math
 
+import numpy as np
+
 from .base import *
 from .materials import *
 from .tools import *
 from .units import *
 
 
+class OperationUnsupportedTool(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
 class MachiningOp(PyMachiningBase):
     def __init__(self, tool, stock_material):
         PyMachiningBase.__init__(self)
@@ -580,6 +588,181 @@ class DrillOp(MachiningOp):
         return self.rrpm_(self.cutter_diameter, speed)
 
 
+class TapOp(MachiningOp):
+    # Tapping, with the tap's required torque checked against the machine's torque curve.
+    #
+    # The Tap.torque_ table is for sharp, 4 flute, coarse pitch hand taps at 65% thread height.
+    # Its notes give multipliers for other cases: dull taps need about 50% more torque; 55% and
+    # 75% thread heights need .75 and 1.25 times the torque (interpolated linearly here);
+    # helical flute taps need about 70%, chip driving (spiral point) taps about 60%, and fine
+    # pitch threads about 50%.
+    #
+    # A tap holding an array of diameters is checked in one call, as is a tap set combined with
+    # from_taps().
+
+    dull_multiplier = 1.5
+    flute_multipliers = {'hand': 1., 'helical': .7, 'spiral point': .6}
+    fine_pitch_multiplier = .5
+
+    def __init__(self, tap, stock_material, thread_percentage=65., dull=False, flute=None, fine_pitch=False):
+        MachiningOp.__init__(self, tap, stock_material)
+        self.description = 'Tapping operation'
+        self.cutter_diameter = tap.diameter
+        self.thread_percentage = thread_percentage
+        self.dull = dull
+        if flute is None:
+            flute = tap.tap_style if tap.tap_style in self.flute_multipliers else 'hand'
+        if flute not in self.flute_multipliers:
+            raise OperationUnsupportedTool(f'flute must be from {list(self.flute_multipliers)}, not {flute}')
+        self.flute = flute
+        self.fine_pitch = fine_pitch
+
+    @classmethod
+    def from_taps(cls, taps, stock_material, **kwargs):
+        # One operation over a list of taps, holding arrays of diameters and pitches
+        diam = Q_(np.array([t.diameter.m_as('inch') for t in taps]), 'inch')
+        pitch = Q_(np.array([np.nan if t.pitch is None else t.pitch.m_as('inch / turn') for t in taps]), 'inch / turn')
+        return cls(Tap(diam, pitch=pitch), stock_material, **kwargs)
+
+    def torque_multiplier(self):
+        m = 1. + (np.asarray(self.thread_percentage, dtype=float) - 65.) * .025
+        if self.dull:
+            m = m * self.dull_multiplier
+        m = m * self.flute_multipliers[self.flute]
+        if self.fine_pitch:
+            m = m * self.fine_pitch_multiplier
+        return m
+
+    def required_torque(self, fit=True):
+        return self.tool.torque_(self.stock_material, fit=fit) * self.torque_multiplier()
+
+    def spindle_speed(self):
+        # Speed from the tapping SFM table
+        return DrillOp.rrpm_(self.cutter_diameter, self.tool.speed(self.stock_material))
+
+    @staticmethod
+    def _available_torque(machine, rpm, intermittent):
+        if intermittent:
+            return machine.torque_intermittent(rpm)
+        return machine.torque_continuous(rpm)
+
+    def check(self, machine, rpm=None, intermittent=False, fit=True):
+        """
+        Compare the required torque with the machine's torque at the tapping speed.
+
+        :param machine:
+        :param rpm: tapping speed, a single value or one per diameter; defaults to spindle_speed()
+            clamped to the machine's range
+        :param intermittent: compare with the intermittent rather than continuous torque
+        :param fit:
+        :return: (boolean array, True where the machine has enough torque, required torque,
+            available torque)
+        """
+        if rpm is None:
+            rpm, _ = machine.clamp_speed(self.spindle_speed())
+        required = self.required_torque(fit)
+        available = self._available_torque(machine, rpm, intermittent)
+        return required <= available, required, available
+
+    def max_safe_rpm(self, machine, intermittent=False, fit=True, samples=256, iterations=30):
+        """
+        Highest spindle speed, up to the tapping SFM speed and the machine's maximum, at which the
+        machine has the required torque. Torque curves are not monotone, so the speed range is
+        sampled, and the step past the highest safe sample is refined by bisection.
+
+        :param machine:
+        :param intermittent:
+        :param fit:
+        :param samples:
+        :param iterations:
+        :return: speed per diameter, nan where no speed in the machine's range is safe
+        """
+        required = np.atleast_1d(self.required_torque(fit).m_as('newton meter'))
+        lo = machine.min_rpm.m_as('tpm')
+        hi = np.minimum(np.atleast_1d(self.spindle_speed().m_as('tpm')), machine.max_rpm.m_as('tpm'))
+        required, hi = np.broadcast_arrays(required, hi)
+        hi = np.maximum(hi, lo)
+
+        def safe(rpm):
+            T = self._available_torque(machine, Q_(rpm, 'tpm'), intermittent).m_as('newton meter')
+            return T >= required.reshape(required.shape + (1,) * (rpm.ndim - 1))
+
+        t = np.linspace(0., 1., samples)
+        x = lo + (hi - lo)[:, None] * t[None, :]
+        ok = safe(x)
+        any_ok = ok.any(axis=1)
+        # Index of the highest safe sample
+        k = samples - 1 - np.argmax(ok[:, ::-1], axis=1)
+        a = x[np.arange(len(x)), k]
+        b = x[np.arange(len(x)), np.minimum(k + 1, samples - 1)]
+        for _ in range(iterations):
+            mid = (a + b) / 2.
+            mid_ok = safe(mid[:, None])[:, 0]
+            a = np.where(mid_ok, mid, a)
+            b = np.where(mid_ok, b, mid)
+
+        rpm = np.where(any_ok, a, np.nan)
+        if np.ndim(self.cutter_diameter.magnitude) == 0:
+            rpm = float(rpm[0])
+        return Q_(rpm, 'tpm')
+
+    def cycle_time(self, depth, rpm, retract_height=Q_(.1, 'inch'), reverse_speed_ratio=1.):
+        # Rigid tapping from the R plane to depth at one pitch per turn, and back out with the
+        # spindle reversed at reverse_speed_ratio times the speed.
+        if self.tool.pitch is None:
+            raise OperationUnsupportedTool('tap pitch is unknown')
+        feed_rate = (self.tool.pitch * rpm).to('inch / min')
+        distance = depth + retract_height
+        return (distance / feed_rate + distance / (feed_rate * reverse_speed_ratio)).to('second')
+
+
+def _evaluate_tool_group(cls, tools, stock_material, machine):
+    # Build one tool of the group's class holding every diameter, and evaluate it once.
+    diam = Q_(np.array([t.diameter.m_as('inch') for t in tools]), 'inch')
+    tool = cls(diam)
+
+    if isinstance(tool, Tap):
+        sfm = tool.sfm(stock_material)
+        feed = Q_(np.array([np.nan if t.pitch is None else t.pitch.m_as('inch / turn') for t in tools]),
+                  'inch / turn')
+    else:
+        sfm = stock_material.sfm(tool.tool_material)
+        feed = tool.feed_rate(stock_material)
+
+    rpm = DrillOp.rrpm_(diam, sfm)
+    if machine is not None:
+        rpm, _ = machine.clamp_speed(rpm)
+
+    return rpm, feed
+
+
+def evaluate_tools(tools, stock_material, machine=None):
+    """
+    Spindle speed and feed for every tool of a tool library. Tools are grouped by class, and
+    each group is evaluated as a single tool holding an array of diameters.
+
+    :param tools: list of DrillHSS, DrillHSSJobber, DrillHSSStub and Tap
+    :param stock_material:
+    :param machine: if given, spindle speeds are clamped to the machine's range
+    :return: arrays of spindle speed and feed per revolution, one entry per tool.
+        Tap feeds are nan when the tap's pitch is unknown.
+    """
+    groups = {}
+    for i, tool in enumerate(tools):
+        if not isinstance(tool, (DrillHSS, Tap)):
+            raise OperationUnsupportedTool(type(tool).__name__)
+        groups.setdefault(type(tool), []).append(i)
+
+    rpm = np.zeros(len(tools))
+    feed = np.zeros(len(tools))
+    for cls, idx in groups.items():
+        rpm_, feed_ = _evaluate_tool_group(cls, [tools[i] for i in idx], stock_material, machine)
+        rpm[idx] = rpm_.m_as('tpm')
+        feed[idx] = feed_.m_as('inch / turn')
+
+    return Q_(rpm, 'tpm'), Q_(feed, 'inch / turn')
+
+
 class MillingOp(MachiningOp):
     def __init__(self, tool, stock_material):
         MachiningOp.__init__(self, tool, stock_material)
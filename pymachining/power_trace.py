@@ -0,0 +1,186 @@
+import numpy as np
+
+from .base import *
+from .units import *
+from .machines import *
+from .spindle_log import *
+
+# Predicted spindle input power over a job, as a time series comparable with a spindle log.
+#
+# A job is a sequence of operations, each with a spindle speed, a cutting time, the net cutting
+# power (e.g., from DrillOp.net_power) and an optional idle time after the cut. The spindle
+# starts and ends the job stopped. Before each operation the spindle ramps to the operation's
+# speed at spindle_accel, so the job is a sequence of segments:
+#
+#   ramp   from the previous speed; idle_power plus the power accelerating the spindle's
+#          inertia, J ω α / efficiency, which is linear in time. Braking is taken as drawing
+#          nothing beyond idle_power.
+#   cut    net_power / efficiency + idle_power, as compare_segments() predicts for a log
+#   idle   idle_power at the operation's speed
+#
+# Power is linear within every segment, so a sample is a searchsorted for its segment and an
+# interpolation. Samples are generated chunk_size at a time as spindle_log_dtype records, so a
+# day-long job at 1 kHz never needs its 86 million samples in memory, and a prediction can be
+# written as a spindle log and segmented like a measured one. min_max_downsample() reduces
+# chunks of records, predicted or measured, to the smallest and largest power of each bin, which
+# keeps the peaks a plot of the mean would hide.
+#
+# Times are in seconds, speeds in turn / min and powers in watts, as in spindle_log.
+
+min_max_dtype = np.dtype([('time', '<f8'), ('min_power', '<f4'), ('max_power', '<f4')])
+
+_segment_ramp = 0
+_segment_cut = 1
+_segment_idle = 2
+
+
+class PowerTrace(PyMachiningBase):
+    def __init__(self, machine, duration, spindle_rpm, net_power, idle_time=None,
+                 spindle_accel=Q_(2000, 'tpm / second'), spindle_inertia=Q_(0, 'kg m ** 2')):
+        """
+        Segments of a job's power.
+
+        :param machine: provides idle_power and efficiency
+        :param duration: array of cutting times, one per operation
+        :param spindle_rpm: array of spindle speeds
+        :param net_power: array of net cutting powers
+        :param idle_time: array of idle times after the cuts, none by default
+        :param spindle_accel: spindle acceleration and deceleration
+        :param spindle_inertia: moment of inertia of the spindle, motor and tool holder; with the
+            default of zero, ramps only take time
+        """
+        PyMachiningBase.__init__(self)
+        d = np.atleast_1d(duration.m_as('second')).astype(float)
+        n = len(d)
+        rpm = np.broadcast_to(np.abs(np.atleast_1d(spindle_rpm.m_as('tpm'))), (n,)).astype(float)
+        P = np.broadcast_to(np.atleast_1d(net_power.m_as('watt')), (n,)).astype(float)
+        if idle_time is None:
+            g = np.zeros(n)
+        else:
+            g = np.broadcast_to(np.atleast_1d(idle_time.m_as('second')), (n,)).astype(float)
+
+        idle = machine.idle_power.m_as('watt')
+        eff = machine.efficiency
+        accel = spindle_accel.m_as('tpm / second')
+        J = spindle_inertia.m_as('kg m ** 2')
+
+        # Ramps to each operation's speed, then one to a stop
+        w_from = np.concatenate([[0.], rpm])
+        w_to = np.concatenate([rpm, [0.]])
+        ramp = np.abs(w_to - w_from) / accel
+        # J ω α with ω and α in rad / s, zero when braking
+        k = J * (2. * np.pi / 60.) ** 2 * accel * (w_to > w_from) / eff
+        ramp_p0 = idle + k * w_from
+        ramp_p1 = idle + k * w_to
+
+        # Segments in order: (ramp, cut, idle) per operation, then the final ramp
+        cut_p = P / eff + idle
+        self.kind = np.concatenate([np.tile([_segment_ramp, _segment_cut, _segment_idle], n), [_segment_ramp]])
+        dt = np.concatenate([np.column_stack([ramp[:-1], d, g]).ravel(), ramp[-1:]])
+        p0 = np.concatenate([np.column_stack([ramp_p0[:-1], cut_p, np.full(n, idle)]).ravel(), ramp_p0[-1:]])
+        p1 = np.concatenate([np.column_stack([ramp_p1[:-1], cut_p, np.full(n, idle)]).ravel(), ramp_p1[-1:]])
+        r0 = np.concatenate([np.column_stack([w_from[:-1], rpm, rpm]).ravel(), w_from[-1:]])
+        r1 = np.concatenate([np.column_stack([w_to[:-1], rpm, rpm]).ravel(), w_to[-1:]])
+        # Segment index of each operation's cut, before empty segments are dropped
+        cut_index = 3 * np.arange(n) + 1
+
+        keep = dt > 0
+        self.cut_segment = np.cumsum(keep)[cut_index] - 1
+        self.cut_segment = np.where(keep[cut_index], self.cut_segment, -1)
+        self.kind = self.kind[keep]
+        self.dt = dt[keep]
+        self.t0 = np.concatenate([[0.], np.cumsum(self.dt)])[:-1]
+        self.p0 = p0[keep]
+        self.p1 = p1[keep]
+        self.rpm0 = r0[keep]
+        self.rpm1 = r1[keep]
+        self.duration = Q_(float(np.sum(self.dt)), 'second')
+        self.energy = Q_(float(np.sum((self.p0 + self.p1) / 2. * self.dt)), 'joule')
+
+    def _sample(self, t):
+        # rpm and power at times t [s] within the job
+        k = np.searchsorted(self.t0, t, side='right') - 1
+        k = np.clip(k, 0, len(self.t0) - 1)
+        frac = np.clip((t - self.t0[k]) / self.dt[k], 0., 1.)
+        rpm = self.rpm0[k] + (self.rpm1[k] - self.rpm0[k]) * frac
+        power = self.p0[k] + (self.p1[k] - self.p0[k]) * frac
+        return rpm, power
+
+    def power(self, t):
+        # Power at times of the job, as a Quantity
+        t_ = np.asarray(t.m_as('second'), dtype=float)
+        return Q_(self._sample(t_)[1], 'watt')
+
+    def n_samples(self, sample_rate):
+        # 0 for an empty job, which has no segments to sample
+        if not len(self.dt):
+            return 0
+        return int(np.floor(self.duration.m_as('second') * sample_rate.m_as('hertz'))) + 1
+
+    def chunks(self, sample_rate=Q_(1000, 'hertz'), chunk_size=1 << 16):
+        """
+        Samples of the job, chunk_size at a time.
+
+        :param sample_rate: samples per second, from time 0 to the end of the job
+        :return: generator of arrays of spindle_log_dtype records
+        """
+        fs = sample_rate.m_as('hertz')
+        n = self.n_samples(sample_rate)
+        for i0 in range(0, n, chunk_size):
+            i = np.arange(i0, min(i0 + chunk_size, n), dtype=np.float64)
+            t = i / fs
+            rpm, power = self._sample(t)
+            records = np.empty(len(t), dtype=spindle_log_dtype)
+            records['time'] = t
+            records['rpm'] = rpm
+            records['power'] = power
+            yield records
+
+    def write(self, fn, sample_rate=Q_(1000, 'hertz'), chunk_size=1 << 16):
+        # Write the samples as a spindle log, chunk by chunk; returns the number of records
+        n = 0
+        with open(fn, 'wb') as f:
+            f.write(spindle_log_header())
+            for records in self.chunks(sample_rate, chunk_size):
+                records.tofile(f)
+                n += len(records)
+        return n
+
+    def min_max(self, sample_rate=Q_(1000, 'hertz'), factor=1000, chunk_size=1 << 16):
+        # min_max_downsample() of the samples, as one array
+        parts = list(min_max_downsample(self.chunks(sample_rate, chunk_size), factor))
+        if not parts:
+            return np.empty(0, dtype=min_max_dtype)
+        return np.concatenate(parts)
+
+
+def min_max_downsample(chunks, factor):
+    """
+    Reduce each run of factor records to its smallest and largest power.
+
+    :param chunks: iterable of arrays of spindle_log_dtype records, e.g., PowerTrace.chunks(), or
+        slices of open_spindle_log(); bins continue across chunks
+    :param factor: records per bin
+    :return: generator of arrays of min_max_dtype, time being the time of a bin's first record;
+        the last bin may have fewer records
+    """
+    carry = None
+    for records in chunks:
+        if carry is not None and len(carry):
+            records = np.concatenate([carry, records])
+        m = len(records) // factor * factor
+        carry = np.array(records[m:])
+        if m == 0:
+            continue
+        power = np.asarray(records['power'][:m]).reshape(-1, factor)
+        out = np.empty(m // factor, dtype=min_max_dtype)
+        out['time'] = records['time'][:m:factor]
+        out['min_power'] = power.min(axis=1)
+        out['max_power'] = power.max(axis=1)
+        yield out
+    if carry is not None and len(carry):
+        out = np.empty(1, dtype=min_max_dtype)
+        out['time'] = carry['time'][0]
+        out['min_power'] = carry['power'].min()
+        out['max_power'] = carry['power'].max()
+        yield out
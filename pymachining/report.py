@@ -0,0 +1,261 @@
+import base64
+import hashlib
+import html
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .base import *
+from .units import *
+from .machines import *
+from .materials import *
+from .tools import *
+from .feasibility import *
+
+# Job reports: an HTML page of charts, one torque-speed chart per machine and feed rate, thrust
+# and tap torque charts per stock material.
+#
+# A report is built from a list of ChartTasks. Each task has a key, a hash of everything its
+# chart depends on: the machine's fingerprint (feasibility.machine_fingerprint), the material's
+# fingerprint (feasibility.material_fingerprint), the tool class, the chart options and the
+# source of the modules that hold the tables and plotting code. Those are the modules defining
+# the classes of the machine, tool and material and their bases, e.g., iso_materials.py and
+# materials.py for an IsoMaterial, and _common_modules. A rendered chart is kept as <key>.png in
+# the cache folder, and the reason a chart is not available, e.g., a tool that does not cut the
+# material, as <key>.txt, so rebuilding a report renders only the charts whose inputs changed.
+#
+# Charts are rendered in a process pool. A worker draws on a matplotlib Figure through the
+# object-oriented API, using the plot methods' ax argument, rather than pylab's global current
+# figure, so it needs no GUI backend and no figure is shared between charts.
+
+report_chart_version = 1
+
+# Modules every chart depends on besides those of its classes: the fitting of the tables, the
+# fingerprints, the tool material tables, the units and this module's drawing code
+_common_modules = ['feasibility.py', 'fitting.py', 'report.py', 'tool_materials.py', 'units.py']
+_file_hashes = {}
+
+
+def _file_hash(fn):
+    # Read once per process
+    if fn not in _file_hashes:
+        with open(fn, 'rb') as f:
+            _file_hashes[fn] = hashlib.sha1(f.read()).hexdigest()
+    return _file_hashes[fn]
+
+
+def _source_files(*objects):
+    # Files of this package defining the objects' classes and their bases, and _common_modules
+    folder = os.path.dirname(os.path.abspath(__file__))
+    files = {os.path.join(folder, fn) for fn in _common_modules}
+    for obj in objects:
+        if obj is None:
+            continue
+        cls = obj if isinstance(obj, type) else type(obj)
+        for c in cls.__mro__:
+            fn = getattr(sys.modules.get(c.__module__), '__file__', None)
+            if fn is not None and os.path.dirname(os.path.abspath(fn)) == folder:
+                files.add(os.path.abspath(fn))
+    return sorted(files)
+
+
+def _source_fingerprint(*objects):
+    # Editing one of the files re-renders the charts of these objects
+    return ' '.join(f'{os.path.basename(fn)}:{_file_hash(fn)}' for fn in _source_files(*objects))
+
+
+def _option_value(v):
+    if isinstance(v, ureg.Quantity):
+        return repr((v.magnitude, str(v.units)))
+    if isinstance(v, (list, tuple)):
+        return repr([_option_value(x) for x in v])
+    return repr(v)
+
+
+class ChartTask(PyMachiningBase):
+    # One chart: kind is torque_speed (of machine), or feed_rate, thrust or tap_torque (of a
+    # tool class in stock_material)
+    kinds = ['torque_speed', 'feed_rate', 'thrust', 'tap_torque']
+
+    def __init__(self, kind, title, machine=None, tool_class=None, stock_material=None, **options):
+        PyMachiningBase.__init__(self)
+        if kind not in self.kinds:
+            raise PyMachiningException(f'chart kind must be from [{", ".join(self.kinds)}], not {kind}')
+        self.kind = kind
+        self.title = title
+        self.machine = machine
+        self.tool_class = tool_class
+        self.stock_material = stock_material
+        self.options = options
+        self.key = self._key()
+
+    def _key(self):
+        h = hashlib.sha1()
+        parts = [str(report_chart_version), self.kind,
+                 _source_fingerprint(self.machine, self.tool_class, self.stock_material)]
+        if self.machine is not None:
+            parts.append(machine_fingerprint(self.machine))
+        if self.tool_class is not None:
+            parts.append(self.tool_class.__name__)
+        if self.stock_material is not None:
+            parts.append(repr(material_fingerprint(self.stock_material)))
+        parts += [f'{k}={_option_value(v)}' for k, v in sorted(self.options.items())]
+        h.update('\n'.join(parts).encode())
+        return h.hexdigest()
+
+    def draw(self, ax):
+        if self.kind == 'torque_speed':
+            self.machine.plot_torque_speed_curve(ax=ax, **self.options)
+        elif self.kind == 'feed_rate':
+            self.tool_class.plot_feedrate(self.stock_material, ax=ax, **self.options)
+        elif self.kind == 'thrust':
+            self.tool_class.plot_thrust(self.stock_material, ax=ax, **self.options)
+        else:
+            self.tool_class.plot_torque(self.stock_material, ax=ax, **self.options)
+
+
+def render_chart(task, dpi=100):
+    """
+    PNG of a chart, drawn on its own Figure.
+
+    :return: (png bytes, None), or (None, message) when the chart is not available, e.g., a
+        tool that does not cut the material
+    """
+    import warnings
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 6), dpi=dpi)
+    ax = fig.add_subplot()
+    try:
+        with warnings.catch_warnings():
+            # e.g., the log scale of tap torque with a lower limit of zero
+            warnings.simplefilter('ignore', UserWarning)
+            task.draw(ax)
+    except PyMachiningException as e:
+        return None, e.description or type(e).__name__
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight')
+    return buf.getvalue(), None
+
+
+def report_tasks(machines, stock_materials, drill_class=DrillHSSJobber, tap_class=Tap, max_thrust=True):
+    """
+    Chart tasks of a job: a torque-speed chart per machine, and per stock material, feed rate and
+    thrust charts of drill_class and a torque chart of tap_class.
+
+    :param max_thrust: mark the first machine's max_feed_force on the thrust charts
+    """
+    tasks = []
+    for m in machines:
+        tasks.append(ChartTask('torque_speed', m.name, machine=m))
+    highlight = machines[0].max_feed_force if max_thrust and machines else None
+    for mat in stock_materials:
+        name = type(mat).__name__
+        tasks.append(ChartTask('feed_rate', f'{name} feed rate', tool_class=drill_class, stock_material=mat))
+        tasks.append(ChartTask('thrust', f'{name} thrust', tool_class=drill_class, stock_material=mat,
+                               highlight=highlight))
+        tasks.append(ChartTask('tap_torque', f'{name} tap torque', tool_class=tap_class, stock_material=mat))
+    return tasks
+
+
+def _cache_fn(cache_folder, task, ext):
+    return os.path.join(cache_folder, task.key + ext)
+
+
+def _read_cached(cache_folder, task):
+    for ext, mode in [('.png', 'rb'), ('.txt', 'r')]:
+        fn = _cache_fn(cache_folder, task, ext)
+        if os.path.exists(fn):
+            with open(fn, mode) as f:
+                v = f.read()
+            return (v, None) if ext == '.png' else (None, v)
+    return None
+
+
+def _write_cached(cache_folder, task, png, message):
+    # Written under a temporary name and renamed, so a cached file is always complete
+    fn = _cache_fn(cache_folder, task, '.png' if png is not None else '.txt')
+    with open(fn + '.tmp', 'wb') as f:
+        f.write(png if png is not None else message.encode())
+    os.replace(fn + '.tmp', fn)
+
+
+def render_charts(tasks, cache_folder=None, max_workers=None):
+    """
+    Render the charts not already in the cache folder.
+
+    :param cache_folder: folder of rendered charts, or None to render every chart
+    :param max_workers: worker processes; 0 renders in this process
+    :return: (list of (png bytes or None, message or None) per task, number rendered, number
+        read from the cache)
+    """
+    out = [None] * len(tasks)
+    todo = []
+    for i, task in enumerate(tasks):
+        out[i] = _read_cached(cache_folder, task) if cache_folder is not None else None
+        if out[i] is None:
+            todo.append(i)
+
+    # The same chart asked for twice is rendered once
+    by_key = {}
+    for i in todo:
+        by_key.setdefault(tasks[i].key, []).append(i)
+    unique = [tasks[v[0]] for v in by_key.values()]
+    if max_workers == 0 or len(unique) <= 1:
+        rendered = [render_chart(task) for task in unique]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            rendered = list(pool.map(render_chart, unique))
+
+    if cache_folder is not None and unique:
+        os.makedirs(cache_folder, exist_ok=True)
+    for task, (png, message) in zip(unique, rendered):
+        for i in by_key[task.key]:
+            out[i] = (png, message)
+        if cache_folder is not None:
+            _write_cached(cache_folder, task, png, message)
+    return out, len(unique), len(tasks) - len(todo)
+
+
+def build_report(fn, tasks, title='Job report', cache_folder=None, max_workers=None):
+    """
+    Write an HTML report with the charts embedded as PNG data URIs.
+
+    :param fn: HTML file name
+    :param tasks: ChartTasks, e.g., from report_tasks()
+    :param cache_folder: folder of rendered charts; by default <fn without extension>_charts
+    :param max_workers: worker processes; 0 renders in this process
+    :return: dict of counts of charts, rendered, cached and unavailable, and the build time in seconds
+    """
+    t0 = time.perf_counter()
+    if cache_folder is None:
+        cache_folder = os.path.splitext(fn)[0] + '_charts'
+    charts, n_rendered, n_cached = render_charts(tasks, cache_folder, max_workers)
+
+    parts = ['<!DOCTYPE html>', '<html>', '<head>', '<meta charset="utf-8">',
+             f'<title>{html.escape(title)}</title>',
+             '<style>body { font-family: sans-serif; } figure { display: inline-block; margin: 1em; } '
+             'img { max-width: 640px; }</style>',
+             '</head>', '<body>', f'<h1>{html.escape(title)}</h1>']
+    sections = [('Machines', ['torque_speed']), ('Materials', ['feed_rate', 'thrust', 'tap_torque'])]
+    for heading, kinds in sections:
+        items = [(task, chart) for task, chart in zip(tasks, charts) if task.kind in kinds]
+        if not items:
+            continue
+        parts.append(f'<h2>{heading}</h2>')
+        for task, (png, message) in items:
+            caption = html.escape(task.title)
+            if png is None:
+                parts.append(f'<figure><figcaption>{caption}: not available, {html.escape(message)}</figcaption></figure>')
+            else:
+                data = base64.b64encode(png).decode('ascii')
+                parts.append(f'<figure><img alt="{caption}" src="data:image/png;base64,{data}">'
+                             f'<figcaption>{caption}</figcaption></figure>')
+    parts += ['</body>', '</html>']
+    with open(fn, 'w') as f:
+        f.write('\n'.join(parts) + '\n')
+
+    return {'charts': len(tasks), 'rendered': n_rendered, 'cached': n_cached,
+            'unavailable': sum(png is None for png, _ in charts), 'seconds': time.perf_counter() - t0}
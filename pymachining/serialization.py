@@ -0,0 +1,263 @@
+import struct
+
+import numpy as np
+
+from .base import *
+from .units import *
+from .machines import *
+from .materials import *
+from .tool_materials import *
+from .tools import *
+
+# Compact serialization for passing results and configurations between processes.
+#
+# A quantity is stored as a record: a small header with a unit code, dtype and shape, followed
+# by the raw bytes of its magnitude. Units are codes into unit_codes; a quantity whose unit is
+# not in the table keeps its unit string in the record, and a plain array has no unit.
+# Unpacking uses np.frombuffer, so the magnitudes of unpacked quantities are read-only views
+# into the received buffer rather than copies.
+#
+# Machines, tools and materials are sent as descriptors: tuples of plain Python values naming
+# the class and the attributes that define the object, from which the receiver builds a new
+# instance. A quantity in a descriptor is (magnitude, unit code or string), the magnitude a
+# float, or a list for a tool holding an array of diameters. Neither form references a unit
+# registry.
+#
+# Record layout, little-endian:
+#   unit code   uint8      index into unit_codes, 254 for a plain array, or 255 for a unit string
+#   dtype       1 byte     numpy dtype character, e.g., b'd' for float64
+#   ndim        uint8
+#   [unit string length uint16 and the UTF-8 unit string, only for unit code 255]
+#   shape       uint64 x ndim
+#   magnitude   raw bytes, C order
+
+
+class SerializationError(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+# Unit codes; append only, since the codes are stored in records
+unit_codes = [
+    'dimensionless',
+    'millimeter',
+    'inch',
+    'turn / minute',
+    'foot * turn / minute',
+    'millimeter / turn',
+    'inch / turn',
+    'watt',
+    'kilowatt',
+    'newton * meter',
+    'pound',
+    'kilowatt / (centimeter ** 3 / minute)',
+    'millimeter ** 3 / minute',
+    'centimeter ** 3 / minute',
+    'second',
+    'minute',
+    'inch / minute',
+    'millimeter / minute',
+    'inch / second ** 2',
+    'newton',
+    'turn',
+    # As written in this package
+    'tpm',
+    'foot * tpm',
+]
+_no_unit_code = 254
+_string_unit_code = 255
+
+_unit_code = {}
+_code_unit = []
+
+
+def _build_unit_tables():
+    for code, unit in enumerate(unit_codes):
+        units = ureg.Unit(unit)
+        _unit_code[units] = code
+        _code_unit.append(units)
+
+
+_build_unit_tables()
+
+_header = struct.Struct('<BcB')
+_string_length = struct.Struct('<H')
+
+
+def _record_parts(q):
+    # Header bytes and magnitude array of a quantity
+    if isinstance(q, ureg.Quantity):
+        units = q.units
+        m = q.magnitude
+        code = _unit_code.get(units)
+    else:
+        units = None
+        m = q
+        code = _no_unit_code
+    a = np.asarray(m)
+    if not a.flags.c_contiguous:
+        a = np.ascontiguousarray(a)
+    if a.dtype.char not in 'bBhHiIlLqQefdg?':
+        raise SerializationError(f'cannot serialize magnitudes of dtype {a.dtype}')
+    if code is None:
+        unit = str(units).encode()
+        header = _header.pack(_string_unit_code, a.dtype.char.encode(), a.ndim) + _string_length.pack(len(unit)) + unit
+    else:
+        header = _header.pack(code, a.dtype.char.encode(), a.ndim)
+    header += struct.pack(f'<{a.ndim}Q', *a.shape)
+    return header, a
+
+
+def pack_quantity(q):
+    header, a = _record_parts(q)
+    return header + a.tobytes()
+
+
+def unpack_quantity(buf, offset=0):
+    """
+    Quantity (or plain array) from a record in buf, without copying the magnitude.
+
+    :param buf: bytes, bytearray, memoryview or anything else with the buffer protocol
+    :param offset: position of the record
+    :return: (Quantity, position after the record)
+    """
+    buf = memoryview(buf)
+    code, dtype, ndim = _header.unpack_from(buf, offset)
+    offset += _header.size
+    if code == _string_unit_code:
+        (n,) = _string_length.unpack_from(buf, offset)
+        offset += _string_length.size
+        units = ureg.Unit(bytes(buf[offset:offset + n]).decode())
+        offset += n
+    elif code == _no_unit_code:
+        units = None
+    elif code < len(_code_unit):
+        units = _code_unit[code]
+    else:
+        raise SerializationError(f'unknown unit code {code}')
+    shape = struct.unpack_from(f'<{ndim}Q', buf, offset)
+    offset += 8 * ndim
+    dtype = np.dtype(dtype.decode())
+    count = int(np.prod(shape)) if ndim else 1
+    a = np.frombuffer(buf, dtype=dtype, count=count, offset=offset).reshape(shape)
+    offset += count * dtype.itemsize
+    m = a if ndim else a[()]
+    return (m if units is None else Q_(m, units)), offset
+
+
+def pack_results(results):
+    """
+    Serialize a dict of named quantities (or plain arrays), e.g., the outputs of a vectorized
+    drilling evaluation.
+
+    :return: bytes
+    """
+    parts = [struct.pack('<I', len(results))]
+    for name, q in results.items():
+        key = name.encode()
+        header, a = _record_parts(q)
+        parts.append(_string_length.pack(len(key)))
+        parts.append(key)
+        parts.append(header)
+        # The array's own buffer, joined below without an intermediate copy
+        parts.append(memoryview(a).cast('B'))
+    return b''.join(parts)
+
+
+def unpack_results(buf):
+    # Inverse of pack_results; the magnitudes are read-only views into buf
+    buf = memoryview(buf)
+    (n,) = struct.unpack_from('<I', buf, 0)
+    offset = 4
+    results = {}
+    for _ in range(n):
+        (k,) = _string_length.unpack_from(buf, offset)
+        offset += _string_length.size
+        name = bytes(buf[offset:offset + k]).decode()
+        offset += k
+        results[name], offset = unpack_quantity(buf, offset)
+    return results
+
+
+def _subclasses(cls):
+    classes = {cls.__name__: cls}
+    for sub in cls.__subclasses__():
+        classes.update(_subclasses(sub))
+    return classes
+
+
+def _class(name, base):
+    # Only classes of the expected family can be named by a descriptor
+    classes = _subclasses(base)
+    if name not in classes:
+        raise SerializationError(f'{name} is not a {base.__name__}')
+    return classes[name]
+
+
+def _value(q):
+    # (magnitude, unit code) of a quantity, or the number itself; array magnitudes are lists
+    if isinstance(q, ureg.Quantity):
+        code = _unit_code.get(q.units)
+        m = q.magnitude
+        m = float(m) if np.ndim(m) == 0 else np.asarray(m).tolist()
+        return m, str(q.units) if code is None else code
+    return q
+
+
+def _quantity(v):
+    if isinstance(v, tuple):
+        m, unit = v
+        if isinstance(m, (list, tuple)):
+            # An array magnitude; a snapshot's JSON header gives it back as a tuple
+            m = np.asarray(m, dtype=float)
+        return Q_(m, unit if isinstance(unit, str) else _code_unit[unit])
+    return v
+
+
+_machine_attributes = ['gear_ratio', 'efficiency', 'idle_power', 'min_rpm', 'max_rpm', 'max_feed_force',
+                       'max_x_rate', 'max_y_rate', 'max_z_rate', 'max_x_accel', 'max_y_accel', 'max_z_accel']
+
+
+def describe(obj):
+    """
+    Descriptor of a machine, tool, tool material or material: a tuple of plain Python values
+    that pickles small and fast and does not reference the unit registry.
+    """
+    if isinstance(obj, MachineType):
+        attrs = tuple((a, _value(getattr(obj, a))) for a in _machine_attributes if hasattr(obj, a))
+        ranges = tuple((r.name, r.gear_ratio) for r in obj.spindle_ranges)
+        return 'machine', type(obj).__name__, attrs, ranges
+    if isinstance(obj, Tap):
+        return 'tap', type(obj).__name__, _value(obj.diameter), None if obj.pitch is None else _value(obj.pitch)
+    if isinstance(obj, Tool):
+        return 'tool', type(obj).__name__, _value(obj.diameter)
+    if isinstance(obj, ToolMaterialType):
+        return 'tool_material', type(obj).__name__
+    if isinstance(obj, MaterialType):
+        return 'material', type(obj).__name__, obj.name, _value(obj.specific_cutting_energy)
+    raise SerializationError(f'cannot describe {type(obj).__name__}')
+
+
+def restore(descriptor):
+    # Build a new object from describe()'s descriptor
+    kind, name = descriptor[:2]
+    if kind == 'machine':
+        machine = _class(name, MachineType)()
+        for a, v in descriptor[2]:
+            setattr(machine, a, _quantity(v))
+        for range_name, gear_ratio in descriptor[3]:
+            machine.add_spindle_range(range_name, gear_ratio)
+        return machine
+    if kind == 'tap':
+        pitch = descriptor[3]
+        return _class(name, Tap)(_quantity(descriptor[2]), pitch=None if pitch is None else _quantity(pitch))
+    if kind == 'tool':
+        return _class(name, Tool)(_quantity(descriptor[2]))
+    if kind == 'tool_material':
+        return _class(name, ToolMaterialType)()
+    if kind == 'material':
+        material = _class(name, MaterialType)(descriptor[2])
+        material.specific_cutting_energy = _quantity(descriptor[3])
+        return material
+    raise SerializationError(f'unknown descriptor kind {kind}')
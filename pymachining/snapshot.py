@@ -0,0 +1,281 @@
+import datetime
+import json
+import zipfile
+
+import numpy as np
+import pint
+
+from .base import *
+from .units import *
+from .machines import *
+from .batch import *
+from .serialization import *
+
+# Snapshots of an evaluation: the machine, materials and tools it used, its parameters and its
+# results, in one file that can be reopened later without re-creating the objects in code.
+#
+# A snapshot is an uncompressed .npz file. The member __header__ holds a JSON header:
+#   format, version, created, versions of pymachining's dependencies
+#   parameters   JSON values given when saving, e.g., a sweep's settings
+#   context      name -> descriptor of a machine, tool or material (see serialization.describe),
+#                with a machine's tabulated curves, e.g., _torque_x and _torque_y, or name -> the
+#                categories of a tool batch whose columns are members context/<name>/<column>
+#   results      name -> units (None for plain arrays) of the member results/<name>
+# Each array member is a .npy file stored without compression, so loading maps it into memory
+# (numpy.memmap) at its offset in the file instead of reading it.
+
+snapshot_format = 'pymachining-snapshot'
+snapshot_version = 1
+
+
+class SnapshotFormatError(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+def _json_value(v):
+    # Descriptors are tuples; JSON has lists
+    if isinstance(v, (list, tuple)):
+        return [_json_value(x) for x in v]
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
+
+
+def _descriptor(v):
+    if isinstance(v, list):
+        return tuple(_descriptor(x) for x in v)
+    return v
+
+
+def _machine_curves(machine):
+    # Tabulated curves set on the machine instance, e.g., MachinePM25MV_HS._torque_x
+    return {k: [float(x) for x in v] for k, v in vars(machine).items()
+            if k.startswith('_torque') and isinstance(v, (list, tuple, np.ndarray))}
+
+
+def save_snapshot(fn, results, context=None, parameters=None):
+    """
+    Write a snapshot.
+
+    :param fn: file name, by convention ending in .npz
+    :param results: dict of name -> Quantity or array
+    :param context: dict of name -> machine, tool, tool material, material or tool batch
+    :param parameters: dict of JSON values
+    """
+    header = {'format': snapshot_format, 'version': snapshot_version,
+              'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+              'versions': {'numpy': np.__version__, 'pint': pint.__version__},
+              'parameters': parameters or {}, 'context': {}, 'results': {}}
+    arrays = {}
+    for name, obj in (context or {}).items():
+        if isinstance(obj, ToolBatch):
+            columns = {k: obj.column(k) for k in obj._columns}
+            header['context'][name] = {'batch': type(obj).__name__, 'categories': obj._categories,
+                                       'columns': list(columns)}
+            for k, v in columns.items():
+                arrays[f'context/{name}/{k}'] = np.ascontiguousarray(v)
+        else:
+            entry = {'descriptor': _json_value(describe(obj))}
+            if isinstance(obj, MachineType):
+                entry['curves'] = _machine_curves(obj)
+            header['context'][name] = entry
+    for name, q in results.items():
+        if isinstance(q, ureg.Quantity):
+            header['results'][name] = str(q.units)
+            arrays[f'results/{name}'] = np.asarray(q.magnitude)
+        else:
+            header['results'][name] = None
+            arrays[f'results/{name}'] = np.asarray(q)
+    for a in arrays.values():
+        if a.dtype.hasobject:
+            raise SnapshotFormatError('arrays of Python objects cannot be memory mapped')
+    arrays['__header__'] = np.frombuffer(json.dumps(header).encode(), dtype=np.uint8)
+    # np.savez stores its members uncompressed
+    with open(fn, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def _member_arrays(fn, mmap):
+    # name -> array of each .npy member, mapped at its offset in the file when mmap is True
+    arrays = {}
+    with zipfile.ZipFile(fn) as z, open(fn, 'rb') as f:
+        for info in z.infolist():
+            if not info.filename.endswith('.npy'):
+                continue
+            name = info.filename[:-4]
+            if not mmap or info.compress_type != zipfile.ZIP_STORED:
+                with z.open(info) as m:
+                    arrays[name] = np.lib.format.read_array(m)
+                continue
+            # Data of a stored member follows its local header: 30 bytes, the name and extra field
+            f.seek(info.header_offset)
+            local = f.read(30)
+            if local[:4] != b'PK\x03\x04':
+                raise SnapshotFormatError(f'{fn}: bad local header for {info.filename}')
+            start = info.header_offset + 30 + int.from_bytes(local[26:28], 'little') + \
+                int.from_bytes(local[28:30], 'little')
+            f.seek(start)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype, order='F' if fortran_order else 'C')
+            else:
+                arrays[name] = np.memmap(fn, dtype=dtype, mode='r', offset=offset, shape=shape,
+                                         order='F' if fortran_order else 'C')
+    return arrays
+
+
+class Snapshot(PyMachiningBase):
+    def __init__(self, fn, header, arrays):
+        PyMachiningBase.__init__(self)
+        self.fn = fn
+        self.header = header
+        self.parameters = header['parameters']
+        self._arrays = arrays
+        self._context = None
+        self.results = {}
+        for name, units in header['results'].items():
+            a = arrays[f'results/{name}']
+            self.results[name] = a if units is None else Q_(a, units)
+
+    @property
+    def context(self):
+        # Objects re-created from the descriptors, built on first use
+        if self._context is None:
+            self._context = {name: self._restore(name, entry) for name, entry in self.header['context'].items()}
+        return self._context
+
+    def _restore(self, name, entry):
+        if 'batch' in entry:
+            classes = {cls.__name__: cls for cls in [DrillBatch, TapBatch]}
+            if entry['batch'] not in classes:
+                raise SnapshotFormatError(f'unknown batch class {entry["batch"]}')
+            columns = {k: self._arrays[f'context/{name}/{k}'] for k in entry['columns']}
+            return classes[entry['batch']](columns, {k: list(v) for k, v in entry['categories'].items()})
+        obj = restore(_descriptor(entry['descriptor']))
+        for k, v in entry.get('curves', {}).items():
+            setattr(obj, k, list(v))
+        return obj
+
+
+def load_snapshot(fn, mmap=True):
+    """
+    Open a snapshot. With mmap, the arrays are read-only memory maps into the file, so opening
+    takes about the same time for any size of results.
+
+    :return: Snapshot
+    """
+    arrays = _member_arrays(fn, mmap)
+    if '__header__' not in arrays:
+        raise SnapshotFormatError(f'{fn} has no snapshot header')
+    header = json.loads(np.asarray(arrays.pop('__header__')).tobytes().decode())
+    if header.get('format') != snapshot_format:
+        raise SnapshotFormatError(f'{fn} is not a snapshot')
+    if header.get('version', 0) > snapshot_version:
+        raise SnapshotFormatError(f'{fn} is snapshot version {header["version"]}, newer than {snapshot_version}')
+    return Snapshot(fn, header, arrays)
+
+
+class SnapshotDifference(PyMachiningBase):
+    # Per result: changed element count, largest absolute and relative changes, in a's units
+    def __init__(self, **columns):
+        PyMachiningBase.__init__(self)
+        for k, v in columns.items():
+            setattr(self, k, v)
+
+
+def _compare(a, b, rtol, atol, chunk_size):
+    # Counts and maxima of the element differences, chunk_size elements at a time
+    a = a.reshape(-1)
+    b = b.reshape(-1)
+    changed = 0
+    max_abs = 0.
+    max_rel = 0.
+    numeric = a.dtype.kind in 'biuf' and b.dtype.kind in 'biuf'
+    for i in range(0, len(a), chunk_size):
+        x = np.asarray(a[i:i + chunk_size])
+        y = np.asarray(b[i:i + chunk_size])
+        if numeric:
+            x = x.astype(float)
+            y = y.astype(float)
+            same = np.isclose(x, y, rtol=rtol, atol=atol, equal_nan=True)
+            d = np.abs(x - y)
+            finite = np.isfinite(d)
+            if np.any(finite):
+                max_abs = max(max_abs, float(d[finite].max()))
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    r = d[finite] / np.abs(x[finite])
+                r = r[np.isfinite(r)]
+                if len(r):
+                    max_rel = max(max_rel, float(r.max()))
+        else:
+            same = x == y
+        changed += int(np.count_nonzero(~same))
+    return changed, max_abs, max_rel
+
+
+def diff_snapshots(a, b, rtol=0., atol=0., chunk_size=1 << 22):
+    """
+    Differences between two snapshots' results, parameters and context.
+
+    Results in both are compared element by element after converting b to a's units; results
+    whose shapes or dimensions differ are reported as incompatible.
+
+    :param a: Snapshot or file name
+    :param b: Snapshot or file name
+    :param rtol: relative tolerance as numpy.isclose
+    :param atol: absolute tolerance, in a's units
+    :param chunk_size: elements compared at a time, bounding the memory used for large results
+    :return: dict with only_a, only_b, incompatible (lists of result names), results (name ->
+        SnapshotDifference), parameters and context (lists of names that differ)
+    """
+    if not isinstance(a, Snapshot):
+        a = load_snapshot(a)
+    if not isinstance(b, Snapshot):
+        b = load_snapshot(b)
+
+    out = {'only_a': sorted(set(a.results) - set(b.results)), 'only_b': sorted(set(b.results) - set(a.results)),
+           'incompatible': [], 'results': {}}
+    for name in sorted(set(a.results) & set(b.results)):
+        qa, qb = a.results[name], b.results[name]
+        if isinstance(qa, ureg.Quantity) != isinstance(qb, ureg.Quantity):
+            out['incompatible'].append(name)
+            continue
+        if isinstance(qa, ureg.Quantity):
+            if qa.dimensionality != qb.dimensionality:
+                out['incompatible'].append(name)
+                continue
+            ma = qa.magnitude
+            # Memory maps stay unread unless the units differ
+            mb = qb.magnitude if qb.units == qa.units else qb.m_as(qa.units)
+        else:
+            ma, mb = qa, qb
+        if np.shape(ma) != np.shape(mb):
+            out['incompatible'].append(name)
+            continue
+        changed, max_abs, max_rel = _compare(ma, mb, rtol, atol, chunk_size)
+        out['results'][name] = SnapshotDifference(size=int(np.size(ma)), changed=changed,
+                                                  max_abs=max_abs, max_rel=max_rel)
+
+    keys = set(a.parameters) | set(b.parameters)
+    out['parameters'] = sorted(k for k in keys if a.parameters.get(k) != b.parameters.get(k))
+    ca, cb = a.header['context'], b.header['context']
+    context = []
+    for name in sorted(set(ca) | set(cb)):
+        ea, eb = ca.get(name), cb.get(name)
+        if ea != eb:
+            context.append(name)
+        elif ea is not None and 'batch' in ea:
+            for k in ea['columns']:
+                x, y = a._arrays[f'context/{name}/{k}'], b._arrays[f'context/{name}/{k}']
+                if x.shape != y.shape or _compare(x, y, 0., 0., chunk_size)[0]:
+                    context.append(name)
+                    break
+    out['context'] = context
+    return out
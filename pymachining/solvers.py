@@ -0,0 +1,117 @@
+import numpy as np
+
+from .base import *
+from .units import *
+from .batch import *
+from .machines import *
+from .operations import *
+from .tools import *
+
+# Solvers for operating limits, evaluated for whole arrays of tools at once.
+#
+# The machines' power ratings (power_continuous, power_intermittent) are spindle input powers,
+# which include the machine's efficiency and idle_power. The power limit compares them with the
+# input power drawn for a cut, net power / efficiency + idle_power, as power_trace and
+# spindle_log.compare_segments predict it.
+
+# Constraints that can limit the feed of a drill, in the order of the codes returned by max_feed()
+feed_limit_names = ['power', 'thrust', 'table']
+
+
+def bisect(f, lo, hi, iterations=50):
+    """
+    Array-wide bisection. For each element, find the largest x in [lo, hi] with f(x) >= 0,
+    assuming f decreases in x. Elements with f(lo) < 0 return lo, and those with f(hi) >= 0
+    return hi.
+
+    :param f: function of an array of x returning an array of the same shape
+    :param lo: array of lower bounds
+    :param hi: array of upper bounds
+    :param iterations: each iteration halves the interval
+    :return: array of x
+    """
+    lo = np.array(lo, dtype=float)
+    hi = np.array(hi, dtype=float)
+    lo, hi = np.broadcast_arrays(lo, hi)
+    lo = lo.copy()
+    hi = hi.copy()
+    at_hi = f(hi) >= 0
+    for _ in range(iterations):
+        mid = (lo + hi) / 2.
+        ok = f(mid) >= 0
+        lo = np.where(ok, mid, lo)
+        hi = np.where(ok, hi, mid)
+    return np.where(at_hi, hi, lo)
+
+
+def _as_drill_batch(drills):
+    if isinstance(drills, DrillBatch):
+        return drills
+    if isinstance(drills, Drill):
+        # One drill, or a drill holding an array of diameters
+        diameter = Q_(np.atleast_1d(drills.diameter.m_as('mm')), 'mm')
+        return DrillBatch.from_arrays(diameter, drills.drill_style)
+    return DrillBatch.from_tools(drills)
+
+
+def max_feed(drills, spindle_rpm, stock_material, machine, intermittent=False, method='closed'):
+    """
+    Highest feed per revolution for each drill at the given spindle speed, limited by the machine's
+    power, the machine's max_feed_force, and the feed from the material table.
+
+    The power limit is on the input power drawn, net power / efficiency + idle_power.
+
+    Net power (DrillOp.net_power_) and thrust (DrillHSS.thrust2) are both proportional to feed, so
+    the limits are found by evaluating each once at a unit feed and scaling. method='bisect' finds
+    the same limits by array-wide bisection instead, which does not rely on proportionality.
+
+    :param drills: DrillBatch, list of DrillHSS, or a DrillHSS holding an array of diameters
+    :param spindle_rpm: spindle speed, a single value or one per drill
+    :param stock_material:
+    :param machine:
+    :param intermittent: use the machine's intermittent rather than continuous power rating
+    :param method: 'closed' or 'bisect'
+    :return: (feed per revolution [inch / turn], array of binding constraint names from feed_limit_names)
+    """
+    batch = _as_drill_batch(drills)
+    diam = batch.diameter
+    rpm = Q_(np.broadcast_to(spindle_rpm.m_as('tpm'), (len(batch),)), 'tpm')
+    u_s = stock_material.specific_cutting_energy
+
+    if intermittent:
+        power_available = machine.power_intermittent(rpm).m_as('watt')
+    else:
+        power_available = machine.power_continuous(rpm).m_as('watt')
+    idle_power = machine.idle_power.m_as('watt')
+    max_thrust = machine.max_feed_force.m_as('lbs')
+    table_feed = batch.feed_rate(stock_material).m_as('inch / turn')
+
+    if method == 'closed':
+        unit_feed = Q_(1., 'inch / turn')
+        power_per_feed = DrillOp.net_power_(diam, unit_feed, rpm, u_s).m_as('watt')
+        thrust_per_feed = batch.thrust2(stock_material, unit_feed).m_as('lbs')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            power_feed = np.where(power_per_feed > 0,
+                                  (power_available - idle_power) * machine.efficiency / power_per_feed, np.inf)
+            thrust_feed = np.where(thrust_per_feed > 0, max_thrust / thrust_per_feed, np.inf)
+    elif method == 'bisect':
+        # Search up to the largest feed any limit could allow
+        hi = np.full(len(batch), max(1., float(np.max(table_feed, initial=0.))) * 10.)
+
+        def power_margin(f):
+            net_power = DrillOp.net_power_(diam, Q_(f, 'inch / turn'), rpm, u_s).m_as('watt')
+            return power_available - (net_power / machine.efficiency + idle_power)
+
+        def thrust_margin(f):
+            return max_thrust - batch.thrust2(stock_material, Q_(f, 'inch / turn')).m_as('lbs')
+
+        power_feed = bisect(power_margin, 0., hi)
+        thrust_feed = bisect(thrust_margin, 0., hi)
+    else:
+        raise PyMachiningException(f'method must be from [closed, bisect], not {method}')
+
+    feeds = np.stack([np.maximum(power_feed, 0.), np.maximum(thrust_feed, 0.), table_feed])
+    limit = np.argmin(feeds, axis=0)
+    feed = feeds[limit, np.arange(len(batch))]
+
+    return Q_(feed, 'inch / turn'), np.asarray(feed_limit_names)[limit]
@@ -0,0 +1,238 @@
+import itertools
+
+import numpy as np
+
+from .base import *
+from .units import *
+from .machines import *
+from .materials import *
+from .operations import *
+
+# Spindle load logs.
+#
+# Binary layout, little-endian:
+#
+#   header, 16 bytes:
+#     magic         8 bytes   b'PMSPLOG1'
+#     record_size   uint32    size of one record in bytes (16)
+#     reserved      uint32    0
+#   records, one per sample, spindle_log_dtype:
+#     time          float64   seconds from the start of the log
+#     rpm           float32   measured spindle speed [turn / min]
+#     power         float32   measured spindle input power [W], including idle power
+#
+# Logs are opened as numpy.memmap, so only the pages being read are in memory. Segmenting into
+# cutting events walks the log in chunks, carrying an event that crosses a chunk boundary over
+# to the next chunk.
+
+
+class SpindleLogFormatError(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+spindle_log_magic = b'PMSPLOG1'
+spindle_log_dtype = np.dtype([('time', '<f8'), ('rpm', '<f4'), ('power', '<f4')])
+_header_dtype = np.dtype([('magic', 'S8'), ('record_size', '<u4'), ('reserved', '<u4')])
+
+# One row per cutting event
+segment_dtype = np.dtype([('start', '<i8'), ('stop', '<i8'), ('t_start', '<f8'), ('t_stop', '<f8'),
+                          ('mean_power', '<f8'), ('max_power', '<f8'), ('mean_rpm', '<f8')])
+
+
+def spindle_log_header():
+    # The 16 byte header at the start of a spindle log, before the records
+    header = np.zeros(1, dtype=_header_dtype)
+    header['magic'] = spindle_log_magic
+    header['record_size'] = spindle_log_dtype.itemsize
+    return header.tobytes()
+
+
+def write_spindle_log(fn, time, rpm, power):
+    # Write a log from arrays of seconds, turn / min and watts
+    records = np.empty(len(time), dtype=spindle_log_dtype)
+    records['time'] = time
+    records['rpm'] = rpm
+    records['power'] = power
+    with open(fn, 'wb') as f:
+        f.write(spindle_log_header())
+        records.tofile(f)
+
+
+def csv_to_spindle_log(csv_fn, log_fn, chunk_rows=1 << 20, skip_header=1):
+    """
+    Convert a CSV log of time [s], rpm, power [W] columns into the binary layout, chunk_rows
+    rows at a time.
+
+    :return: number of records written
+    """
+    n = 0
+    with open(csv_fn) as fin, open(log_fn, 'wb') as fout:
+        fout.write(spindle_log_header())
+        for _ in range(skip_header):
+            next(fin, None)
+        while True:
+            lines = list(itertools.islice(fin, chunk_rows))
+            if not lines:
+                break
+            a = np.loadtxt(lines, delimiter=',', ndmin=2)
+            records = np.empty(len(a), dtype=spindle_log_dtype)
+            records['time'] = a[:, 0]
+            records['rpm'] = a[:, 1]
+            records['power'] = a[:, 2]
+            records.tofile(fout)
+            n += len(a)
+    return n
+
+
+def open_spindle_log(fn):
+    # Memory-mapped, read-only array of spindle_log_dtype records
+    header = np.fromfile(fn, dtype=_header_dtype, count=1)
+    if len(header) != 1 or header['magic'][0] != spindle_log_magic:
+        raise SpindleLogFormatError(f'{fn} is not a spindle log')
+    if header['record_size'][0] != spindle_log_dtype.itemsize:
+        raise SpindleLogFormatError(f'{fn} has {header["record_size"][0]} byte records, expected {spindle_log_dtype.itemsize}')
+    return np.memmap(fn, dtype=spindle_log_dtype, mode='r', offset=_header_dtype.itemsize)
+
+
+def segment_cutting_events(log, on_power, off_power=None, min_samples=1, chunk_size=1 << 20):
+    """
+    Find cutting events, where the spindle power rises to at least on_power and stays above
+    off_power. The two thresholds give hysteresis so noise near one threshold does not split an
+    event.
+
+    :param log: array of spindle_log_dtype records, e.g., from open_spindle_log()
+    :param on_power: power starting an event [W], e.g., a margin above the machine's idle power
+    :param off_power: power ending an event [W], defaults to on_power
+    :param min_samples: shorter events are dropped
+    :param chunk_size: records read at a time
+    :return: array of segment_dtype
+    """
+    if off_power is None:
+        off_power = on_power
+
+    segments = []
+    state = False
+    # Accumulators of an event still open at the end of the previous chunk
+    carry = None
+
+    for c0 in range(0, len(log), chunk_size):
+        chunk = log[c0:c0 + chunk_size]
+        power = np.asarray(chunk['power'], dtype=float)
+        rpm = np.asarray(chunk['rpm'], dtype=float)
+        n = len(power)
+
+        # Hysteresis: decided where power is above on_power or below off_power, otherwise the
+        # previous state carries forward
+        decided = (power >= on_power) | (power < off_power)
+        last = np.maximum.accumulate(np.where(decided, np.arange(n), -1))
+        active = np.where(last >= 0, power[np.maximum(last, 0)] >= on_power, state)
+
+        bounds = np.flatnonzero(np.diff(active.astype(np.int8))) + 1
+        starts = np.concatenate([[0], bounds])
+        stops = np.concatenate([bounds, [n]])
+        runs = active[starts]
+        starts, stops = starts[runs], stops[runs]
+        if len(starts):
+            cs_p = np.concatenate([[0.], np.cumsum(power)])
+            cs_rpm = np.concatenate([[0.], np.cumsum(rpm)])
+            sum_p = cs_p[stops] - cs_p[starts]
+            sum_rpm = cs_rpm[stops] - cs_rpm[starts]
+            # Samples between events are -inf so each reduceat span, which runs to the next
+            # start, only sees its own event
+            max_p = np.maximum.reduceat(np.where(active, power, -np.inf), starts)
+            t = chunk['time']
+            rows = np.empty(len(starts), dtype=segment_dtype)
+            rows['start'] = starts + c0
+            rows['stop'] = stops + c0
+            rows['t_start'] = t[starts]
+            rows['t_stop'] = t[stops - 1]
+            rows['mean_power'] = sum_p
+            rows['max_power'] = max_p
+            rows['mean_rpm'] = sum_rpm
+
+            if carry is not None:
+                if starts[0] == 0:
+                    # The first run continues the open event
+                    first = rows[0]
+                    first['start'] = carry[0]['start']
+                    first['t_start'] = carry[0]['t_start']
+                    first['mean_power'] += carry[0]['mean_power']
+                    first['max_power'] = max(first['max_power'], carry[0]['max_power'])
+                    first['mean_rpm'] += carry[0]['mean_rpm']
+                else:
+                    segments.append(carry)
+                carry = None
+            if stops[-1] == n:
+                carry = rows[-1:].copy()
+                rows = rows[:-1]
+            segments.append(rows)
+        elif carry is not None:
+            segments.append(carry)
+            carry = None
+        state = bool(active[-1]) if n else state
+
+    if carry is not None:
+        segments.append(carry)
+    if not segments:
+        return np.empty(0, dtype=segment_dtype)
+
+    segments = np.concatenate(segments)
+    count = segments['stop'] - segments['start']
+    # Sums to means
+    segments['mean_power'] /= count
+    segments['mean_rpm'] /= count
+    return segments[count >= min_samples]
+
+
+def compare_segments(segments, machine, stock_material, diameter, feed_per_revolution, spindle_rpm=None,
+                     tolerance=.25):
+    """
+    Compare measured cutting events with the power predicted for the commanded drilling
+    parameters, one command per segment.
+
+    The prediction is the spindle input power DrillOp.net_power / efficiency + idle_power. A
+    segment is overloaded if its mean power is above the prediction by more than tolerance,
+    or above the machine's continuous rating, or its peak is above the intermittent rating; it
+    is underloaded if its mean power is below the prediction by more than tolerance, e.g., a
+    broken drill or cutting air.
+
+    :param segments: array of segment_dtype
+    :param machine:
+    :param stock_material:
+    :param diameter: Quantity, a single value or one per segment
+    :param feed_per_revolution: Quantity, a single value or one per segment
+    :param spindle_rpm: commanded speed, defaults to the measured mean speed of each segment
+    :param tolerance: fraction of the predicted power
+    :return: dict of arrays with one entry per segment
+    """
+    n = len(segments)
+    if spindle_rpm is None:
+        spindle_rpm = Q_(segments['mean_rpm'], 'tpm')
+    rpm = Q_(np.broadcast_to(spindle_rpm.m_as('tpm'), (n,)), 'tpm')
+
+    net_power = DrillOp.net_power_(diameter, feed_per_revolution, rpm,
+                                   stock_material.specific_cutting_energy).m_as('watt')
+    net_power = np.broadcast_to(net_power, (n,))
+    predicted = net_power / machine.efficiency + machine.idle_power.m_as('watt')
+    continuous = machine.power_continuous(rpm).m_as('watt')
+    intermittent = machine.power_intermittent(rpm).m_as('watt')
+
+    measured = segments['mean_power']
+    exceeds_continuous = measured > continuous
+    exceeds_intermittent = segments['max_power'] > intermittent
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = measured / predicted
+
+    return {
+        'predicted_power': predicted,
+        'measured_power': measured,
+        'ratio': ratio,
+        'power_continuous': continuous,
+        'power_intermittent': intermittent,
+        'exceeds_continuous': exceeds_continuous,
+        'exceeds_intermittent': exceeds_intermittent,
+        'overload': (ratio > 1. + tolerance) | exceeds_continuous | exceeds_intermittent,
+        'underload': ratio < 1. - tolerance,
+    }
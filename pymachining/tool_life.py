@@ -0,0 +1,204 @@
+import numpy as np
+
+from .base import *
+from .units import *
+from .machines import *
+from .materials import *
+from .tool_materials import *
+from .tools import *
+
+# Tool life and the economics of drilling a hole.
+#
+# Tool life follows the extended Taylor equation
+#
+#   V T^n (f / f_ref)^a = C
+#
+# with V the cutting speed [ft / min], T the tool life [min of cutting], f the feed
+# [inch / turn], and C the speed giving one minute of life at the reference feed. Parameters are
+# per tool material and stock material. The values below are typical textbook values (n of about
+# 0.125 for HSS and 0.25 for carbide) chosen to give roughly an hour of life at the low end of the
+# materials' SFM ranges; calibrate them against the tools actually used before relying on them.
+#
+# For each hole:
+#
+#   cutting time      t_c = depth / (f N)
+#   time per hole     t_c + t_handling + t_change t_c / T
+#   cost per hole     rate (t_c + t_handling) + (rate t_change + tool cost) t_c / T
+#
+# where t_c / T is the fraction of a tool worn out by one hole.
+
+
+class ToolLifeUnknown(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+class TaylorToolLife(PyMachiningBase):
+    def __init__(self, n, C, a=0., f_ref=Q_(.005, 'inch / turn')):
+        """
+
+        :param n: Taylor exponent
+        :param C: cutting speed for one minute of tool life at the reference feed
+        :param a: feed exponent, 0 for the basic Taylor equation
+        :param f_ref: reference feed
+        """
+        PyMachiningBase.__init__(self)
+        self.n = n
+        self.C = C
+        self.a = a
+        self.f_ref = f_ref
+
+    def tool_life_(self, sfm, ipr):
+        # Tool life [min] from magnitudes in ft / min and inch / turn
+        C = self.C.m_as('feet tpm')
+        f_ref = self.f_ref.m_as('inch / turn')
+        with np.errstate(divide='ignore'):
+            return (C / (sfm * (ipr / f_ref) ** self.a)) ** (1. / self.n)
+
+    def tool_life(self, cutting_speed, feed_per_revolution):
+        return Q_(self.tool_life_(cutting_speed.m_as('feet tpm'), feed_per_revolution.m_as('inch / turn')), 'minute')
+
+    def cutting_speed(self, tool_life, feed_per_revolution):
+        # Speed giving the tool life at the feed
+        C = self.C.m_as('feet tpm')
+        f = feed_per_revolution.m_as('inch / turn') / self.f_ref.m_as('inch / turn')
+        return Q_(C / (tool_life.m_as('minute') ** self.n * f ** self.a), 'feet tpm')
+
+
+taylor_parameters = {
+    (ToolMaterialHSS, MaterialAluminum): TaylorToolLife(.125, Q_(330, 'feet tpm'), .5),
+    (ToolMaterialHSS, MaterialSteelMild): TaylorToolLife(.125, Q_(50, 'feet tpm'), .5),
+    (ToolMaterialHSS, MaterialSteelMedium): TaylorToolLife(.125, Q_(25, 'feet tpm'), .5),
+    (ToolMaterialHSS, MaterialSteelHigh): TaylorToolLife(.125, Q_(12, 'feet tpm'), .5),
+    (ToolMaterialCarbide, MaterialAluminum): TaylorToolLife(.25, Q_(3300, 'feet tpm'), .4),
+    (ToolMaterialCarbide, MaterialSteelMild): TaylorToolLife(.25, Q_(170, 'feet tpm'), .4),
+    (ToolMaterialCarbide, MaterialSteelMedium): TaylorToolLife(.25, Q_(170, 'feet tpm'), .4),
+    (ToolMaterialCarbide, MaterialSteelHigh): TaylorToolLife(.25, Q_(170, 'feet tpm'), .4),
+}
+
+
+def taylor_tool_life(tool_material, stock_material):
+    # Parameters for a tool material and stock material, looked up through the class hierarchies
+    for tm in type(tool_material).__mro__:
+        for sm in type(stock_material).__mro__:
+            if (tm, sm) in taylor_parameters:
+                return taylor_parameters[(tm, sm)]
+    raise ToolLifeUnknown(f'{tool_material.description}, {stock_material.description}')
+
+
+class CostPerHoleOptimum(PyMachiningBase):
+    # Optimum for each (tool, material) pair; arrays are indexed [tool, material]. Pairs
+    # without a feasible grid point have NaN values and feasible False.
+    def __init__(self, **columns):
+        PyMachiningBase.__init__(self)
+        for k, v in columns.items():
+            setattr(self, k, v)
+
+
+def optimize_cost_per_hole(drills, stock_materials, hole_depth, machine_rate, tool_cost, tool_change_time,
+                           handling_time=Q_(0, 'second'), machine=None, objective='cost',
+                           speed_factors=np.linspace(.5, 2.5, 41), feed_factors=np.linspace(.5, 1.25, 16)):
+    """
+    Best speed and feed for every drill and material, from a grid around the table values.
+
+    The grid is every SFM factor times the low end of the material's SFM range, crossed with
+    every feed factor times the table feed of the drill. Grid points outside the machine's
+    speed range, or needing more than its continuous power, are excluded when a machine is
+    given. Everything is evaluated as one array of shape (drills, materials, speeds, feeds).
+
+    :param drills: list of drills
+    :param stock_materials: list of materials
+    :param hole_depth:
+    :param machine_rate: cost of the machine and operator per hour
+    :param tool_cost: cost of replacing or regrinding a drill, a single value or one per drill
+    :param tool_change_time:
+    :param handling_time: time per hole other than cutting, e.g., rapids and pecking
+    :param machine: optional machine whose speed and power limits are applied
+    :param objective: 'cost' for least cost per hole, 'time' for least time per hole
+    :param speed_factors:
+    :param feed_factors:
+    :return: CostPerHoleOptimum
+    """
+    if objective not in ['cost', 'time']:
+        raise PyMachiningException(f'objective must be from [cost, time], not {objective}')
+
+    nt, nm = len(drills), len(stock_materials)
+    D = np.array([d.diameter.m_as('inch') for d in drills])
+    speed_factors = np.asarray(speed_factors, dtype=float)
+    feed_factors = np.asarray(feed_factors, dtype=float)
+
+    # Per (tool, material): reference speed and feed, Taylor parameters, specific cutting energy
+    sfm0 = np.full((nt, nm), np.nan)
+    ipr0 = np.full((nt, nm), np.nan)
+    C = np.full((nt, nm), np.nan)
+    n = np.ones((nt, nm))
+    a = np.zeros((nt, nm))
+    f_ref = np.ones((nt, nm))
+    u_s = np.zeros(nm)
+    # Drills are grouped by tool material and class, so each table lookup is one array call
+    groups = {}
+    for i, d in enumerate(drills):
+        groups.setdefault((type(d.tool_material), type(d)), []).append(i)
+    for j, sm in enumerate(stock_materials):
+        u_s[j] = sm.specific_cutting_energy.m_as('watt / (inch ** 3 / min)')
+        for (_, cls), rows in groups.items():
+            tool_material = drills[rows[0]].tool_material
+            try:
+                tl = taylor_tool_life(tool_material, sm)
+                ipr0[rows, j] = cls(Q_(D[rows], 'inch')).feed_rate(sm).m_as('inch / turn')
+            except (ToolLifeUnknown, ToolIncompatibleMaterial):
+                continue
+            sfm0[rows, j] = sm.sfm_range(tool_material)[0].m_as('feet tpm')
+            C[rows, j] = tl.C.m_as('feet tpm')
+            n[rows, j] = tl.n
+            a[rows, j] = tl.a
+            f_ref[rows, j] = tl.f_ref.m_as('inch / turn')
+
+    # Grid of shape (tools, materials, speeds, feeds)
+    sfm = sfm0[:, :, None, None] * speed_factors[None, None, :, None]
+    ipr = ipr0[:, :, None, None] * feed_factors[None, None, None, :]
+    rpm = sfm * 12. / (np.pi * D[:, None, None, None])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        life = (C[:, :, None, None] / (sfm * (ipr / f_ref[:, :, None, None]) ** a[:, :, None, None])) \
+               ** (1. / n[:, :, None, None])
+        t_c = hole_depth.m_as('inch') / (ipr * rpm)
+        wear = t_c / life
+
+    feasible = np.isfinite(t_c) & (life > 0)
+    if machine is not None:
+        rpm_b = np.broadcast_to(rpm, np.broadcast_shapes(rpm.shape, ipr.shape))
+        feasible &= (rpm_b >= machine.min_rpm.m_as('tpm')) & (rpm_b <= machine.max_rpm.m_as('tpm'))
+        # P = π (D / 2)^2 f N u_s, checked against the continuous rating at each grid speed
+        P = np.pi * (D[:, None, None, None] / 2.) ** 2 * ipr * rpm * u_s[None, :, None, None]
+        rpm_valid = np.where(np.isfinite(rpm), rpm, 0.)
+        available = machine.power_continuous(Q_(rpm_valid.ravel(), 'tpm')).m_as('watt').reshape(rpm.shape)
+        feasible &= P <= available
+
+    t_h = handling_time.m_as('minute')
+    t_x = tool_change_time.m_as('minute')
+    rate = machine_rate / 60.
+    tool_cost = np.broadcast_to(np.asarray(tool_cost, dtype=float), (nt,))[:, None, None, None]
+    time_per_hole = t_c + t_h + t_x * wear
+    cost_per_hole = rate * (t_c + t_h) + (rate * t_x + tool_cost) * wear
+
+    score = cost_per_hole if objective == 'cost' else time_per_hole
+    score = np.where(feasible, score, np.inf).reshape(nt, nm, -1)
+    best = np.argmin(score, axis=2)
+    found = np.isfinite(np.take_along_axis(score, best[:, :, None], axis=2)[:, :, 0])
+
+    def pick(x):
+        x = np.broadcast_to(x, feasible.shape).reshape(nt, nm, -1)
+        return np.where(found, np.take_along_axis(x, best[:, :, None], axis=2)[:, :, 0], np.nan)
+
+    return CostPerHoleOptimum(
+        feasible=found,
+        sfm=Q_(pick(sfm), 'feet tpm'),
+        spindle_rpm=Q_(pick(rpm), 'tpm'),
+        feed=Q_(pick(ipr), 'inch / turn'),
+        tool_life=Q_(pick(life), 'minute'),
+        holes_per_tool=pick(1. / wear),
+        time_per_hole=Q_(pick(time_per_hole), 'minute'),
+        cost_per_hole=pick(cost_per_hole),
+    )
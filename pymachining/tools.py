@@ -3,6 +3,7 @@ import pylab
 
 from .base import *
 from .units import *
+from .fitting import *
 from .materials import *
 from .tool_materials import *
 
@@ -13,6 +14,22 @@ class ToolIncompatibleMaterial(PyMachiningException):
         self.description = s
 
 
+def _table_lookup(x, table_x, table_y, fit, table=None):
+    # Evaluate a tabulated curve at x, a float or an array of floats in the units of table_x.
+    # Values below the table are held at the first entry and values at or past the end are held
+    # at the last entry. Evaluating a whole array at once lets a tool library be evaluated with
+    # a single call instead of one call per tool.
+    # fit is True for the table's fitted curve (see fitting.table_fit_methods), False for
+    # linear interpolation, or a method name.
+    x = np.asarray(x, dtype=float)
+    y = table_fit(table_x, table_y, fit_method(fit, table))(x)
+    y = np.where(x < table_x[0], table_y[0], y)
+    y = np.where(x >= table_x[-1], table_y[-1], y)
+    if y.ndim == 0:
+        y = float(y)
+    return y
+
+
 class Tool(PyMachiningBase):
     def __init__(self, diameter, tool_material):
         PyMachiningBase.__init__(self)
@@ -42,7 +59,7 @@ class Drill(Tool):
     def __init__(self, diameter, tool_material):
         Tool.__init__(self, diameter, tool_material)
         self.description = 'Unknown drill'
-        if diameter in self.letters_and_numbers_and_fractions:
+        if isinstance(diameter, str) and diameter in self.letters_and_numbers_and_fractions:
             self.diameter = Q_(self.letters_and_numbers_and_fractions[diameter][1], 'mm')
         self.drill_style = 'unknown'
 
@@ -244,6 +261,86 @@ class Drill(Tool):
                                          }
 
 
+# Feed in Inches per Revolution (IPR) ± 25%, by application material group row (A-N, S-Z) and
+# drill diameter, from https://www.dormerpramet.com/Downloads/RoundTool_Speeds_and_Feeds.pdf
+# Diameters: 1mm,1/32"  2mm,3/32"  3mm,1/8"  4mm,5/32"  5mm,3/16"  6mm,1/4"  8mm,5/16"  10mm,3/8"
+#            12mm,1/2"  15mm,9/16"  16mm,5/8"  20mm,3/4"  25mm,1"  30mm,1.1/8"  40mm,1.5/8"  50mm,2"
+# Rows S-W stop at 40mm and rows X-Z at 20mm; their missing values are nan and a lookup past
+# the end of a row is held at its last value.
+feed_chart_diam_mm = [1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 16, 20, 25, 30, 40, 50]
+feed_chart_diam_str = ['1/32"', '3/32"', '1/8"', '5/32"', '3/16"', '1/4"', '5/16"', '3/8"', '1/2"', '9/16"', '5/8"',
+                       '3/4"', '1"', '1.1/8"', '1.5/8"', '2"']
+feed_chart_diam_in = [1 / 32., 3 / 32., 1 / 8., 5 / 32., 3 / 16., 1 / 4., 5 / 16., 3 / 8., 1 / 2., 9 / 16., 5 / 8.,
+                      3 / 4., 1., 1 + 1 / 8., 1 + 5 / 8., 2.]
+feed_chart_rows = 'ABCDEFGHIJKLMNSTUVWXYZ'
+_nan = float('nan')
+feed_ipr_chart = np.array([
+    [0.0004, 0.0009, 0.0011, 0.0013, 0.0014, 0.0017, 0.0021, 0.0024, 0.0027, 0.0032, 0.0034, 0.0043, 0.0049, 0.0053, 0.0061, 0.0069],  # A
+    [0.0006, 0.0011, 0.0015, 0.0016, 0.0018, 0.0021, 0.0026, 0.0031, 0.0035, 0.0041, 0.0043, 0.0053, 0.0060, 0.0065, 0.0074, 0.0082],  # B
+    [0.0006, 0.0013, 0.0017, 0.0020, 0.0022, 0.0025, 0.0031, 0.0039, 0.0043, 0.0049, 0.0051, 0.0063, 0.0071, 0.0077, 0.0087, 0.0094],  # C
+    [0.0006, 0.0015, 0.0021, 0.0024, 0.0027, 0.0031, 0.0039, 0.0047, 0.0051, 0.0059, 0.0061, 0.0074, 0.0083, 0.0090, 0.0100, 0.0108],  # D
+    [0.0007, 0.0017, 0.0024, 0.0028, 0.0031, 0.0037, 0.0045, 0.0055, 0.0059, 0.0068, 0.0071, 0.0085, 0.0094, 0.0102, 0.0112, 0.0122],  # E
+    [0.0007, 0.0020, 0.0029, 0.0033, 0.0037, 0.0043, 0.0054, 0.0065, 0.0070, 0.0080, 0.0083, 0.0098, 0.0108, 0.0116, 0.0126, 0.0135],  # F
+    [0.0007, 0.0022, 0.0033, 0.0038, 0.0043, 0.0050, 0.0063, 0.0075, 0.0081, 0.0091, 0.0094, 0.0110, 0.0122, 0.0130, 0.0140, 0.0148],  # G
+    [0.0008, 0.0026, 0.0040, 0.0046, 0.0051, 0.0059, 0.0075, 0.0090, 0.0096, 0.0107, 0.0110, 0.0126, 0.0140, 0.0148, 0.0157, 0.0165],  # H
+    [0.0008, 0.0030, 0.0047, 0.0053, 0.0059, 0.0068, 0.0087, 0.0104, 0.0110, 0.0122, 0.0126, 0.0142, 0.0157, 0.0165, 0.0173, 0.0181],  # I
+    [0.0009, 0.0033, 0.0053, 0.0060, 0.0067, 0.0078, 0.0098, 0.0117, 0.0124, 0.0137, 0.0142, 0.0159, 0.0175, 0.0183, 0.0191, 0.0198],  # J
+    [0.0010, 0.0036, 0.0059, 0.0067, 0.0075, 0.0087, 0.0110, 0.0130, 0.0138, 0.0153, 0.0157, 0.0177, 0.0193, 0.0201, 0.0209, 0.0215],  # K
+    [0.0011, 0.0040, 0.0065, 0.0073, 0.0082, 0.0094, 0.0120, 0.0142, 0.0152, 0.0165, 0.0169, 0.0191, 0.0207, 0.0215, 0.0224, 0.0231],  # L
+    [0.0012, 0.0043, 0.0071, 0.0080, 0.0089, 0.0102, 0.0130, 0.0154, 0.0165, 0.0177, 0.0181, 0.0205, 0.0220, 0.0228, 0.0238, 0.0248],  # M
+    [0.0013, 0.0047, 0.0077, 0.0086, 0.0095, 0.0110, 0.0140, 0.0165, 0.0179, 0.0189, 0.0193, 0.0219, 0.0234, 0.0242, 0.0253, 0.0265],  # N
+    [0.0003, 0.0006, 0.0008, 0.0010, 0.0012, 0.0015, 0.0020, 0.0031, 0.0039, 0.0048, 0.0051, 0.0059, 0.0070, 0.0070, 0.0090, _nan],  # S
+    [0.0006, 0.0011, 0.0016, 0.0020, 0.0024, 0.0028, 0.0035, 0.0043, 0.0051, 0.0063, 0.0067, 0.0075, 0.0080, 0.0090, 0.0100, _nan],  # T
+    [0.0010, 0.0019, 0.0028, 0.0031, 0.0035, 0.0042, 0.0055, 0.0067, 0.0079, 0.0088, 0.0091, 0.0094, 0.0110, 0.0120, 0.0140, _nan],  # U
+    [0.0015, 0.0027, 0.0039, 0.0045, 0.0051, 0.0060, 0.0079, 0.0098, 0.0110, 0.0122, 0.0126, 0.0134, 0.0160, 0.0170, 0.0200, _nan],  # V
+    [0.0019, 0.0035, 0.0051, 0.0059, 0.0067, 0.0079, 0.0102, 0.0130, 0.0150, 0.0165, 0.0169, 0.0177, 0.0190, 0.0190, 0.0200, _nan],  # W
+    [0.0022, 0.0041, 0.0059, 0.0071, 0.0083, 0.0098, 0.0130, 0.0165, 0.0189, 0.0210, 0.0217, 0.0228, _nan, _nan, _nan, _nan],  # X
+    [0.0027, 0.0049, 0.0071, 0.0087, 0.0102, 0.0125, 0.0169, 0.0217, 0.0276, 0.0276, 0.0276, 0.0291, _nan, _nan, _nan, _nan],  # Y
+    [0.0037, 0.0068, 0.0098, 0.0128, 0.0157, 0.0210, 0.0315, 0.0394, 0.0433, 0.0463, 0.0472, 0.0472, _nan, _nan, _nan, _nan],  # Z
+])
+
+
+def feed_chart_row(stock_material, drill_style='jobber'):
+    """
+    Row index of feed_ipr_chart for a material and drill style, from the material's
+    feed_chart_rows, e.g., {'jobber': 'H', 'stub': 'I'}. Styles without an entry use the
+    jobber row.
+    """
+    rows = getattr(stock_material, 'feed_chart_rows', {})
+    row = rows.get(drill_style, rows.get('jobber'))
+    if row is None:
+        raise ToolIncompatibleMaterial(f'hss drill vs. {stock_material.description}')
+    return feed_chart_rows.index(row) if isinstance(row, str) else row
+
+
+def feed_chart_rate(row, diameter, fit=True):
+    """
+    Feed per revolution from feed_ipr_chart, interpolated over diameter. row and diameter are
+    broadcast together, so, e.g., rows[:, None] and diameters[None, :] give a rows x diameters
+    matrix from one call.
+
+    :param row: row indices or letters
+    :param diameter: Quantity
+    :param fit: True for the drill feed table's fit, False for linear, or a method name
+    :return: Quantity [inch / turn]
+    """
+    row = np.asarray(row)
+    if row.dtype.kind in 'US':
+        row = np.vectorize(feed_chart_rows.index, otypes=[int])(row)
+    chart = table_rows_fit(feed_chart_diam_in, feed_ipr_chart, fit_method(fit, 'drill_feed'))
+    v = chart(row, diameter.m_as('inch'))
+    if v.ndim == 0:
+        v = float(v)
+    return Q_(v, 'inch / turn')
+
+
+def feed_rate_matrix(stock_materials, diameter, drill_style='jobber', fit=True):
+    # Feed for every material and diameter, shape (materials, diameters), in one chart lookup
+    rows = np.array([feed_chart_row(m, drill_style) for m in stock_materials], dtype=int)
+    d = Q_(np.atleast_1d(diameter.m_as('inch')), 'inch')
+    return feed_chart_rate(rows[:, None], d[None, :], fit)
+
+
 class DrillHSS(Drill):
     def __init__(self, diameter):
         Drill.__init__(self, diameter, ToolMaterialHSS())
@@ -341,109 +438,17 @@ class DrillHSS(Drill):
         # 10.Graphite
         # 10.1 Standard graphite --- O
 
-        # Feed in Inches per Revolution (IPR) ± 25% Ø Diameter
-        # 1mm,1/32”  2mm,3/32”    3mm,1/8”    4mm,5/32”   5mm,3/16”   6mm,1/4”    8mm,5/16”   10mm,3/8”   12mm,1/2”   15mm,9/16”  16mm,5/8”   20mm,3/4”   25mm,1” 30mm,1.1/8” 40mm,1.5/8” 50mm,2”
-        # A 0.0004 0.0009 0.0011 0.0013 0.0014 0.0017 0.0021 0.0024 0.0027 0.0032 0.0034 0.0043 0.0049 0.0053 0.0061 0.0069
-        # B 0.0006 0.0011 0.0015 0.0016 0.0018 0.0021 0.0026 0.0031 0.0035 0.0041 0.0043 0.0053 0.0060 0.0065 0.0074 0.0082
-        # C 0.0006 0.0013 0.0017 0.0020 0.0022 0.0025 0.0031 0.0039 0.0043 0.0049 0.0051 0.0063 0.0071 0.0077 0.0087 0.0094
-        # D 0.0006 0.0015 0.0021 0.0024 0.0027 0.0031 0.0039 0.0047 0.0051 0.0059 0.0061 0.0074 0.0083 0.0090 0.0100 0.0108
-        # E 0.0007 0.0017 0.0024 0.0028 0.0031 0.0037 0.0045 0.0055 0.0059 0.0068 0.0071 0.0085 0.0094 0.0102 0.0112 0.0122
-        # F 0.0007 0.0020 0.0029 0.0033 0.0037 0.0043 0.0054 0.0065 0.0070 0.0080 0.0083 0.0098 0.0108 0.0116 0.0126 0.0135
-        # G 0.0007 0.0022 0.0033 0.0038 0.0043 0.0050 0.0063 0.0075 0.0081 0.0091 0.0094 0.0110 0.0122 0.0130 0.0140 0.0148
-        # H 0.0008 0.0026 0.0040 0.0046 0.0051 0.0059 0.0075 0.0090 0.0096 0.0107 0.0110 0.0126 0.0140 0.0148 0.0157 0.0165
-        # I 0.0008 0.0030 0.0047 0.0053 0.0059 0.0068 0.0087 0.0104 0.0110 0.0122 0.0126 0.0142 0.0157 0.0165 0.0173 0.0181
-        # J 0.0009 0.0033 0.0053 0.0060 0.0067 0.0078 0.0098 0.0117 0.0124 0.0137 0.0142 0.0159 0.0175 0.0183 0.0191 0.0198
-        # K 0.0010 0.0036 0.0059 0.0067 0.0075 0.0087 0.0110 0.0130 0.0138 0.0153 0.0157 0.0177 0.0193 0.0201 0.0209 0.0215
-        # L 0.0011 0.0040 0.0065 0.0073 0.0082 0.0094 0.0120 0.0142 0.0152 0.0165 0.0169 0.0191 0.0207 0.0215 0.0224 0.0231
-        # M 0.0012 0.0043 0.0071 0.0080 0.0089 0.0102 0.0130 0.0154 0.0165 0.0177 0.0181 0.0205 0.0220 0.0228 0.0238 0.0248
-        # N 0.0013 0.0047 0.0077 0.0086 0.0095 0.0110 0.0140 0.0165 0.0179 0.0189 0.0193 0.0219 0.0234 0.0242 0.0253 0.0265
-        # S 0.0003 0.0006 0.0008 0.0010 0.0012 0.0015 0.0020 0.0031 0.0039 0.0048 0.0051 0.0059 0.0070 0.0070 0.0090
-        # T 0.0006 0.0011 0.0016 0.0020 0.0024 0.0028 0.0035 0.0043 0.0051 0.0063 0.0067 0.0075 0.0080 0.0090 0.0100
-        # U 0.0010 0.0019 0.0028 0.0031 0.0035 0.0042 0.0055 0.0067 0.0079 0.0088 0.0091 0.0094 0.0110 0.0120 0.0140
-        # V 0.0015 0.0027 0.0039 0.0045 0.0051 0.0060 0.0079 0.0098 0.0110 0.0122 0.0126 0.0134 0.0160 0.0170 0.0200
-        # W 0.0019 0.0035 0.0051 0.0059 0.0067 0.0079 0.0102 0.0130 0.0150 0.0165 0.0169 0.0177 0.0190 0.0190 0.0200
-        # X 0.0022 0.0041 0.0059 0.0071 0.0083 0.0098 0.0130 0.0165 0.0189 0.0210 0.0217 0.0228
-        # Y 0.0027 0.0049 0.0071 0.0087 0.0102 0.0125 0.0169 0.0217 0.0276 0.0276 0.0276 0.0291
-        # Z 0.0037 0.0068 0.0098 0.0128 0.0157 0.0210 0.0315 0.0394 0.0433 0.0463 0.0472 0.0472
-
-        diam = self.diameter
-
-        diam_mm = [1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 16, 20, 25, 30, 40, 50]
-        diam_str = ['1/32"', '3/32"', '1/8"', '5/32"', '3/16"', '1/4"', '5/16"', '3/8"', '1/2"', '9/16"', '5/8"',
-                    '3/4"', '1"', '1.1/8"', '1.5/8"', '2"']
-        diam_in_ = [1 / 32., 3 / 32., 1 / 8., 5 / 32., 3 / 16., 1 / 4., 5 / 16., 3 / 8., 1 / 2., 9 / 16., 5 / 8.,
-                    3 / 4., 1., 1 + 1 / 8., 1 + 5 / 8., 2.]
-        feed_ipr_d_ = [0.0006, 0.0015, 0.0021, 0.0024, 0.0027, 0.0031, 0.0039, 0.0047, 0.0051, 0.0059, 0.0061, 0.0074,
-                       0.0083, 0.0090, 0.0100, 0.0108]
-        feed_ipr_e_ = [0.0007, 0.0017, 0.0024, 0.0028, 0.0031, 0.0037, 0.0045, 0.0055, 0.0059, 0.0068, 0.0071, 0.0085,
-                       0.0094, 0.0102, 0.0112, 0.0122]
-        feed_ipr_f_ = [0.0007, 0.0020, 0.0029, 0.0033, 0.0037, 0.0043, 0.0054, 0.0065, 0.0070, 0.0080, 0.0083, 0.0098,
-                       0.0108, 0.0116, 0.0126, 0.0135]
-        feed_ipr_g_ = [0.0007, 0.0022, 0.0033, 0.0038, 0.0043, 0.0050, 0.0063, 0.0075, 0.0081, 0.0091, 0.0094, 0.0110,
-                       0.0122, 0.0130, 0.0140, 0.0148]
-        feed_ipr_h_ = [0.0008, 0.0026, 0.0040, 0.0046, 0.0051, 0.0059, 0.0075, 0.0090, 0.0096, 0.0107, 0.0110, 0.0126,
-                       0.0140, 0.0148, 0.0157, 0.0165]
-        feed_ipr_i_ = [0.0008, 0.0030, 0.0047, 0.0053, 0.0059, 0.0068, 0.0087, 0.0104, 0.0110, 0.0122, 0.0126, 0.0142,
-                       0.0157, 0.0165, 0.0173, 0.0181]
-        feed_ipr_j_ = [0.0009, 0.0033, 0.0053, 0.0060, 0.0067, 0.0078, 0.0098, 0.0117, 0.0124, 0.0137, 0.0142, 0.0159,
-                       0.0175, 0.0183, 0.0191, 0.0198]
-        if isinstance(stock_material, MaterialAluminum):
-            if drill_len == 'stub':
-                feed_ipr_ = feed_ipr_i_
-                # feed_ipr_ = feed_ipr_j_
-            else:  # elif drill_len == 'jobber':
-                feed_ipr_ = feed_ipr_h_
-        elif isinstance(stock_material, MaterialSteelMild):
-            if drill_len == 'stub':
-                feed_ipr_ = feed_ipr_j_
-            else:  # elif drill_len == 'jobber':
-                feed_ipr_ = feed_ipr_f_
-        elif isinstance(stock_material, MaterialSteelMedium):
-            if drill_len == 'stub':
-                feed_ipr_ = feed_ipr_e_
-            else:  # elif drill_len == 'jobber':
-                feed_ipr_ = feed_ipr_d_
-        elif isinstance(stock_material, MaterialSteelHigh):
-            raise ToolIncompatibleMaterial('hss tool vs. tool steel')
-        else:
-            feed_ipr_ = feed_ipr_h_
-
-        diam_in = [Q_(x, 'inch') for x in diam_in_]
-        feed_ipr = [Q_(x, 'inch / turn') for x in feed_ipr_]
-
-        # print(diam_in)
-        ipr = None
-        if diam < diam_in[0]:
-            ipr = feed_ipr[0]
-        elif diam >= diam_in[-1]:
-            ipr = feed_ipr[-1]
-        else:
-            if fit:
-                import numpy.polynomial.polynomial as poly
-                deg = 4
-                coef, (residuals, rank, singular_values, rcond) = poly.polyfit(diam_in_, feed_ipr_, deg, full=True)
-                # print(coef, residuals[0])
-                # Convert to inches, which are the units of the regressed source data. Then select magnitude of
-                # measurement, else the calculated values will be in terms of [inch]^rank, the rank of the
-                # fitted polynomial. Finally, add units in/turn to calculated ipr value.
-                ipr = Q_(poly.polyval(diam.to('inch').magnitude, coef), 'inch / turn')
-            else:
-                for i in range(len(diam_in) - 1):
-                    # print(i, diam_in[i], diam_in[i+1])
-                    if diam_in[i] <= diam <= diam_in[i + 1]:
-                        x = diam
-                        x1, x2 = diam_in[i:i + 2]
-                        y1, y2 = feed_ipr[i:i + 2]
-                        y = (x - x1) / (x2 - x1) * (y2 - y1) + y1
-                        ipr = y
-                        break
+        # Feed from the chart row (feed_ipr_chart) of the material and drill length, e.g.,
+        # aluminum is row H for jobber length drills and I for stub length ones.
+        row = feed_chart_row(stock_material, drill_len)
+        ipr = feed_chart_rate(row, self.diameter, fit)
         return ipr
 
     def feed_rate(self, stock_material, fit=True):
         return self.feed_rate_(stock_material, 'jobber', fit=fit)
 
     @classmethod
-    def plot_feedrate(cls, stock_material, embed=False):
+    def plot_feedrate(cls, stock_material, embed=False, ax=None):
         x = np.linspace(0, 2.5, 100) * ureg.inch
 
         def f(diam, fit):
@@ -453,14 +458,18 @@ class DrillHSS(Drill):
 
         y1 = [f(x_, False).magnitude for x_ in x]
         y2 = [f(x_, True).magnitude for x_ in x]
-        pylab.title('Feed rate', fontsize=16.)
-        pylab.xlabel('drill size [in]')
-        pylab.ylabel('feed rate [in / rev]')
-        pylab.xlim(0, 2.5)
-        pylab.plot(x, y1, label='linear regression')
-        pylab.plot(x, y2, label='polynomial regression')
-        pylab.legend()
-
+        # Drawn on ax when given, which is then returned, else on pylab's current axes
+        ax_ = pylab.gca() if ax is None else ax
+        ax_.set_title('Feed rate', fontsize=16.)
+        ax_.set_xlabel('drill size [in]')
+        ax_.set_ylabel('feed rate [in / rev]')
+        ax_.set_xlim(0, 2.5)
+        ax_.plot(x.m_as('inch'), y1, label='linear interpolation')
+        ax_.plot(x.m_as('inch'), y2, label='fitted curve')
+        ax_.legend()
+
+        if ax is not None:
+            return ax
         if not embed:
             pylab.show()
             return None
@@ -474,7 +483,7 @@ class DrillHSS(Drill):
             return img_str
 
 
-    def thrust(self, stock_material, fit='poly'):
+    def thrust(self, stock_material, fit=True):
         # Trust numbers from:
         # http://www.drill-hq.com/products/multiple-heads/custom-heads/multiple-spindle-drilling-head-for-different-size-tooling/recommended-tool-speed-chart/
 
@@ -489,37 +498,7 @@ class DrillHSS(Drill):
                          'Plastic/Wood': [10, 20, 40, 60, 70, 90, 145, 175, 220, 330]}
 
         thrust_lbs_ = thrust_lbs_d_['aluminum']
-        diam_in = [Q_(x, 'inch') for x in diam_in_]
-        thrust_lbs = [Q_(x, 'lbs') for x in thrust_lbs_]
-
-        # print(diam_in)
-        v = None
-        if diam < diam_in[0]:
-            v = thrust_lbs[0]
-        elif diam >= diam_in[-1]:
-            v = thrust_lbs[-1]
-        else:
-            if fit == 'poly':
-                import numpy.polynomial.polynomial as poly
-                deg = 4
-                coef, (residuals, rank, singular_values, rcond) = poly.polyfit(diam_in_, thrust_lbs_, deg, full=True)
-                # print(coef, residuals[0])
-                # Convert to inches, which are the units of the regressed source data. Then select magnitude of
-                # measurement, else the calculated values will be in terms of [inch]^rank, the rank of the
-                # fitted polynomial. Finally, add units in/turn to calculated ipr value.
-                v = Q_(poly.polyval(diam.to('inch').magnitude, coef), 'lbs')
-            elif fit == 'linear':
-                for i in range(len(diam_in) - 1):
-                    # print(i, diam_in[i], diam_in[i+1])
-                    if diam_in[i] <= diam <= diam_in[i + 1]:
-                        x = diam
-                        x1, x2 = diam_in[i:i + 2]
-                        y1, y2 = thrust_lbs[i:i + 2]
-                        y = (x - x1) / (x2 - x1) * (y2 - y1) + y1
-                        v = y
-                        break
-            else:
-                raise Exception('fit must be from [fit, linear]')
+        v = Q_(_table_lookup(diam.m_as('inch'), diam_in_, thrust_lbs_, fit, 'drill_thrust'), 'lbs')
 
         return v
 
@@ -539,7 +518,7 @@ class DrillHSS(Drill):
         return feed_force
 
     @classmethod
-    def plot_thrust(cls, stock_material, highlight=None, embed=False):
+    def plot_thrust(cls, stock_material, highlight=None, embed=False, ax=None):
         x = np.linspace(0, 2.5, 100) * ureg.inch
 
         def f(diam, fit):
@@ -554,19 +533,22 @@ class DrillHSS(Drill):
             return v
 
         y1 = [f(x_, 'linear').m_as('lbs') for x_ in x]
-        y2 = [f(x_, 'poly').m_as('lbs') for x_ in x]
+        y2 = [f(x_, True).m_as('lbs') for x_ in x]
         y3 = [f2(x_).m_as('lbs') for x_ in x]
-        pylab.title('Feed thrust', fontsize=16.)
-        pylab.xlabel('drill size [in]')
-        pylab.ylabel('thrust [lbs]')
-        pylab.xlim(0, 2.5)
-        pylab.plot(x.m_as('inch'), y1, label='linear regression')
-        pylab.plot(x.m_as('inch'), y2, label='polynomial regression')
-        pylab.plot(x.m_as('inch'), y3, label='calculated estimate')
+        ax_ = pylab.gca() if ax is None else ax
+        ax_.set_title('Feed thrust', fontsize=16.)
+        ax_.set_xlabel('drill size [in]')
+        ax_.set_ylabel('thrust [lbs]')
+        ax_.set_xlim(0, 2.5)
+        ax_.plot(x.m_as('inch'), y1, label='linear interpolation')
+        ax_.plot(x.m_as('inch'), y2, label='fitted curve')
+        ax_.plot(x.m_as('inch'), y3, label='calculated estimate')
         if highlight is not None:
-            pylab.axhline(y=highlight.to('lbs').magnitude, color='#ff3333ee', label='max thrust')
-        pylab.legend()
+            ax_.axhline(y=highlight.to('lbs').magnitude, color='#ff3333ee', label='max thrust')
+        ax_.legend()
 
+        if ax is not None:
+            return ax
         if not embed:
             pylab.show()
             pylab.close()
@@ -603,39 +585,52 @@ class DrillHSSStub(DrillHSS):
 
 
 class Tap(Tool):
-    def __init__(self, diameter, tool_material=''):
+    def __init__(self, diameter, tool_material='', pitch=None):
         Tool.__init__(self, diameter, tool_material)
         self.description = 'Unknown tap'
-        if diameter in Drill.letters_and_numbers_and_fractions:
+        if isinstance(diameter, str) and diameter in Drill.letters_and_numbers_and_fractions:
             self.diameter = Q_(Drill.letters_and_numbers_and_fractions[diameter][1], 'mm')
         self.tap_style = 'unknown'
+        # Thread pitch as a length per turn, e.g., Q_(1 / 20., 'inch / turn') for a 1/4-20 tap.
+        # A tap must advance one pitch per turn, so the pitch is also the feed per revolution.
+        self.pitch = pitch
 
     def feed(self, stock_material):
-        pass
+        return self.pitch
 
     def speed(self, stock_material):
         # https://www.parlec.com/Parlec/media/technical_specs/Tapping-Speeds-Torque-Requirements.pdf?ext=.pdf
 
         sfm_d = {
-            'aluminum': [90 - 110],
+            'aluminum': [90, 110],
             'brass': [80, 100],
-            'bronze': [40 - 60],
-            'copper': [70 - 90],
-            'copper-beryllium': [40 - 50],
-            'inconel, hastalloy, waspalloy': [5 - 15],
-            'iron-cast': [65 - 75],
-            'iron-malleable': [30 - 60],
-            'magnesium': [90 - 110],
-            'plastics': [60 - 90],
-            'steel-cast': [30 - 40],
-            'steel-free machining': [50 - 80],
-            'steel-chromium': [25 - 40],
-            'steel-alloy': [20 - 35],
-            'steel-stainless': [15 - 30],
-            'titanium': [10 - 25],
-            'zinc-die cast': [80 - 120]
+            'bronze': [40, 60],
+            'copper': [70, 90],
+            'copper-beryllium': [40, 50],
+            'inconel, hastalloy, waspalloy': [5, 15],
+            'iron-cast': [65, 75],
+            'iron-malleable': [30, 60],
+            'magnesium': [90, 110],
+            'plastics': [60, 90],
+            'steel-cast': [30, 40],
+            'steel-free machining': [50, 80],
+            'steel-chromium': [25, 40],
+            'steel-alloy': [20, 35],
+            'steel-stainless': [15, 30],
+            'titanium': [10, 25],
+            'zinc-die cast': [80, 120]
         }
-        pass
+
+        # The material's row of the table, e.g., 'aluminum' for MaterialAluminum
+        row = getattr(stock_material, 'tap_speed_class', None)
+        if row is None:
+            raise ToolIncompatibleMaterial(f'no tapping speeds for {stock_material.description}')
+        sfm_range = sfm_d[row]
+
+        # As with the drilling SFMs, start at the conservative end of the range.
+        v = Q_(sfm_range[0], 'feet tpm')
+
+        return v
 
     def torque_(self, stock_material, fit=True):
         # https://www.parlec.com/Parlec/media/technical_specs/Tapping-Speeds-Torque-Requirements.pdf?ext=.pdf
@@ -694,48 +689,16 @@ class Tap(Tool):
 
         diam = self.diameter
 
-        diam_in_ = [x[0] for x in arr]
-        torque_ = []
-        if isinstance(stock_material, MaterialAluminum):
-            torque_ = [x[2] for x in arr]
-        elif isinstance(stock_material, MaterialSteelMild):
-            torque_ = [x[3] for x in arr]
-        elif isinstance(stock_material, MaterialSteelMedium):
-            torque_ = [x[4] for x in arr]
-        elif isinstance(stock_material, MaterialSteelHigh):
-            raise ToolIncompatibleMaterial('hss tool vs. tool steel')
-        else:
-            raise ToolIncompatibleMaterial('unknown material')
+        # The material's column of the table, e.g., 'aluminum' for MaterialAluminum
+        columns = {'brass': 1, 'aluminum': 2, 'steel 200 bhn': 3, 'steel 300 bhn': 4, 'steel 400 bhn': 5}
+        column = getattr(stock_material, 'tap_torque_class', None)
+        if column is None:
+            raise ToolIncompatibleMaterial(f'no tapping torques for {stock_material.description}')
 
-        diam_in = [Q_(x, 'inch') for x in diam_in_]
-        torque = [Q_(x, 'inch lbf') for x in torque_]
+        diam_in_ = [x[0] for x in arr]
+        torque_ = [x[columns[column]] for x in arr]
 
-        # print(diam_in)
-        v = None
-        if diam < diam_in[0]:
-            v = torque[0]
-        elif diam >= diam_in[-1]:
-            v = torque[-1]
-        else:
-            if fit:
-                import numpy.polynomial.polynomial as poly
-                deg = 4
-                coef, (residuals, rank, singular_values, rcond) = poly.polyfit(diam_in_, torque_, deg, full=True)
-                # print(coef, residuals[0])
-                # Convert to inches, which are the units of the regressed source data. Then select magnitude of
-                # measurement, else the calculated values will be in terms of [inch]^rank, the rank of the
-                # fitted polynomial. Finally, add units in/turn to calculated ipr value.
-                v = Q_(poly.polyval(diam.to('inch').magnitude, coef), 'inch lbf')
-            else:
-                for i in range(len(diam_in) - 1):
-                    # print(i, diam_in[i], diam_in[i+1])
-                    if diam_in[i] <= diam <= diam_in[i + 1]:
-                        x = diam
-                        x1, x2 = diam_in[i:i + 2]
-                        y1, y2 = torque[i:i + 2]
-                        y = (x - x1) / (x2 - x1) * (y2 - y1) + y1
-                        v = y
-                        break
+        v = Q_(_table_lookup(diam.m_as('inch'), diam_in_, torque_, fit, 'tap_torque'), 'inch lbf')
         return v.to('newton meter')
 
     def torque(self, stock_material, fit=True):
@@ -745,7 +708,7 @@ class Tap(Tool):
         return self.speed(stock_material)
 
     @classmethod
-    def plot_torque(cls, stock_material, highlight=None, min_diam=0, max_diam=2.5, title=None):
+    def plot_torque(cls, stock_material, highlight=None, min_diam=0, max_diam=2.5, title=None, ax=None):
         if title is None:
             title = 'Required Torque'
 
@@ -758,21 +721,24 @@ class Tap(Tool):
 
         y1 = [f(x_, False).magnitude for x_ in x]
         y2 = [f(x_, True).magnitude for x_ in x]
-        pylab.title(title, fontsize=16.)
-        pylab.xlabel('tap size [in]')
-        # pylab.ylabel('torque [in lbs]')
-        # pylab.ylabel('torque [in lbf]')
-        pylab.ylabel('torque [N m]')
-        pylab.xlim(min_diam, max_diam)
-        pylab.plot(x, y1, label='linear regression')
-        pylab.plot(x, y2, label='polynomial regression')
+        ax_ = pylab.gca() if ax is None else ax
+        ax_.set_title(title, fontsize=16.)
+        ax_.set_xlabel('tap size [in]')
+        # ax_.set_ylabel('torque [in lbs]')
+        # ax_.set_ylabel('torque [in lbf]')
+        ax_.set_ylabel('torque [N m]')
+        ax_.set_xlim(min_diam, max_diam)
+        ax_.plot(x.m_as('inch'), y1, label='linear interpolation')
+        ax_.plot(x.m_as('inch'), y2, label='fitted curve')
         if highlight is not None:
             if not (isinstance(highlight, list) or isinstance(highlight, tuple)):
                 highlight = [highlight]
             for v in highlight:
                 v = v.to('newton meter').magnitude
-                pylab.axhline(y=v, color='#ff3333ee', label=f'torque = {v:.1f}')
-        pylab.yscale('log')
-        pylab.ylim(bottom=0)
-        pylab.legend()
+                ax_.axhline(y=v, color='#ff3333ee', label=f'torque = {v:.1f}')
+        ax_.set_yscale('log')
+        ax_.set_ylim(bottom=0)
+        ax_.legend()
+        if ax is not None:
+            return ax
         pylab.show()
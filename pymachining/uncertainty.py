@@ -0,0 +1,323 @@
+import abc
+
+import numpy as np
+
+from .base import *
+from .units import *
+from .machines import *
+from .materials import *
+from .operations import *
+from .tool_materials import *
+from .tools import *
+
+# Monte Carlo propagation of parameter uncertainty through the drilling calculations.
+#
+# The material tables give ranges (specific cutting energy, SFM, feed ± 25%) that the rest of
+# the package collapses to a single value, and the machine torque curves are estimates. Here
+# each uncertain parameter is a distribution, and samples are pushed through the spindle speed,
+# net power, torque and thrust calculations as arrays, one chunk at a time. Memory is bounded
+# by the chunk size: exceedance counts and moments are accumulated exactly over all samples,
+# while percentiles are estimated from a fixed-size uniform subsample of every sample drawn.
+
+
+class UncertaintyUnknownParameter(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+class Distribution(PyMachiningBase, abc.ABC):
+    # Distribution of a quantity. Samples are magnitudes in self.units.
+    def __init__(self, units):
+        PyMachiningBase.__init__(self)
+        self.units = units
+
+    @abc.abstractmethod
+    def sample(self, rng, n):
+        pass
+
+    def sample_as(self, rng, n, units):
+        return Q_(self.sample(rng, n), self.units).m_as(units)
+
+
+class Fixed(Distribution):
+    def __init__(self, value, units=''):
+        Distribution.__init__(self, units)
+        if isinstance(value, ureg.Quantity):
+            self.units = str(value.units)
+            value = value.magnitude
+        self.value = float(value)
+
+    def sample(self, rng, n):
+        return np.full(n, self.value)
+
+
+class Uniform(Distribution):
+    def __init__(self, low, high, units=''):
+        Distribution.__init__(self, units)
+        if isinstance(low, ureg.Quantity):
+            self.units = str(low.units)
+            high = high.m_as(low.units)
+            low = low.magnitude
+        self.low = float(low)
+        self.high = float(high)
+
+    @classmethod
+    def from_range(cls, value_range):
+        # From a [low, high] Quantity, e.g., MaterialType.specific_cutting_energy_range
+        return cls(value_range[0], value_range[1])
+
+    def sample(self, rng, n):
+        return rng.uniform(self.low, self.high, n)
+
+
+class Triangular(Distribution):
+    def __init__(self, low, mode, high, units=''):
+        Distribution.__init__(self, units)
+        if isinstance(low, ureg.Quantity):
+            self.units = str(low.units)
+            mode = mode.m_as(low.units)
+            high = high.m_as(low.units)
+            low = low.magnitude
+        self.low = float(low)
+        self.mode = float(mode)
+        self.high = float(high)
+
+    def sample(self, rng, n):
+        if self.low == self.high:
+            return np.full(n, self.low)
+        return rng.triangular(self.low, self.mode, self.high, n)
+
+
+class Normal(Distribution):
+    # Normal distribution, optionally truncated to [low, high] by resampling
+    def __init__(self, mean, std, units='', low=-np.inf, high=np.inf):
+        Distribution.__init__(self, units)
+        if isinstance(mean, ureg.Quantity):
+            self.units = str(mean.units)
+            std = std.m_as(mean.units)
+            low = low.m_as(mean.units) if isinstance(low, ureg.Quantity) else low
+            high = high.m_as(mean.units) if isinstance(high, ureg.Quantity) else high
+            mean = mean.magnitude
+        self.mean = float(mean)
+        self.std = float(std)
+        self.low = float(low)
+        self.high = float(high)
+
+    def sample(self, rng, n):
+        x = rng.normal(self.mean, self.std, n)
+        bad = (x < self.low) | (x > self.high)
+        while np.any(bad):
+            x[bad] = rng.normal(self.mean, self.std, np.count_nonzero(bad))
+            bad = (x < self.low) | (x > self.high)
+        return x
+
+
+# Parameters of DrillingMonteCarlo and the units they are evaluated in
+parameter_units = {
+    'specific_cutting_energy': 'kilowatt / (cm ** 3 / min)',
+    'sfm': 'feet tpm',
+    # Multiplier on the table feed
+    'feed_scale': '',
+    # Multiplier on the machine's torque curves
+    'torque_scale': '',
+    # Multiplier on the thrust from DrillHSS.thrust2, whose specific cutting force is for aluminum
+    'thrust_scale': '',
+    'efficiency': '',
+    'idle_power': 'watt',
+}
+
+# Outputs of DrillingMonteCarlo and their units
+output_units = {
+    'spindle_rpm': 'tpm',
+    'feed': 'inch / turn',
+    'net_power': 'watt',
+    'power_available': 'watt',
+    'torque': 'newton meter',
+    'thrust': 'lbs',
+}
+
+
+def default_distributions(stock_material, tool_material, machine):
+    # Distributions from the ranges published with the material tables; the machine is taken
+    # as specified.
+    return {
+        'specific_cutting_energy': Uniform.from_range(stock_material.specific_cutting_energy_range),
+        'sfm': Uniform.from_range(stock_material.sfm_range(tool_material)),
+        # The IPR chart is given as ± 25%
+        'feed_scale': Uniform(.75, 1.25),
+        'torque_scale': Fixed(1.),
+        'thrust_scale': Fixed(1.),
+        'efficiency': Fixed(machine.efficiency),
+        'idle_power': Fixed(machine.idle_power),
+    }
+
+
+class _Subsample:
+    # Fixed-size uniform random subsample of a stream of rows: each row gets a random key and
+    # the rows with the smallest keys are kept.
+    def __init__(self, size, columns):
+        self.size = size
+        self.keys = np.empty(0)
+        self.values = {k: np.empty(0) for k in columns}
+
+    def add(self, rng, values):
+        n = len(next(iter(values.values())))
+        keys = np.concatenate([self.keys, rng.random(n)])
+        merged = {k: np.concatenate([self.values[k], v]) for k, v in values.items()}
+        if len(keys) > self.size:
+            keep = np.argpartition(keys, self.size)[:self.size]
+            keys = keys[keep]
+            merged = {k: v[keep] for k, v in merged.items()}
+        self.keys = keys
+        self.values = merged
+
+
+class MonteCarloResult(PyMachiningBase):
+    def __init__(self, n, sums, sums_sq, exceed_counts, subsample):
+        PyMachiningBase.__init__(self)
+        self.n = n
+        self._sums = sums
+        self._sums_sq = sums_sq
+        self._exceed_counts = exceed_counts
+        self._subsample = subsample
+
+    def mean(self, name):
+        return Q_(self._sums[name] / self.n, output_units[name])
+
+    def std(self, name):
+        m = self._sums[name] / self.n
+        var = max(self._sums_sq[name] / self.n - m * m, 0.)
+        return Q_(np.sqrt(var), output_units[name])
+
+    def percentiles(self, name, q=(5, 50, 95)):
+        return Q_(np.percentile(self._subsample[name], q), output_units[name])
+
+    def probability(self, limit):
+        # Fraction of samples exceeding a limit: 'power', 'torque', 'thrust' or 'any'
+        return self._exceed_counts[limit] / self.n
+
+    def summary(self, q=(5, 50, 95)):
+        lines = []
+        for name in output_units:
+            p = ', '.join(f'p{q_}={v:.4g~P}' for q_, v in zip(q, self.percentiles(name, q)))
+            lines.append(f'{name}: mean={self.mean(name):.4g~P} {p}')
+        for limit in ['power', 'torque', 'thrust', 'any']:
+            lines.append(f'P(exceeds {limit}) = {self.probability(limit):.4g}')
+        return '\n'.join(lines)
+
+
+class DrillingMonteCarlo(PyMachiningBase):
+    """
+    Monte Carlo model of drilling one hole size on a machine.
+
+    Per sample: the spindle speed from a sampled SFM, clamped to the machine's speed range;
+    the feed from the material table times a sampled scale; net power from a sampled specific
+    cutting energy; and the available power from the machine's continuous (or intermittent)
+    torque curve times a sampled scale, with sampled efficiency and idle power. A sample
+    exceeds the machine's limits if net power exceeds the available power, the cutting torque
+    exceeds the available torque, or thrust exceeds max_feed_force. The power and torque limits
+    are counted separately: they agree only with an efficiency of 1 and no idle power, since the
+    available power includes the machine's losses.
+    """
+
+    def __init__(self, machine, stock_material, drill, distributions=None, intermittent=False):
+        PyMachiningBase.__init__(self)
+        self.machine = machine
+        self.stock_material = stock_material
+        self.drill = drill
+        self.intermittent = intermittent
+        self.distributions = default_distributions(stock_material, drill.tool_material, machine)
+        for name, dist in (distributions or {}).items():
+            if name not in parameter_units:
+                raise UncertaintyUnknownParameter(name)
+            self.distributions[name] = dist
+
+        # Values that do not depend on the sampled parameters
+        self._diameter = drill.diameter.m_as('inch')
+        self._table_feed = drill.feed_rate(stock_material).m_as('inch / turn')
+        self._max_thrust = machine.max_feed_force.m_as('lbs')
+
+    def _sample(self, rng, n):
+        return {name: dist.sample_as(rng, n, parameter_units[name]) for name, dist in self.distributions.items()}
+
+    def evaluate(self, samples):
+        """
+        Outputs for a dict of parameter samples, as magnitudes in output_units.
+
+        :param samples: dict from parameter names to arrays of magnitudes in parameter_units
+        :return: dict from output names to arrays
+        """
+        D = self._diameter
+        n = len(samples['sfm'])
+
+        # n = v / (π D); feet tpm / inch
+        rpm = samples['sfm'] * 12. / (np.pi * D)
+        rpm = np.clip(rpm, self.machine.min_rpm.m_as('tpm'), self.machine.max_rpm.m_as('tpm'))
+        rpm_q = Q_(rpm, 'tpm')
+
+        feed = self._table_feed * samples['feed_scale']
+
+        # P = π (D / 2)^2 f n u_s
+        mrr = Q_(np.pi * (D / 2.) ** 2 * feed * rpm, 'inch ** 3 / min')
+        u_s = Q_(samples['specific_cutting_energy'], parameter_units['specific_cutting_energy'])
+        net_power = (mrr * u_s).m_as('watt')
+        torque = DrillOp.torque_(Q_(net_power, 'watt'), rpm_q).m_as('newton meter')
+
+        if self.intermittent:
+            torque_available = self.machine.torque_intermittent(rpm_q)
+        else:
+            torque_available = self.machine.torque_continuous(rpm_q)
+        torque_available = torque_available.m_as('newton meter') * samples['torque_scale']
+        power_available = (Q_(torque_available, 'newton meter') * rpm_q).m_as('watt') / samples['efficiency'] \
+            + samples['idle_power']
+
+        thrust = self.drill.thrust2(self.stock_material, Q_(feed, 'inch / turn')).m_as('lbs') * samples['thrust_scale']
+
+        return {
+            'spindle_rpm': rpm,
+            'feed': np.broadcast_to(feed, (n,)),
+            'net_power': net_power,
+            'power_available': power_available,
+            'torque': torque,
+            'thrust': thrust,
+            'torque_available': torque_available,
+        }
+
+    def run(self, n_samples=1000000, chunk_size=100000, seed=None, subsample_size=100000):
+        """
+        Draw n_samples samples, chunk_size at a time.
+
+        :param n_samples:
+        :param chunk_size: samples evaluated at once, which bounds the memory used
+        :param seed: seed for numpy.random.default_rng
+        :param subsample_size: number of samples kept for estimating percentiles
+        :return: MonteCarloResult
+        """
+        rng = np.random.default_rng(seed)
+        sums = {k: 0. for k in output_units}
+        sums_sq = {k: 0. for k in output_units}
+        exceed_counts = {k: 0 for k in ['power', 'torque', 'thrust', 'any']}
+        subsample = _Subsample(subsample_size, output_units)
+
+        done = 0
+        while done < n_samples:
+            n = min(chunk_size, n_samples - done)
+            out = self.evaluate(self._sample(rng, n))
+
+            for k in output_units:
+                sums[k] += float(np.sum(out[k]))
+                sums_sq[k] += float(np.sum(np.square(out[k])))
+
+            power = out['net_power'] > out['power_available']
+            torque = out['torque'] > out['torque_available']
+            thrust = out['thrust'] > self._max_thrust
+            exceed_counts['power'] += int(np.count_nonzero(power))
+            exceed_counts['torque'] += int(np.count_nonzero(torque))
+            exceed_counts['thrust'] += int(np.count_nonzero(thrust))
+            exceed_counts['any'] += int(np.count_nonzero(power | torque | thrust))
+
+            subsample.add(rng, {k: out[k] for k in output_units})
+            done += n
+
+        return MonteCarloResult(done, sums, sums_sq, exceed_counts, subsample.values)
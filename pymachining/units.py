@@ -1,5 +1,12 @@
+import hashlib
+import os
+import threading
+import warnings
+
 import pint
 
+from .base import *
+
 # Units defined in Pint are browsable at
 # https://github.com/hgrecco/pint/blob/master/pint/default_en.txt
 
@@ -10,39 +17,109 @@ import pint
 # TODO Added testcases verifying expected units and values.
 #
 
-# ureg = None
-# Q_ = None
+# There is a single UnitRegistry per process. Every module imports ureg and Q_ with
+# "from .units import *", and module level quantities (tables, defaults) are created when the
+# modules are imported, so the registry cannot be swapped afterwards without some modules
+# holding quantities of the old one; Pint refuses to mix quantities of two registries. The
+# registry is therefore created once here and registered as Pint's application registry, so
+# pint.get_application_registry() and unpickled quantities use it. Applications that need
+# their own quantities to interoperate with pymachining should use pymachining.ureg (or the
+# application registry) rather than creating another UnitRegistry.
+#
+# After the definitions below the registry is only read, which is safe from many threads.
+# Anything that would change it (define) goes through _registry_lock.
 
-ureg = pint.UnitRegistry(auto_reduce_dimensions=False, autoconvert_offset_to_baseunit=False)
-# ureg.rpm is already defined as [revolution/minute] = [2Pi/minute]
-# To avoid error prone scaling by 2Pi, define [tpm] = [1 turn/minute]
-# (but one turn = 2Pi..., I think a lot the problems with the definition of turn came from 
-# auto_reduce_dimensions=True and turn, or radian in particular, being dimensionless. Tpm
-# can problem be replaced now with Pint's RPM.)
+_registry_lock = threading.RLock()
+
+
+class UnitRegistryMismatch(PyMachiningException):
+    def __init__(self, s=''):
+        PyMachiningException.__init__(self)
+        self.description = s
+
+
+_unit_definitions = [('tpm', 'tpm = turn / minute'), ('tps', 'tps = turn / second')]
+
+
+def _define_units(ureg_):
+    # ureg.rpm is already defined as [revolution/minute] = [2Pi/minute]
+    # To avoid error prone scaling by 2Pi, define [tpm] = [1 turn/minute]
+    # (but one turn = 2Pi..., I think a lot the problems with the definition of turn came from
+    # auto_reduce_dimensions=True and turn, or radian in particular, being dimensionless. Tpm
+    # can problem be replaced now with Pint's RPM.)
+    # Definitions are skipped if present, so this may be called more than once.
+    with _registry_lock:
+        for name, definition in _unit_definitions:
+            if name not in ureg_:
+                ureg_.define(definition)
+        # ureg.define('tpm = turn / minute / (2 * π)')
+        # ureg.define('tps = turn / second / (2 * π)')
 
-ureg.define('tpm = turn / minute')
-ureg.define('tps = turn / second')
-# ureg.define('tpm = turn / minute / (2 * π)')
-# ureg.define('tps = turn / second / (2 * π)')
-Q_ = ureg.Quantity
 
+# Building the registry parses Pint's default definitions, which is most of the cost of
+# importing pymachining beyond importing Pint itself. Pint can cache the parsed definitions on
+# disk, so the registry is built with a cache folder keyed by the Pint version and the
+# definitions above. The folder is under the user's cache directory, or under the directory in
+# the PYMACHINING_UNIT_CACHE environment variable; setting the variable to an empty string
+# disables the cache. The registry is not created lazily: the ureg.check decorators and the
+# module level tables and defaults of the other modules use it while the package is imported.
+
+def unit_cache_folder():
+    folder = os.environ.get('PYMACHINING_UNIT_CACHE')
+    if folder == '':
+        return None
+    if folder is None:
+        try:
+            import platformdirs
+        except ImportError:
+            return None
+        folder = platformdirs.user_cache_dir('pymachining')
+    key = hashlib.sha1('\n'.join([pint.__version__] + [d for _, d in _unit_definitions]).encode()).hexdigest()[:12]
+    return os.path.join(folder, f'pint-{pint.__version__}-{key}')
+
+
+def _create_registry():
+    kwargs = dict(auto_reduce_dimensions=False, autoconvert_offset_to_baseunit=False)
+    folder = unit_cache_folder()
+    if folder is not None:
+        try:
+            return pint.UnitRegistry(cache_folder=folder, **kwargs)
+        except Exception as e:
+            # An unwritable or damaged cache only costs the parsing time
+            warnings.warn(f'not using the unit cache in {folder}: {e}')
+    return pint.UnitRegistry(**kwargs)
+
+
+ureg = _create_registry()
+_define_units(ureg)
+Q_ = ureg.Quantity
+pint.set_application_registry(ureg)
 
-# There must only be a single UnitRegistry per application. These were attempts at that.
-# Much of the problems while using Jupyter, modifying pymachining, and whatever auto_reload was doing.# def createUreg():
-#     ureg = pint.UnitRegistry(auto_reduce_dimensions=False, autoconvert_offset_to_baseunit=False)
-#     return ureg
 
 def setUreg(ureg_):
-    global ureg, Q_
-    ureg = ureg_
-    ureg.define('tpm = turn / minute')
-    ureg.define('tps = turn / second')
-    Q_ = ureg.Quantity
+    """
+    Check that ureg_ is pymachining's registry, or the application registry wrapping it.
+
+    This used to replace the registry, which left the modules holding the old ureg and Q_ and
+    their quantities on the old registry. Use pymachining.ureg instead of creating a registry.
+    """
+    if isinstance(ureg_, pint.ApplicationRegistry):
+        # The application registry is a proxy; compare the registry behind it
+        ureg_ = ureg_.get()
+    if ureg_ is not ureg:
+        raise UnitRegistryMismatch('pymachining uses a single unit registry; use pymachining.ureg or '
+                                   'pint.get_application_registry() instead of another UnitRegistry')
+    _define_units(ureg)
+
+
+def getUreg():
+    return ureg
 
 
 def getQ():
     return Q_
 
+
 # But turn is also defined in terms of radians
 # From default_en.txt:
 #   radian = [] = rad
@@ -149,6 +149,1269 @@ def test_tap(m, stock_material):
     pm.Tap.plot_torque(stock_material, title=title, highlight=m.torque_range())
     pm.Tap.plot_torque(stock_material, title=title, highlight=m.torque_range(), min_diam=0, max_diam=.75)
 
+    taps = [pm.Tap(Q_(x, 'inch'), pitch=Q_(1 / 20., 'inch / turn')) for x in [.19, .25, 5 / 16., 3 / 8., 1 / 2.]]
+    op = pm.TapOp.from_taps(taps, stock_material)
+    ok, required, available = op.check(m)
+    for tap, ok_, req, av, rpm in zip(taps, ok, required, available, op.max_safe_rpm(m)):
+        print(f'{tap.diameter:.4f~P} required {req:.2f~P} available {av:.2f~P} ok {ok_} max safe rpm {rpm:.0f~P}')
+
+
+# Regression tests. Each checks a behavior with asserts and needs no arguments, or has defaults
+# for them; run them all with regression_tests(), or "python tests.py check".
+
+
+def test_evaluate_tool_library():
+    stock_material = pm.MaterialAluminum()
+    m = pm.MachinePM25MV()
+    tools = [pm.DrillHSSJobber(Q_(.25, 'inch')), pm.Tap(Q_(.25, 'inch'), pitch=Q_(1 / 20., 'inch / turn')),
+             pm.DrillHSSStub(Q_(6, 'mm')), pm.DrillHSSJobber(Q_(.5, 'inch'))]
+    rpm, feed = pm.evaluate_tool_library(tools, stock_material, m)
+    for tool, rpm_, feed_ in zip(tools, rpm, feed):
+        if isinstance(tool, pm.Tap):
+            assert abs(feed_.m_as('inch / turn') - 1 / 20.) < 1e-12
+            sfm = tool.sfm(stock_material)
+        else:
+            assert abs((feed_ - tool.feed_rate(stock_material)).m_as('inch / turn')) < 1e-12
+            sfm = stock_material.sfm(tool.tool_material)
+        expected, _ = m.clamp_speed(pm.DrillOp.rrpm_(tool.diameter, sfm))
+        assert abs((rpm_ - expected).m_as('tpm')) < 1e-9
+    try:
+        pm.evaluate_tool_library([pm.Tool(Q_(.25, 'inch'), pm.ToolMaterialHSS())], stock_material)
+        assert False, 'expected FusionLibraryError'
+    except pm.FusionLibraryError:
+        pass
+
+
+def test_fusion_export():
+    import json
+    import os
+    import tempfile
+
+    m = pm.MachinePM25MV()
+    stock_material = pm.MaterialAluminum()
+    tools = [pm.DrillHSSJobber(Q_(x, 'inch')) for x in np.arange(1, 33) / 64.]
+    tools += [pm.DrillHSSStub(Q_(x, 'mm')) for x in np.arange(1, 13.5, .5)]
+    tools += [pm.Tap(Q_(.25, 'inch'), pitch=Q_(1 / 20., 'inch / turn'))]
+
+    with tempfile.TemporaryDirectory() as folder:
+        fn = os.path.join(folder, 'tool_library.json')
+        assert pm.export_fusion_tool_library(tools, stock_material, m, fn) == len(tools)
+        with open(fn) as f:
+            entries = json.load(f)['data']
+        tools2 = pm.import_fusion_tool_library(fn)
+    assert len(entries) == len(tools2) == len(tools)
+
+    for t1, t2, entry in zip(tools, tools2, entries):
+        assert type(t1) == type(t2)
+        assert abs(t1.diameter - t2.diameter).m_as('mm') < 1e-9
+        # Presets are in the library's unit, inches
+        preset = entry['start-values']['presets'][0]
+        if isinstance(t1, pm.Tap):
+            feed = t1.pitch
+            sfm = t1.sfm(stock_material)
+        else:
+            feed = t1.feed_rate(stock_material)
+            sfm = stock_material.sfm(t1.tool_material)
+        rpm, _ = m.clamp_speed(pm.DrillOp.rrpm_(t1.diameter, sfm))
+        assert abs(preset['n'] - rpm.m_as('tpm')) < 1e-9
+        assert abs(preset['f_n'] - feed.m_as('inch / turn')) < 1e-12
+        assert abs(preset['v_f'] - (feed * rpm).m_as('inch / minute')) < 1e-9
+    assert abs(tools2[-1].pitch - tools[-1].pitch).m_as('inch / turn') < 1e-12
+
+
+def test_job_graph_recompute():
+    # Changing an input recomputes only the nodes depending on it
+    m = pm.MachinePM25MV()
+    drills = [pm.DrillHSSJobber(Q_(x, 'inch')) for x in [.125, .25, .5]]
+    g = pm.DrillJobGraph(m, pm.MaterialAluminum(), drills)
+    g.get('feasible')
+    before = dict(g.compute_count)
+    assert all(v == 1 for v in before.values())
+
+    g.set_efficiency(.8)
+    g.get('feasible')
+    changed = {k for k in before if g.compute_count[k] != before[k]}
+    assert changed == {'power_available', 'feasible'}, changed
+
+    before = dict(g.compute_count)
+    g.set_specific_cutting_energy(Q_(.05, 'kilowatt / (cm ** 3 / min)'))
+    g.get('feasible')
+    assert {k for k in before if g.compute_count[k] != before[k]} == {'net_power', 'feasible'}
+
+    # The gear ratio input reaches the torque curve without the machine being changed
+    before = dict(g.compute_count)
+    g.set('gear_ratio', 2.)
+    g.get('feasible')
+    assert {k for k in before if g.compute_count[k] != before[k]} == {'torque_available', 'power_available',
+                                                                      'feasible'}
+    assert m.gear_ratio == 1.
+    expected = m.torque_continuous(g['clamped_rpm'], 2.)
+    assert np.allclose(g['torque_available'].m_as('N m'), expected.m_as('N m'))
+    assert not np.allclose(expected.m_as('N m'), m.torque_continuous(g['clamped_rpm']).m_as('N m'))
+
+
+def test_drill_batch():
+    stock_material = pm.MaterialSteelMild()
+    diameter = np.linspace(1., 25., 50)
+    styles = np.where(np.arange(50) % 3 == 0, 'stub', 'jobber')
+    batch = pm.DrillBatch.from_arrays(diameter, styles)
+
+    # Slices are views of the columns; masks share the columns and keep an index
+    s = batch[10:20]
+    assert np.shares_memory(s.column('diameter'), batch.column('diameter'))
+    assert s._columns['diameter'].base is not None
+    w = batch.where(diameter > 10.)
+    assert w._columns is batch._columns and len(w) == np.count_nonzero(diameter > 10.)
+
+    # Batch results match the per-tool drills
+    feed = batch.feed_rate(stock_material).m_as('inch / turn')
+    thrust = batch.thrust(stock_material).m_as('lbs')
+    for i, drill in enumerate(batch.to_tools()):
+        assert type(drill) == (pm.DrillHSSStub if styles[i] == 'stub' else pm.DrillHSSJobber)
+        assert abs(drill.feed_rate(stock_material).m_as('inch / turn') - feed[i]) < 1e-12
+        assert abs(drill.thrust(stock_material).m_as('lbs') - thrust[i]) < 1e-9
+    assert np.allclose(s.feed_rate(stock_material).m_as('inch / turn'), feed[10:20])
+
+    # The tables are for HSS drills
+    mixed = pm.DrillBatch.from_arrays(Q_([5., 6., 7.], 'mm'), tool_material=['hss', 'carbide', 'hss'])
+    feed = mixed.feed_rate(stock_material).m_as('inch / turn')
+    assert np.isnan(feed[1]) and np.all(np.isfinite(feed[[0, 2]]))
+    assert np.isnan(mixed.thrust(stock_material).m[1])
+    assert isinstance(mixed[2], pm.DrillHSSJobber) and abs(mixed[-1].diameter.m_as('mm') - 7.) < 1e-12
+    try:
+        mixed.tool(1)
+        assert False
+    except pm.BatchUnsupportedTool:
+        pass
+
+    # Rows of a filtered batch are read at their index, and taps keep their tool material
+    taps = pm.TapBatch.from_arrays(Q_([5., 6., 8.], 'mm'), Q_([.8, np.nan, 1.25], 'mm / turn'),
+                                   tool_material=['hss', 'carbide', 'carbide']).where([False, True, True])
+    tools = taps.to_tools()
+    assert [t.diameter.m_as('mm') for t in tools] == [6., 8.] and tools[0].pitch is None
+    assert abs(tools[1].pitch.m_as('mm / turn') - 1.25) < 1e-12
+    assert all(isinstance(t.tool_material, pm.ToolMaterialCarbide) for t in tools)
+    w_tools = w.to_tools()
+    assert [t.diameter.m_as('mm') for t in w_tools] == list(diameter[diameter > 10.])
+
+
+def test_spindle_ranges():
+    m = pm.MachinePM25MV_DMMServo()
+    m.add_spindle_range('high', 1.)
+    m.add_spindle_range('low', 3.)
+    high, low = m.get_spindle_ranges()
+    rpm = Q_([100., 1000., 1500., 4000., 6000.], 'tpm')
+    P = Q_([200., 200., 100., 100., 10.], 'watt')
+
+    # A range is the machine's curve at the motor speed, scaled by the gear ratio
+    T = low.torque_continuous(rpm).m_as('newton meter')
+    assert np.allclose(T, m.torque_continuous(rpm * 3., gear_ratio=1.).m_as('newton meter') * 3.)
+    assert low.max_rpm == m.max_rpm / 3.
+
+    # Low speeds go to the low range, speeds above it to the high range, and speeds above
+    # every range have no margin
+    selected, margin = m.select_spindle_range(rpm, P)
+    assert list(selected) == [1, 1, 1, 0, 0]
+    assert margin[-1].m == -np.inf and np.all(np.isfinite(margin[:-1].m))
+    assert abs(margin[1].m_as('watt') - (low.power_continuous(rpm[1]) - P[1]).m_as('watt')) < 1e-9
+
+    assert pm.MachineType.count_range_changes([0, 0, 1, 1, 0, 0]) == 2
+    assert m.count_range_changes([]) == 0
+    selected_, margin_, changes = m.plan_spindle_ranges(rpm, P)
+    assert list(selected_) == list(selected) and changes == 1
+
+    # Ranges follow later changes to the machine
+    before = low.power_continuous(rpm[1]).m_as('watt')
+    m.efficiency = .5
+    m.idle_power = Q_(50., 'watt')
+    assert low.efficiency == .5
+    assert abs(low.power_continuous(rpm[1]).m_as('watt') - (before * 2. + 50.)) < 1e-9
+
+
+def test_max_feed():
+    m = pm.MachinePM25MV_DMMServo()
+    m.max_feed_force = Q_(20., 'lbs')
+    stock_material = pm.Material('steel-mild')
+    rpm = Q_(1000., 'tpm')
+
+    # A single drill is a batch of one, the same as that diameter in an array
+    drills = pm.DrillHSSJobber(Q_(np.linspace(1., 25., 40), 'mm'))
+    feed, limit = pm.max_feed(drills, rpm, stock_material, m)
+    feed1, limit1 = pm.max_feed(pm.DrillHSSJobber(drills.diameter[10]), rpm, stock_material, m)
+    assert feed1.shape == (1,) and abs(feed1[0].m - feed[10].m) < 1e-15 and limit1[0] == limit[10]
+    feed_list, _ = pm.max_feed([pm.DrillHSSJobber(d) for d in drills.diameter[:3]], rpm, stock_material, m)
+    assert np.allclose(feed_list.m, feed[:3].m, rtol=1e-15, atol=0.)
+
+    # Every limit binds for some drill, and bisection finds the closed form limits to within
+    # its resolution, 50 halvings of the search interval
+    assert set(limit) == set(pm.feed_limit_names)
+    feed_b, limit_b = pm.max_feed(drills, rpm, stock_material, m, method='bisect')
+    assert np.all(limit_b == limit)
+    assert np.allclose(feed_b.m, feed.m, rtol=1e-9, atol=0.)
+
+    # The power rating is an input power: at a power limited feed, the power drawn with the
+    # machine's losses, net power / efficiency + idle_power, is the rating
+    m.efficiency = .8
+    m.idle_power = Q_(100., 'watt')
+    feed, limit = pm.max_feed(drills, rpm, stock_material, m)
+    power = limit == 'power'
+    assert np.any(power)
+    net = pm.DrillOp.net_power_(drills.diameter, feed, rpm, stock_material.specific_cutting_energy).m_as('watt')
+    drawn = net / m.efficiency + m.idle_power.m_as('watt')
+    assert np.allclose(drawn[power], m.power_continuous(rpm).m_as('watt'), rtol=1e-12, atol=0.)
+    assert np.all(drawn <= m.power_continuous(rpm).m_as('watt') * (1. + 1e-12))
+    feed_b, limit_b = pm.max_feed(drills, rpm, stock_material, m, method='bisect')
+    assert np.all(limit_b == limit) and np.allclose(feed_b.m, feed.m, rtol=1e-9, atol=0.)
+
+
+def test_monte_carlo_exceedance():
+    import pymachining.uncertainty as unc
+
+    try:
+        unc.Distribution('')
+        assert False
+    except TypeError:
+        pass
+
+    m = pm.MachinePM25MV_DMMServo()
+    m.efficiency = .8
+    m.idle_power = Q_(50., 'watt')
+    m.max_feed_force = Q_(1e6, 'lbs')
+    stock_material = pm.MaterialSteelMild()
+    drill = pm.DrillHSSJobber(Q_(10., 'mm'))
+    mc = pm.DrillingMonteCarlo(m, stock_material, drill, {'sfm': unc.Fixed(Q_(60., 'feet tpm')),
+                                                          'feed_scale': unc.Fixed(1.)})
+
+    # With only the specific cutting energy uncertain, net power and torque are proportional to
+    # it, so each limit is exceeded above a threshold energy
+    one = {k: np.ones(1) for k in unc.parameter_units}
+    one.update(sfm=np.array([60.]), efficiency=np.array([.8]), idle_power=np.array([50.]))
+    out = mc.evaluate(one)
+    u_power = out['power_available'][0] / out['net_power'][0]
+    u_torque = out['torque_available'][0] / out['torque'][0]
+    assert u_torque < u_power
+
+    high = 1.5 * u_power
+    mc.distributions['specific_cutting_energy'] = unc.Uniform(0., high, unc.parameter_units['specific_cutting_energy'])
+    r = mc.run(200000, chunk_size=30000, seed=1, subsample_size=1000)
+    assert abs(r.probability('power') - (1. - u_power / high)) < .005
+    assert abs(r.probability('torque') - (1. - u_torque / high)) < .005
+    assert r.probability('thrust') == 0. and r.probability('any') == r.probability('torque')
+
+    # The same seed gives the same samples
+    r2 = mc.run(200000, chunk_size=30000, seed=1, subsample_size=1000)
+    assert r2._exceed_counts == r._exceed_counts and r2.mean('net_power') == r.mean('net_power')
+
+
+def test_interval_bounds():
+    m = pm.MachinePM25MV_DMMServo()
+    stock_material = pm.MaterialSteelMild()
+    drill = pm.DrillHSSJobber(Q_(np.linspace(2., 20., 10), 'mm'))
+    b = pm.DrillOpBounds(drill, stock_material, m)
+    check = b.check()
+    D = drill.diameter
+    rng = np.random.default_rng(0)
+
+    def within(x, interval, units):
+        lo, hi = interval.m_as(units)
+        x = x.m_as(units)
+        return np.all((lo * (1. - 1e-12) <= x) & (x <= hi * (1. + 1e-12)))
+
+    # Point results for inputs drawn from the input intervals lie within the bounds
+    for _ in range(50):
+        u = Q_(rng.uniform(*b.specific_cutting_energy.m_as('watt minute / cm ** 3')), 'watt minute / cm ** 3')
+        sfm = Q_(rng.uniform(*b.sfm.m_as('feet tpm')), 'feet tpm')
+        f = Q_(rng.uniform(*b.feed.m_as('inch / turn')), 'inch / turn')
+        rpm = m.clamp_speed(pm.DrillOp.rrpm_(D, sfm))[0]
+        P = pm.DrillOp.net_power_(D, f, rpm, u)
+        assert within(rpm, b.spindle_rpm, 'tpm')
+        assert within(pm.DrillOp.metal_removal_rate_(D, f, rpm), b.metal_removal_rate, 'cm ** 3 / min')
+        assert within(P, b.net_power, 'watt')
+        assert within(pm.DrillOp.torque_(P, rpm), b.torque, 'newton meter')
+        assert within(drill.thrust2(stock_material, f), b.thrust, 'lbs')
+        available = m.power_continuous(rpm)
+        assert within(available, b.power_available, 'watt')
+        # 'ok' and 'exceeds' hold for every point
+        assert np.all((P <= available)[check == 'ok'])
+        assert np.all((P > available)[check == 'exceeds'])
+    assert set(check) == {'ok', 'maybe', 'exceeds'}
+
+
+def test_calibration():
+    m = pm.MachinePM25MV_DMMServo()
+    m.efficiency = .8
+    m.idle_power = Q_(100., 'watt')
+    u_s = .03  # kW / (cm^3 / min)
+    rng = np.random.default_rng(0)
+    n = 20000
+    D = rng.uniform(2., 20., n)
+    f = rng.uniform(.02, .2, n)
+    rpm = rng.uniform(200., 3000., n)
+    Q = np.pi * (D / 2.) ** 2 * f * rpm * 1e-3
+    measured = (u_s * Q / m.efficiency) * 1e3 + 100.
+
+    # Without noise the coefficient is recovered exactly, in chunks or record by record
+    cal = pm.SpecificCuttingEnergyCalibration(m)
+    cal.add_arrays('exact', D[:7000], rpm[:7000], f[:7000], measured[:7000])
+    cal.add_arrays(np.full(n - 7000, 'exact'), D[7000:], rpm[7000:], f[7000:], measured[7000:])
+    for i in range(50):
+        cal.add(Q_(D[i], 'mm'), 'records', Q_(rpm[i], 'tpm'), Q_(f[i], 'mm / turn'), Q_(measured[i], 'watt'))
+    for key in ['exact', 'records']:
+        assert abs(cal.estimate(key).specific_cutting_energy.m_as('kilowatt / (cm ** 3 / min)') - u_s) < 1e-12
+
+    # With noise, the estimate and its confidence interval bracket the coefficient
+    noisy = measured + rng.normal(0., 20., n)
+    cal.add_arrays('noisy', D, rpm, f, noisy)
+    e = cal.estimate('noisy')
+    low, high = (x.m_as('kilowatt / (cm ** 3 / min)') for x in e.interval)
+    assert e.n == n and low < u_s < high and high - low < 1e-3
+
+    try:
+        cal.estimate('unknown')
+        assert False
+    except pm.CalibrationNoData:
+        pass
+
+
+def test_segment_chunks():
+    import os
+    import tempfile
+
+    # Cutting events of random lengths with noise around the thresholds
+    rng = np.random.default_rng(0)
+    n = 5000
+    level = np.zeros(n)
+    for start in rng.choice(n, 40, replace=False):
+        level[start:start + rng.integers(1, 200)] = rng.uniform(300., 600.)
+    power = 100. + level + rng.normal(0., 30., n)
+    time = np.arange(n) / 1000.
+    rpm = np.where(level > 0, 1500., 0.) + rng.normal(0., 5., n)
+
+    # Reference: the hysteresis one sample at a time
+    state = False
+    active = np.zeros(n, dtype=bool)
+    p32 = power.astype(np.float32).astype(float)
+    for i in range(n):
+        state = p32[i] >= 200. or (state and p32[i] >= 150.)
+        active[i] = state
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], active.astype(int), [0]])))
+    starts, stops = edges[::2], edges[1::2]
+
+    with tempfile.TemporaryDirectory() as folder:
+        fn = os.path.join(folder, 'log.bin')
+        pm.write_spindle_log(fn, time, rpm, power)
+        log = pm.open_spindle_log(fn)
+        expected = pm.segment_cutting_events(log, 200., 150.)
+        assert list(expected['start']) == list(starts) and list(expected['stop']) == list(stops)
+        assert np.allclose(expected['mean_power'], [p32[a:b].mean() for a, b in zip(starts, stops)])
+        # Events split across chunks, down to one record per chunk, are joined
+        for chunk_size in [997, 64, 7, 1]:
+            segments = pm.segment_cutting_events(log, 200., 150., chunk_size=chunk_size)
+            for k in ['start', 'stop', 't_start', 't_stop', 'max_power']:
+                assert np.array_equal(segments[k], expected[k])
+            for k in ['mean_power', 'mean_rpm']:
+                assert np.allclose(segments[k], expected[k], rtol=1e-12, atol=0.)
+        del log
+
+
+def test_taylor_optimum():
+    stock_material = pm.MaterialSteelMild()
+    drill = pm.DrillHSSJobber(Q_(.25, 'inch'))
+    tl = pm.taylor_tool_life(drill.tool_material, stock_material)
+    feed = drill.feed_rate(stock_material)
+    sfm0 = stock_material.sfm_range(drill.tool_material)[0].m_as('feet tpm')
+    rate, tool_cost, t_x = 60., 2., 1.
+
+    # At a fixed feed, cost per hole is least at the tool life (1 / n - 1) (t_x + tool_cost / rate)
+    # and time per hole at (1 / n - 1) t_x; each optimum speed is put on the grid between others
+    for objective, life in [('cost', (1. / tl.n - 1.) * (t_x + tool_cost / (rate / 60.))),
+                            ('time', (1. / tl.n - 1.) * t_x)]:
+        v = tl.cutting_speed(Q_(life, 'minute'), feed).m_as('feet tpm')
+        factors = v / sfm0 * np.array([.8, .9, .95, 1., 1.05, 1.1, 1.25])
+        r = pm.optimize_cost_per_hole([drill], [stock_material], Q_(.5, 'inch'), rate, tool_cost, Q_(t_x, 'minute'),
+                                      objective=objective, speed_factors=factors, feed_factors=[1.])
+        assert r.feasible[0, 0]
+        assert abs(r.sfm[0, 0].m_as('feet tpm') - v) < 1e-9 * v
+        assert abs(r.tool_life[0, 0].m_as('minute') - life) < 1e-9 * life
+
+
+def test_cycle_time():
+    m = pm.MachinePM25MV()
+    depth = Q_(.5, 'inch')
+    feed = Q_(5, 'inch / min')
+
+    # Unlimited acceleration, the default: feed 0.6 in at 5 in / min and rapid back at 100 in / min
+    assert np.isinf(m.max_z_accel.m)
+    t = pm.drill_cycle_time(m, depth, feed)
+    assert abs(t[0].m_as('second') - (7.2 + .36)) < 1e-12
+    # A single peck through the whole depth is G81
+    t83 = pm.drill_cycle_time(m, depth, feed, cycle='G83', peck_depth=depth)
+    assert abs(t83[0].m_as('second') - t[0].m_as('second')) < 1e-12
+
+    # Trapezoidal profile: each move adds v / a to its constant-rate time
+    m.max_z_accel = Q_(10., 'inch / s ** 2')
+    v_f, v_z = 5. / 60., 100. / 60.
+    t = pm.drill_cycle_time(m, Q_([.5, .5], 'inch'), feed, dwell=Q_(.5, 'second'))
+    assert np.allclose(t.m_as('second'), 7.56 + v_f / 10. + v_z / 10. + .5, rtol=1e-12, atol=0.)
+    # A move shorter than v^2 / a never reaches its rate
+    assert abs(pm.trapezoid_move_time_(.1, v_z, 10.) - 2. * np.sqrt(.1 / 10.)) < 1e-15
+
+    try:
+        pm.drill_cycle_time(m, depth, feed, cycle='G84')
+        assert False
+    except pm.CycleTimeUnknownCycle:
+        pass
+
+
+def test_feasibility_map_cache():
+    import pymachining.feasibility as feasibility
+
+    m = pm.MachinePM25MV_DMMServo()
+    m.efficiency = .8
+    m.idle_power = Q_(100., 'watt')
+    aluminum = pm.MaterialAluminum()
+    cache = pm.FeasibilityMapCache(max_maps=2)
+    fmap = cache.get(m, aluminum)
+
+    # Queries at the grid points agree with the boolean map and the direct calculation
+    i, j = np.meshgrid(np.arange(0, 256, 15), np.arange(0, 256, 15), indexing='ij')
+    d = Q_(fmap.diameters[i], 'mm')
+    rpm = Q_(fmap.rpms[j], 'tpm')
+    assert np.array_equal(fmap.query(d, rpm), fmap.feasible[i, j])
+    drill = pm.DrillHSSJobber(d)
+    net = pm.DrillOp.net_power_(d, drill.feed_rate(aluminum), rpm, aluminum.specific_cutting_energy)
+    # The rating is an input power, compared with the power drawn
+    direct = (m.power_continuous(rpm) - (net / m.efficiency + m.idle_power)).m_as('watt')
+    assert np.allclose(fmap.margins(d, rpm)[0].m_as('watt'), direct, rtol=1e-5, atol=1e-3)
+
+    # A hit does not sample the torque curves again
+    calls = []
+    fingerprint = feasibility.machine_fingerprint
+    feasibility.machine_fingerprint = lambda machine: calls.append(machine) or fingerprint(machine)
+    try:
+        assert cache.get(m, aluminum) is fmap and calls == [] and cache.builds == 1
+        # A changed machine is a new map, and changing it back finds the old one
+        m.set_gear_ratio(2.)
+        assert cache.get(m, aluminum) is not fmap and len(calls) == 1
+        m.set_gear_ratio(1.)
+        assert cache.get(m, aluminum) is fmap and len(calls) == 2 and cache.builds == 2
+        # A change the attributes do not show needs the fingerprint invalidated
+        m._torque_continuous = lambda abs_rpm, gear_ratio: pm.machines._torque_quantity(abs_rpm.m * 0. + 1.)
+        assert cache.get(m, aluminum) is fmap
+        pm.invalidate_machine_fingerprint(m)
+        assert cache.get(m, aluminum) is not fmap and cache.builds == 3
+    finally:
+        feasibility.machine_fingerprint = fingerprint
+
+    # The least recently used map is dropped beyond max_maps
+    m = pm.MachinePM25MV_DMMServo()
+    cache = pm.FeasibilityMapCache(max_maps=2)
+    maps = [cache.get(m, s) for s in [aluminum, pm.MaterialSteelMild()]]
+    assert cache.get(m, aluminum) is maps[0]
+    cache.get(m, pm.MaterialSteelMedium())
+    assert len(cache) == 2 and cache.builds == 3
+    assert cache.get(m, aluminum) is maps[0] and cache.builds == 3
+    assert cache.get(m, pm.MaterialSteelMild()) is not maps[1] and cache.builds == 4
+
+
+def test_table_fits():
+    try:
+        pm.fitting.TableFit([0., 1.], [0., 1.])
+        assert False
+    except TypeError:
+        pass
+
+    # fit=True is the monotone cubic for every table, not the quartic it used to be
+    for table in ['drill_feed', 'drill_thrust', 'tap_torque']:
+        assert pm.fit_method(True, table) == 'pchip'
+    assert pm.fit_method(False, 'drill_feed') == 'linear'
+    stock_material = pm.MaterialSteelMild()
+    d = Q_(np.linspace(.01, 2.2, 2000), 'inch')
+    feed = pm.DrillHSS(d).feed_rate(stock_material).m_as('inch / turn')
+    row = pm.feed_chart_row(stock_material)
+    assert np.array_equal(feed, pm.feed_chart_rate(row, d, 'pchip').m_as('inch / turn'))
+    assert not np.allclose(feed, pm.feed_chart_rate(row, d, 'poly').m_as('inch / turn'))
+
+    # Every feed chart row, and the thrust and tap torque tables, increase with diameter, and so
+    # do their fits; the quartic does not
+    rows = np.arange(len(pm.feed_chart_rows))
+    for fit, monotone in [(True, True), ('poly', False)]:
+        v = pm.feed_chart_rate(rows[:, None], d[None, :], fit).m_as('inch / turn')
+        assert np.all(np.diff(v, axis=1) >= -1e-15) == monotone
+    assert np.all(np.diff(pm.DrillHSS(d).thrust(stock_material, True).m_as('lbs')) >= -1e-12)
+    assert np.all(np.diff(pm.Tap(d[d.m < 1.]).torque(stock_material, True).m_as('inch lbf')) >= -1e-12)
+
+    # The fits pass through the table
+    x = Q_(pm.feed_chart_diam_in[:-1], 'inch')
+    v = pm.feed_chart_rate(rows[:, None], x[None, :], True).m_as('inch / turn')
+    table = pm.feed_ipr_chart[:, :-1]
+    assert np.allclose(v[~np.isnan(table)], table[~np.isnan(table)], rtol=1e-12, atol=0.)
+
+
+def test_feed_chart():
+    # Rows each material used before the chart was a 2D table: (jobber, stub)
+    old_rows = {pm.MaterialAluminum: ('H', 'I'), pm.MaterialSteelMild: ('F', 'J'), pm.MaterialSteelMedium: ('D', 'E')}
+    assert list(pm.feed_ipr_chart[pm.feed_chart_rows.index('H')]) == \
+        [0.0008, 0.0026, 0.0040, 0.0046, 0.0051, 0.0059, 0.0075, 0.0090, 0.0096, 0.0107, 0.0110, 0.0126,
+         0.0140, 0.0148, 0.0157, 0.0165]
+    materials = [cls() for cls in old_rows]
+    d = np.concatenate([[.01], pm.feed_chart_diam_in, np.linspace(.02, 2.5, 37)])
+    for fit in [True, False, 'poly']:
+        for k, style in enumerate(['jobber', 'stub']):
+            matrix = pm.feed_rate_matrix(materials, Q_(d, 'inch'), style, fit).m_as('inch / turn')
+            for i, mat in enumerate(materials):
+                letter = old_rows[type(mat)][k]
+                assert pm.feed_chart_row(mat, style) == pm.feed_chart_rows.index(letter)
+                table_y = list(pm.feed_ipr_chart[pm.feed_chart_rows.index(letter)])
+                # The old lookup, one diameter at a time
+                old = [pm.tools._table_lookup(x, pm.feed_chart_diam_in, table_y, fit, 'drill_feed') for x in d]
+                assert np.allclose(matrix[i], old, rtol=1e-12, atol=0.)
+                drill = pm.DrillHSSStub(Q_(d[5], 'inch')) if style == 'stub' else pm.DrillHSSJobber(Q_(d[5], 'inch'))
+                assert abs(drill.feed_rate(mat, fit).m_as('inch / turn') - old[5]) < 1e-15
+
+    # Rows shorter than the chart are held at their last value, as a table of that row alone
+    for letter in 'SX':
+        r = pm.feed_chart_rows.index(letter)
+        m = int(np.count_nonzero(~np.isnan(pm.feed_ipr_chart[r])))
+        old = [pm.tools._table_lookup(x, pm.feed_chart_diam_in[:m], list(pm.feed_ipr_chart[r, :m]), True, 'drill_feed')
+               for x in d]
+        assert np.allclose(pm.feed_chart_rate(letter, Q_(d, 'inch')).m_as('inch / turn'), old, rtol=1e-12, atol=0.)
+
+    try:
+        pm.feed_chart_row(pm.MaterialSteelHigh())
+        assert False
+    except pm.ToolIncompatibleMaterial:
+        pass
+
+
+def test_iso_materials():
+    m = pm.MachinePM25MV_DMMServo()
+    a, b = pm.Material('17-4PH'), pm.Material('304')
+    # Materials of different groups with the same specific cutting energy have their own maps and charts
+    assert a.specific_cutting_energy == b.specific_cutting_energy
+    fmap = pm.feasibility_map(m, b)
+    assert pm.feasibility_map(m, a) is not fmap
+    fresh = pm.FeasibilityMap(m, b)
+    for k in ['power_margin', 'thrust_margin', 'feasible']:
+        assert np.array_equal(getattr(fmap, k), getattr(fresh, k))
+    assert pm.ChartTask('feed_rate', 'x', tool_class=pm.DrillHSSJobber, stock_material=a).key != \
+        pm.ChartTask('feed_rate', 'x', tool_class=pm.DrillHSSJobber, stock_material=b).key
+
+    # Unknown alloys are group -1 with nan values
+    c = pm.classify_alloys(['304', 'unobtainium', '304'])
+    assert list(c['known']) == [True, False, True] and c['group'][1] == -1 and c['group'][0] == c['group'][2] >= 0
+    assert c['amg'][1] == '' and c['feed_row_jobber'][1] == -1 and c['feed_row_stub'][1] == -1
+    for k in ['machinability', 'sfm_hss', 'sfm_carbide', 'specific_cutting_energy']:
+        assert np.all(np.isnan(c[k][1]))
+    assert not np.any(np.isnan(c['sfm_hss'][0])) and not np.isnan(c['machinability'][0])
+    f = pm.alloy_feed_rates(['304', 'unobtainium'], Q_([.125, .25], 'inch')).m_as('inch / turn')
+    assert np.all(np.isnan(f[1])) and np.all(f[0] > 0)
+
+    # Taps dispatch on the material's table rows, not its class
+    tap = pm.Tap(Q_(.25, 'inch'))
+    aluminum = pm.Material('6061-T6')
+    assert isinstance(aluminum, pm.IsoMaterial)
+    assert tap.speed(aluminum) == tap.speed(pm.MaterialAluminum())
+    assert tap.torque(aluminum) == tap.torque(pm.MaterialAluminum())
+    assert tap.speed(pm.Material('Ti-6Al-4V')) > 0
+    for mat in [pm.Material('Ti-6Al-4V'), pm.MaterialSteelHigh()]:
+        try:
+            tap.torque(mat)
+            assert False
+        except pm.ToolIncompatibleMaterial as e:
+            assert 'no tapping torques' in e.description
+
+
+def test_best_for_holes():
+    # Six drills of nearly one diameter; given out of order, the catalog sorts them
+    catalog = pm.ToolCatalog.from_arrays(
+        ['F', 'A', 'B', 'C', 'D', 'E', 'G'],
+        Q_([6.05, 6., 6., 6., 6., 6., 8.], 'mm'),
+        flute_length=Q_([40, 30, 15, 30, 30, 30, 50], 'mm'),
+        stock=[100, 0, 5, 2, 5, 5, 1],
+        price=[1., 1., 5., 10., 12., 8., 3.])
+    assert list(catalog.sku) == ['A', 'B', 'C', 'D', 'E', 'F', 'G']
+
+    holes = Q_([6., 6., 6.04, 6.1, 3., 8.], 'mm')
+    depth = Q_([20, 0, 0, 0, 0, 60], 'mm')
+    # A is out of stock and B's flutes are too short; D and E have the most on hand and E is cheaper
+    # 6.04 is nearer F; 6.1 has nothing within undersize 0; G's flutes are too short for 60 mm
+    s = catalog.best_for_holes(holes, depth)
+    assert list(s.sku) == ['E', 'B', 'F', '', '', ''] and list(s.found) == [True, True, True, False, False, False]
+    # Without a depth B is the best at 6 mm; A is as near but has none on hand
+    assert list(catalog.best_for_holes(Q_(6., 'mm')).sku) == ['B']
+    assert list(catalog.best_for_holes(Q_(6., 'mm'), in_stock=False).sku) == ['B']
+    # Undersize lets smaller tools in, the nearest first
+    assert list(catalog.best_for_holes(Q_(6.1, 'mm'), undersize=Q_(.1, 'mm')).sku) == ['F']
+    assert list(catalog.best_for_holes(holes[5:], depth[5:], in_stock=False).sku) == ['']
+    # The chosen tools as a batch, in hole order
+    batch = s.batch()
+    assert np.allclose(batch.diameter.m_as('mm'), [6., 6., 6.05])
+
+
+def test_report_cache():
+    import os
+    import tempfile
+    import pymachining.report as report
+
+    m = pm.MachinePM25MV_DMMServo()
+    tasks = pm.report_tasks([m], [pm.MaterialAluminum(), pm.Material('304')])
+    with tempfile.TemporaryDirectory() as folder:
+        fn = os.path.join(folder, 'report.html')
+        cache = os.path.join(folder, 'charts')
+        r = pm.build_report(fn, tasks, cache_folder=cache, max_workers=0)
+        assert r['rendered'] == len(tasks) == 7 and r['cached'] == 0
+        r = pm.build_report(fn, pm.report_tasks([m], [pm.MaterialAluminum(), pm.Material('304')]),
+                            cache_folder=cache, max_workers=0)
+        assert r['rendered'] == 0 and r['cached'] == 7
+
+        # A changed machine re-renders its torque-speed chart only
+        m.set_gear_ratio(2.)
+        tasks2 = pm.report_tasks([m], [pm.MaterialAluminum(), pm.Material('304')])
+        assert [a.key != b.key for a, b in zip(tasks, tasks2)] == [True] + [False] * 6
+        r = pm.build_report(fn, tasks2, cache_folder=cache, max_workers=0)
+        assert r['rendered'] == 1 and r['cached'] == 6
+
+    # Editing iso_materials.py changes the keys of IsoMaterial charts only
+    iso_fn = os.path.abspath(pm.iso_materials.__file__)
+    keys = [t.key for t in tasks2]
+    saved = report._file_hash(iso_fn)
+    report._file_hashes[iso_fn] = 'edited'
+    try:
+        edited = pm.report_tasks([m], [pm.MaterialAluminum(), pm.Material('304')])
+    finally:
+        report._file_hashes[iso_fn] = saved
+    assert [k != t.key for k, t in zip(keys, edited)] == [False] * 4 + [True] * 3
+
+
+def test_power_trace_memory():
+    import os
+    import tempfile
+    import tracemalloc
+
+    m = pm.MachinePM25MV_DMMServo()
+    rng = np.random.default_rng(0)
+    n = 90
+    trace = pm.PowerTrace(m, Q_(rng.uniform(5., 25., n), 'second'), Q_(rng.choice([1000., 3000.], n), 'tpm'),
+                          Q_(rng.uniform(50., 400., n), 'watt'), Q_(rng.uniform(1., 5., n), 'second'),
+                          spindle_inertia=Q_(.002, 'kg m ** 2'))
+    fs = Q_(1000, 'hertz')
+    n_samples = trace.n_samples(fs)
+    assert n_samples > 1000000
+
+    # The default chunks hold a small part of the series at a time; chunks of 1M samples, the old
+    # default, peaked above the full series for jobs this long
+    def traced(**kwargs):
+        tracemalloc.start()
+        bins = trace.min_max(fs, 1000, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return bins, peak
+
+    bins, peak = traced()
+    bins_large, peak_large = traced(chunk_size=1 << 20)
+    full = n_samples * pm.spindle_log_dtype.itemsize
+    assert peak < full / 2 < full < peak_large
+    assert len(bins) == -(-n_samples // 1000)
+    assert np.array_equal(bins, bins_large)
+    assert np.isclose(bins['max_power'].max(), max(trace.p0.max(), trace.p1.max()), rtol=1e-6)
+
+    # A written trace is a spindle log of every sample
+    with tempfile.TemporaryDirectory() as folder:
+        fn = os.path.join(folder, 'trace.log')
+        assert trace.write(fn, Q_(10, 'hertz')) == trace.n_samples(Q_(10, 'hertz'))
+        with open(fn, 'rb') as f:
+            assert f.read(16) == pm.spindle_log_header()
+        log = pm.open_spindle_log(fn)
+        assert np.array_equal(log, np.concatenate(list(trace.chunks(Q_(10, 'hertz')))))
+        del log
+
+        # An empty job has no samples
+        empty = pm.PowerTrace(m, Q_(np.zeros(0), 'second'), Q_(np.zeros(0), 'tpm'), Q_(np.zeros(0), 'watt'))
+        assert empty.n_samples(fs) == 0 and empty.duration.m == 0. and len(empty.min_max(fs)) == 0
+        assert list(empty.chunks(fs)) == [] and empty.write(fn, fs) == 0
+        assert len(pm.open_spindle_log(fn)) == 0
+
+
+def test_compact():
+    # The compact classes reproduce the full ones
+    for stock_material in [pm.MaterialAluminum(), pm.MaterialSteelMild()]:
+        compact_material = pm.CompactMaterial.from_material(stock_material)
+        for d in [1 / 16., .25, 33 / 64., .9]:
+            for style, cls in [('jobber', pm.DrillHSSJobber), ('stub', pm.DrillHSSStub)]:
+                drill = cls(Q_(d, 'inch'))
+                compact = pm.CompactDrill(d * 25.4, style)
+                feed = drill.feed_rate(stock_material)
+                assert abs((compact.feed_rate(compact_material) - feed).m_as('mm / turn')) < 1e-12
+                assert abs((compact.thrust(compact_material) - drill.thrust(stock_material)).m_as('lbs')) < 1e-9
+                rpm = Q_(1500, 'tpm')
+                P = pm.DrillOp(drill, stock_material).net_power(feed, rpm)
+                P_compact = pm.CompactDrillOp(compact, compact_material).net_power(feed, rpm)
+                assert abs(P_compact.m_as('watt') - P.m_as('watt')) <= 1e-9 * P.m_as('watt')
+
+    for m in [pm.MachinePM25MV(), pm.MachinePM25MV_DMMServo()]:
+        c = pm.CompactMachine(m)
+        x = c._curve_x
+        # At the samples the curves agree; between them they lie between the neighboring samples
+        assert np.allclose(c.torque_continuous(Q_(x, 'tpm')).m_as('newton meter'),
+                           m.torque_continuous(Q_(x, 'tpm')).m_as('newton meter'), rtol=1e-12, atol=1e-12)
+        assert np.allclose(c.power_continuous(Q_(x[1:], 'tpm')).m_as('watt'),
+                           m.power_continuous(Q_(x[1:], 'tpm')).m_as('watt'), rtol=1e-9)
+        rpm = np.linspace(x[1], x[-1], 3001)
+        k = np.clip(np.searchsorted(x, rpm) - 1, 0, len(x) - 2)
+        for curve in ['torque_continuous', 'torque_intermittent']:
+            T = getattr(c, curve)(Q_(rpm, 'tpm')).m_as('newton meter')
+            lo = getattr(m, curve)(Q_(x[k], 'tpm')).m_as('newton meter')
+            hi = getattr(m, curve)(Q_(x[k + 1], 'tpm')).m_as('newton meter')
+            assert np.all(T >= np.minimum(lo, hi) - 1e-9) and np.all(T <= np.maximum(lo, hi) + 1e-9)
+
+        # Speeds are clamped like MachineType.clamp_speed, scalars and arrays
+        rpm = Q_(np.array([0., m.min_rpm.m_as('tpm'), 1000., m.max_rpm.m_as('tpm') + 1.]), 'tpm')
+        clamped, adjusted = c.clamp_speed(rpm)
+        expected, expected_adjusted = m.clamp_speed(rpm)
+        assert np.array_equal(clamped.m_as('tpm'), expected.m_as('tpm'))
+        assert np.array_equal(adjusted, expected_adjusted) and list(adjusted) == [True, False, False, True]
+        for r in rpm:
+            clamped, adjusted = c.clamp_speed(r)
+            expected, expected_adjusted = m.clamp_speed(r)
+            assert clamped.m_as('tpm') == expected.m_as('tpm') and adjusted is expected_adjusted
+
+
+def test_tap_op():
+    m = pm.MachinePM25MV_DMMServo()
+    stock_material = pm.MaterialAluminum()
+    diameter = Q_([.19, .25, 5 / 16., 3 / 8., 1 / 2.], 'inch')
+    taps = [pm.Tap(d, pitch=Q_(1 / 20., 'inch / turn')) for d in diameter]
+
+    # The table torque times the notes' multipliers, against the torque at the clamped tapping speed
+    for kwargs, multiplier in [({}, 1.), ({'dull': True, 'thread_percentage': 75.}, 1.5 * 1.25),
+                               ({'flute': 'helical', 'fine_pitch': True, 'thread_percentage': 55.}, .7 * .5 * .75),
+                               ({'flute': 'spiral point'}, .6)]:
+        op = pm.TapOp.from_taps(taps, stock_material, **kwargs)
+        table = pm.Tap(diameter).torque_(stock_material).m_as('newton meter')
+        rpm, _ = m.clamp_speed(pm.DrillOp.rrpm_(diameter, pm.Tap(diameter).speed(stock_material)))
+        for intermittent, curve in [(False, m.torque_continuous), (True, m.torque_intermittent)]:
+            ok, required, available = op.check(m, intermittent=intermittent)
+            assert np.allclose(required.m_as('newton meter'), table * multiplier, rtol=1e-12, atol=0.)
+            assert np.allclose(available.m_as('newton meter'), curve(rpm).m_as('newton meter'), rtol=1e-12, atol=0.)
+            assert np.array_equal(ok, table * multiplier <= curve(rpm).m_as('newton meter'))
+    ok, _, _ = pm.TapOp.from_taps(taps, stock_material).check(m)
+    assert list(ok) == [True, True, True, True, False]
+
+    # With a torque curve falling linearly from 3 N m at standstill, the highest safe speed is where
+    # the curve crosses the required torque, up to the tapping speed
+    m._torque_continuous = lambda abs_rpm, gear_ratio: pm.machines._torque_quantity(3. - abs_rpm.m_as('tpm') / 1000.)
+    op = pm.TapOp.from_taps(taps, stock_material, dull=True, thread_percentage=75.)
+    required = op.required_torque().m_as('newton meter')
+    lo = m.min_rpm.m_as('tpm')
+    hi = np.minimum(op.spindle_speed().m_as('tpm'), m.max_rpm.m_as('tpm'))
+    crossing = (3. - required) * 1000.
+    expected = np.where(crossing < lo, np.nan, np.minimum(crossing, hi))
+    rpm = op.max_safe_rpm(m).m_as('tpm')
+    assert np.array_equal(np.isnan(rpm), np.isnan(expected)) and np.any(np.isnan(rpm))
+    assert np.any(crossing[~np.isnan(expected)] < hi[~np.isnan(expected)])
+    # Bisection of one sample step of (hi - lo) / 255, 30 times
+    tolerance = (hi - lo) / 255. / 2 ** 30
+    assert np.all(np.abs(rpm - expected)[~np.isnan(rpm)] <= tolerance[~np.isnan(rpm)] + 1e-9)
+    assert abs(pm.TapOp(taps[1], stock_material, dull=True, thread_percentage=75.).max_safe_rpm(m).m_as('tpm') -
+               expected[1]) <= tolerance[1] + 1e-9
+
+    # 1/4-20 to .5 inch from .1 inch above at 500 tpm: .6 inch each way at 25 inch / min
+    op = pm.TapOp(taps[1], stock_material)
+    t = op.cycle_time(Q_(.5, 'inch'), Q_(500, 'tpm'))
+    assert abs(t.m_as('second') - 2.88) < 1e-12
+    t = op.cycle_time(Q_(.5, 'inch'), Q_(500, 'tpm'), reverse_speed_ratio=2.)
+    assert abs(t.m_as('second') - 2.16) < 1e-12
+    try:
+        pm.TapOp(pm.Tap(Q_(.25, 'inch')), stock_material).cycle_time(Q_(.5, 'inch'), Q_(500, 'tpm'))
+        assert False
+    except pm.OperationUnsupportedTool:
+        pass
+
+
+def test_threads(n_threads=4, n_tasks=50):
+    # Run drilling evaluations from a thread pool and compare with the same evaluations run serially;
+    # raise the counts, e.g., 16 threads and 400 tasks, to stress the shared caches
+    from concurrent.futures import ThreadPoolExecutor
+    import pint
+
+    m = pm.MachinePM25MV_DMMServo()
+    stock_material = pm.MaterialAluminum()
+
+    diams = np.linspace(1 / 16., 1., n_tasks)
+
+    def task(i):
+        drill = pm.DrillHSSJobber(Q_(diams[i], 'inch'))
+        op = pm.DrillOp(drill, stock_material)
+        feed = drill.feed_rate(stock_material)
+        rpm, _ = m.clamp_speed(op.rrpm(stock_material.sfm(drill.tool_material)))
+        P = op.net_power(feed, rpm).m_as('watt')
+        available = m.power_continuous(rpm).m_as('watt')
+        T = m.torque_intermittent(rpm).m_as('newton meter')
+        rng = pm.SpindleRange('test', 1. + i % 3, m).torque_continuous(rpm).m_as('newton meter')
+        fmap = pm.feasibility_map(m, stock_material).query(drill.diameter, rpm)
+        return P, available, T, rng, bool(fmap)
+
+    expected = [task(i) for i in range(n_tasks)]
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        for _ in range(5):
+            results = list(executor.map(task, range(n_tasks)))
+            assert results == expected
+
+    # There is one unit registry; another one is refused
+    pm.setUreg(pm.ureg)
+    pm.setUreg(pint.get_application_registry())
+    try:
+        pm.setUreg(pint.UnitRegistry())
+        assert False
+    except pm.UnitRegistryMismatch:
+        pass
+
+
+def test_serialization():
+    results = {'diameter': Q_(np.linspace(1., 25., 7), 'mm'),
+               'rpm': Q_(np.arange(12, dtype=np.int32).reshape(3, 4), 'tpm'),
+               'feasible': np.array([True, False, True]),
+               # Not in unit_codes, so stored as a unit string
+               'inertia': Q_(np.array([.002, .003], dtype=np.float32), 'kilogram * meter ** 2'),
+               'scalar': Q_(2.5, 'watt'),
+               'empty': Q_(np.zeros(0), 'second')}
+    b = pm.pack_results(results)
+    r = pm.unpack_results(b)
+    assert list(r) == list(results)
+    for k, q in results.items():
+        m, m2 = (q.magnitude, r[k].magnitude) if isinstance(q, pm.ureg.Quantity) else (q, r[k])
+        if isinstance(q, pm.ureg.Quantity):
+            assert r[k].units == q.units
+        assert np.asarray(m2).dtype == np.asarray(m).dtype and np.shape(m2) == np.shape(m)
+        assert np.array_equal(m2, m)
+        if np.size(m) > 1:
+            # Read-only views into the received buffer
+            assert not m2.flags.writeable and np.shares_memory(m2, np.frombuffer(b, dtype=np.uint8))
+
+    # Descriptors rebuild objects that give the same numbers
+    m = pm.MachinePM25MV_DMMServo()
+    m.efficiency = .85
+    m.idle_power = Q_(60., 'watt')
+    m.add_spindle_range('low', 3.)
+    rpm = Q_(np.linspace(100., 4000., 9), 'tpm')
+    m2 = pm.restore(pm.describe(m))
+    assert type(m2) is type(m)
+    assert np.array_equal(m2.power_continuous(rpm).m_as('watt'), m.power_continuous(rpm).m_as('watt'))
+    assert [(r.name, r.gear_ratio) for r in m2.spindle_ranges] == [(r.name, r.gear_ratio) for r in m.spindle_ranges]
+    stock_material = pm.Material('304')
+    stock_material2 = pm.restore(pm.describe(stock_material))
+    assert stock_material2.specific_cutting_energy == stock_material.specific_cutting_energy
+    assert stock_material2.sfm(pm.ToolMaterialHSS()) == stock_material.sfm(pm.ToolMaterialHSS())
+    assert type(pm.restore(pm.describe(pm.ToolMaterialCarbide()))) is pm.ToolMaterialCarbide
+    # Scalar and array tools
+    for drill in [pm.DrillHSSStub(Q_(.25, 'inch')), pm.DrillHSS(Q_(np.array([1., 2.5, 6.]), 'mm'))]:
+        drill2 = pm.restore(pm.describe(drill))
+        assert type(drill2) is type(drill)
+        assert np.array_equal(drill2.feed_rate(stock_material).m_as('mm / turn'),
+                              drill.feed_rate(stock_material).m_as('mm / turn'))
+    tap = pm.restore(pm.describe(pm.Tap(Q_(.25, 'inch'), pitch=Q_(1 / 20., 'inch / turn'))))
+    assert tap.pitch == Q_(1 / 20., 'inch / turn') and tap.diameter == Q_(.25, 'inch')
+
+
+def test_unit_cache_folder():
+    import os
+    import pymachining.units as units
+
+    saved_env = os.environ.get('PYMACHINING_UNIT_CACHE')
+    saved_definitions = units._unit_definitions
+    try:
+        os.environ['PYMACHINING_UNIT_CACHE'] = os.path.join('cache', 'units')
+        folder = pm.unit_cache_folder()
+        assert os.path.dirname(folder) == os.path.join('cache', 'units')
+        assert folder == pm.unit_cache_folder()
+        # The folder is keyed by the package's unit definitions
+        units._unit_definitions = saved_definitions + [('tph', 'tph = turn / hour')]
+        assert pm.unit_cache_folder() != folder
+        units._unit_definitions = saved_definitions
+        assert pm.unit_cache_folder() == folder
+        # An empty string disables the cache
+        os.environ['PYMACHINING_UNIT_CACHE'] = ''
+        assert pm.unit_cache_folder() is None
+    finally:
+        units._unit_definitions = saved_definitions
+        if saved_env is None:
+            os.environ.pop('PYMACHINING_UNIT_CACHE', None)
+        else:
+            os.environ['PYMACHINING_UNIT_CACHE'] = saved_env
+
+
+def test_snapshot():
+    import json
+    import os
+    import tempfile
+
+    m = pm.MachinePM25MV_HS()
+    stock_material = pm.MaterialAluminum()
+    drill = pm.DrillHSS(Q_(np.linspace(1., 12., 1000), 'mm'))
+    op = pm.DrillOp(drill, stock_material)
+    feed = drill.feed_rate_(stock_material, 'jobber')
+    rpm, _ = m.clamp_speed(op.rrpm(stock_material.sfm(drill.tool_material)))
+    P = op.net_power(feed, rpm).to('watt')
+    results = {'diameter': drill.diameter, 'feed': feed, 'rpm': rpm, 'net_power': P,
+               'feasible': P <= m.power_continuous(rpm)}
+    context = {'machine': m, 'stock_material': stock_material, 'drill': drill,
+               'batch': pm.DrillBatch.from_arrays(drill.diameter[:10], tool_material='carbide')}
+
+    with tempfile.TemporaryDirectory() as folder:
+        fn = os.path.join(folder, 'a.npz')
+        pm.save_snapshot(fn, results, context, {'n': 1000})
+        s = pm.load_snapshot(fn)
+        assert s.parameters == {'n': 1000}
+        for k, q in results.items():
+            r = s.results[k]
+            if isinstance(q, pm.ureg.Quantity):
+                assert isinstance(r.magnitude, np.memmap) and r.units == q.units
+                assert np.array_equal(r.magnitude, q.magnitude)
+            else:
+                assert isinstance(r, np.memmap) and np.array_equal(r, q)
+
+        # The machine is rebuilt with its tabulated torque curve
+        m2 = s.context['machine']
+        assert m2._torque_x == list(m._torque_x) and m2._torque_y == list(m._torque_y)
+        rpm_ = Q_(np.linspace(m.min_rpm.m_as('tpm'), m.max_rpm.m_as('tpm'), 50), 'tpm')
+        assert np.array_equal(m2.power_continuous(rpm_).m_as('watt'), m.power_continuous(rpm_).m_as('watt'))
+        assert np.array_equal(s.context['drill'].diameter.m_as('mm'), drill.diameter.m_as('mm'))
+        assert list(s.context['batch'].tool_material_names) == ['carbide'] * 10
+
+        # Against itself nothing changed; one changed element is found with its change
+        d = pm.diff_snapshots(fn, fn)
+        assert all(v.changed == 0 for v in d['results'].values())
+        assert d['only_a'] == d['only_b'] == d['incompatible'] == d['parameters'] == d['context'] == []
+        changed = dict(results)
+        P2 = P.m_as('watt').copy()
+        P2[500] *= 1.5
+        changed['net_power'] = Q_(P2, 'watt')
+        fn_b = os.path.join(folder, 'b.npz')
+        pm.save_snapshot(fn_b, changed, context, {'n': 1001})
+        d = pm.diff_snapshots(fn, fn_b)
+        v = d['results']['net_power']
+        assert v.size == 1000 and v.changed == 1
+        assert abs(v.max_abs - .5 * P.m_as('watt')[500]) < 1e-9 * P.m_as('watt')[500]
+        assert abs(v.max_rel - .5) < 1e-12
+        assert d['parameters'] == ['n'] and sum(x.changed for x in d['results'].values()) == 1
+
+        # Files that are not snapshots, or are from a newer version, are refused
+        for k, v in [('format', 'other'), ('version', pm.snapshot_version + 1)]:
+            bad = dict(s.header, **{k: v})
+            fn_bad = os.path.join(folder, 'bad.npz')
+            with open(fn_bad, 'wb') as f:
+                np.savez(f, __header__=np.frombuffer(json.dumps(bad).encode(), dtype=np.uint8))
+            try:
+                pm.load_snapshot(fn_bad)
+                assert False
+            except pm.SnapshotFormatError:
+                pass
+        del s, m2
+
+
+def test_duty_cycle():
+    m = pm.MachinePM25MV_DMMServo()
+    tau = 600.
+    rng = np.random.default_rng(3)
+    n = 300
+    d = rng.uniform(5., 120., n)
+    rpm = rng.choice([500., 1500., 3000., 4500.], n)
+    # Load ratios from idle to above the continuous rating
+    r = np.where(rng.uniform(size=n) < .2, 0., rng.uniform(.2, 1.6, n))
+    # One operation that exceeds the limit even from ambient
+    d[50], r[50] = 1200., 1.6
+    # and one short one above the intermittent rating
+    d[60], r[60] = 1., 5.
+    T_continuous = m.torque_continuous(Q_(rpm, 'tpm')).m_as('newton meter')
+    torque = Q_(r * T_continuous, 'newton meter')
+    job = (Q_(d, 'second'), torque, Q_(rpm, 'tpm'))
+    report = pm.check_duty_cycle(m, *job, time_constant=Q_(tau, 'second'), initial_temperature=.3)
+
+    # Sequential reference: step the first order model, and dwell before an operation until
+    # it can start from a temperature that stays within the limit
+    temperature = np.empty(n)
+    dwell = np.empty(n)
+    theta = .3
+    theta_dwell = .3
+    for k in range(n):
+        a = np.exp(-d[k] / tau)
+        theta = r[k] ** 2 + (theta - r[k] ** 2) * a
+        temperature[k] = theta
+        c = (1. - r[k] ** 2 * (1. - a)) / a
+        if c < 0.:
+            dwell[k] = np.inf
+        elif theta_dwell > c:
+            dwell[k] = tau * np.log(theta_dwell / c)
+            theta_dwell = c
+        else:
+            dwell[k] = 0.
+        theta_dwell = r[k] ** 2 + (theta_dwell - r[k] ** 2) * a
+    assert np.allclose(report.temperature, temperature, rtol=1e-12, atol=1e-12)
+    assert np.array_equal(np.isinf(report.dwell.m), np.isinf(dwell))
+    finite = np.isfinite(dwell)
+    assert np.allclose(report.dwell.m_as('second')[finite], dwell[finite], rtol=1e-12, atol=1e-12)
+    assert not report.ok and np.any(dwell[finite] > 0) and not finite.all()
+    peak_ok = torque.m_as('newton meter') <= m.torque_intermittent(Q_(rpm, 'tpm')).m_as('newton meter')
+    assert np.array_equal(report.peak_ok, peak_ok) and np.any(peak_ok) and not peak_ok.all()
+
+    # With the dwells a job of reachable operations stays within the thermal limit
+    reachable = finite
+    job = (Q_(d[reachable], 'second'), Q_(r[reachable] * T_continuous[reachable], 'newton meter'),
+           Q_(rpm[reachable], 'tpm'))
+    report = pm.check_duty_cycle(m, *job, time_constant=Q_(tau, 'second'), initial_temperature=.3)
+    assert not report.thermal_ok.all()
+    dwelled = pm.insert_dwells(*job, report.dwell)
+    report2 = pm.check_duty_cycle(m, *dwelled[:3], time_constant=Q_(tau, 'second'), initial_temperature=.3)
+    assert report2.thermal_ok.all()
+    assert len(report2.temperature) == np.count_nonzero(report.dwell.m > 0) + np.count_nonzero(reachable)
+    assert np.array_equal(dwelled[0].m[dwelled[3]], d[reachable])
+
+    # RMS over a 120 s window of three 60 s operations at load ratios .5, 1.2 and .8: the window
+    # ending with the last covers the last two
+    T = m.torque_continuous(Q_(1000., 'tpm')).m_as('newton meter')
+    report = pm.check_duty_cycle(m, Q_([60., 60., 60.], 'second'), Q_(np.array([.5, 1.2, .8]) * T, 'newton meter'),
+                                 Q_(1000., 'tpm'), rms_window=Q_(120., 'second'))
+    assert abs(report.rms[2] - np.sqrt((1.2 ** 2 * 60. + .8 ** 2 * 60.) / 120.)) < 1e-12
+    assert abs(report.rms[0] - np.sqrt(.5 ** 2 * 60. / 120.)) < 1e-12
+    assert abs(report.max_rms - report.rms[2]) < 1e-12
+
+
+def regression_tests():
+    # Tests whose arguments all have defaults are run with the defaults
+    tests = [v for k, v in globals().items() if k.startswith('test_') and callable(v) and
+             v.__code__.co_argcount == len(v.__defaults__ or ())]
+    for f in tests:
+        f()
+        print(f'{f.__name__:40s} ok')
+
+
+def benchmark_compact(stock_material, n=10000):
+    import time
+    import tracemalloc
+
+    # A sweep over drill diameters in inches, creating one drill and one operation per point
+    diams = list(np.linspace(1 / 64., 1., n))
+    compact_material = pm.CompactMaterial.from_material(stock_material)
+
+    def make_full():
+        return [pm.DrillOp(pm.DrillHSS(Q_(d, 'inch')), stock_material) for d in diams]
+
+    def make_compact():
+        # Compact objects take magnitudes in canonical units (mm) directly
+        return [pm.CompactDrillOp(pm.CompactDrill(d * 25.4), compact_material) for d in diams]
+
+    for label, f in [('DrillHSS + DrillOp', make_full), ('CompactDrill + CompactDrillOp', make_compact)]:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        objs = f()
+        t1 = time.perf_counter()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'{label:30s} {size / n:8.1f} bytes/point {(t1 - t0) / n * 1e6:8.2f} us/point')
+        del objs
+
+
+def benchmark_fits(stock_material, n=100000, repeat=1000):
+    # The quartic refit on every call, as the tables used to be evaluated, against the cached fits
+    import time
+    import numpy.polynomial.polynomial as poly
+
+    def old_fit(x, table_x, table_y):
+        return poly.polyval(x, poly.polyfit(table_x, table_y, 4))
+
+    # Evaluating each table once fills the fit caches: the thrust and tap torque tables are in
+    # fitting._fits, which holds the table values, and the feed chart is in fitting._rows_fits
+    pm.DrillHSS(Q_(.25, 'inch')).feed_rate(stock_material)
+    pm.DrillHSS(Q_(.25, 'inch')).thrust(stock_material)
+    pm.Tap(Q_(.25, 'inch')).torque(stock_material)
+    tables = [(f.x, f.y, None) for (method, _, _), f in list(pm.fitting._fits.items()) if method == 'pchip']
+    # The material's feed chart row, also timed through the chart of every row
+    row = pm.feed_chart_row(stock_material)
+    chart = pm.table_rows_fit(pm.feed_chart_diam_in, pm.feed_ipr_chart, 'pchip')
+    m = chart.n_valid[row]
+    tables.insert(0, (chart.x[:m], pm.feed_ipr_chart[row, :m], lambda x_: chart(row, x_)))
+
+    for table_x, table_y, rows_fit in tables:
+        name = f'feed chart row {pm.feed_chart_rows[row]}' if rows_fit is not None else 'table'
+        print(f'{name} of {len(table_x)} points, x from {table_x[0]:.3f} to {table_x[-1]:.3f}')
+        x = np.linspace(table_x[0], table_x[-1], n)
+        fits = [('old poly', lambda x_: old_fit(x_, table_x, table_y)),
+                ('cached poly', pm.table_fit(table_x, table_y, 'poly')),
+                ('pchip', pm.table_fit(table_x, table_y, 'pchip'))]
+        if rows_fit is not None:
+            fits.append(('chart pchip', rows_fit))
+        old = fits[0][1](x)
+        for label, f in fits:
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                f(.3)
+            t1 = time.perf_counter()
+            y = f(x)
+            t2 = time.perf_counter()
+            # Overshoot: how far the curve leaves the range of the two points around each x
+            k = np.clip(np.searchsorted(table_x, x, side='right') - 1, 0, len(table_x) - 2)
+            lo = np.minimum(table_y[k], table_y[k + 1])
+            hi = np.maximum(table_y[k], table_y[k + 1])
+            overshoot = np.maximum(lo - y, y - hi).max(initial=0.)
+            print(f'  {label:12s} {(t1 - t0) / repeat * 1e6:7.1f} us/call {(t2 - t1) * 1e3:7.2f} ms/{n} points '
+                  f'max |y - old| {np.abs(y - old).max():.4g} max overshoot {max(overshoot, 0.):.4g} '
+                  f'decreasing steps {int(np.sum(np.diff(y) < 0))}')
+
+
+def benchmark_serialization(m, stock_material, n=100000, repeat=20):
+    # Round trip of vectorized drilling results, pickled as Pint quantities and packed as records
+    import pickle
+    import time
+
+    drill = pm.DrillHSS(Q_(np.linspace(1., 25., n), 'mm'))
+    op = pm.DrillOp(drill, stock_material)
+    feed = drill.feed_rate_(stock_material, 'jobber')
+    rpm, _ = m.clamp_speed(op.rrpm(stock_material.sfm(drill.tool_material)))
+    P = op.net_power(feed, rpm)
+    results = {'diameter': drill.diameter, 'feed': feed, 'rpm': rpm, 'net_power': P,
+               'available': m.power_continuous(rpm), 'feasible': (P <= m.power_continuous(rpm))}
+
+    def pickle_round_trip():
+        b = pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL)
+        return b, pickle.loads(b)
+
+    def pack_round_trip():
+        b = pm.pack_results(results)
+        return b, pm.unpack_results(b)
+
+    for label, f in [('pickle', pickle_round_trip), ('pack_results', pack_round_trip)]:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            b, r = f()
+        t1 = time.perf_counter()
+        print(f'{label:15s} {len(b):10d} bytes {(t1 - t0) / repeat * 1e3:8.3f} ms/round trip')
+
+    # Small payloads: one machine, many times
+    for label, f in [('pickle machine', lambda: pickle.loads(pickle.dumps(m))),
+                     ('describe', lambda: pm.restore(pickle.loads(pickle.dumps(pm.describe(m)))))]:
+        t0 = time.perf_counter()
+        for _ in range(1000):
+            f()
+        t1 = time.perf_counter()
+        print(f'{label:15s} {(t1 - t0) * 1e3:8.3f} us/round trip')
+    print(f'machine payload: pickle {len(pickle.dumps(m))} bytes, descriptor {len(pickle.dumps(pm.describe(m)))} bytes')
+
+
+def benchmark_snapshot(m, stock_material, n=5000000, fn=None):
+    # Save a diameter sweep with its context, reopen it memory mapped and diff it against itself;
+    # by default in a temporary folder
+    import os
+    import tempfile
+    import time
+
+    if fn is None:
+        with tempfile.TemporaryDirectory() as folder:
+            return benchmark_snapshot(m, stock_material, n, os.path.join(folder, 'snapshot.npz'))
+
+    drill = pm.DrillHSS(Q_(np.linspace(1., 25., n), 'mm'))
+    op = pm.DrillOp(drill, stock_material)
+    feed = drill.feed_rate_(stock_material, 'jobber')
+    rpm, _ = m.clamp_speed(op.rrpm(stock_material.sfm(drill.tool_material)))
+    P = op.net_power(feed, rpm).to('watt')
+    results = {'diameter': drill.diameter, 'feed': feed, 'rpm': rpm, 'net_power': P,
+               'feasible': P <= m.power_continuous(rpm)}
+
+    t0 = time.perf_counter()
+    pm.save_snapshot(fn, results, {'machine': m, 'stock_material': stock_material}, {'n': n})
+    t1 = time.perf_counter()
+    s = pm.load_snapshot(fn)
+    t2 = time.perf_counter()
+    s.context
+    t3 = time.perf_counter()
+    d = pm.diff_snapshots(s, pm.load_snapshot(fn))
+    t4 = time.perf_counter()
+    print(f'save {(t1 - t0) * 1e3:8.1f} ms, load {(t2 - t1) * 1e3:6.2f} ms, context {(t3 - t2) * 1e3:6.2f} ms, '
+          f'diff {(t4 - t3) * 1e3:8.1f} ms')
+    print({k: v.changed for k, v in d['results'].items()}, d['context'])
+
+
+def benchmark_report(stock_materials, fn='report.html'):
+    # Build a report rendering in this process and in a process pool, then rebuild from the cache
+    import shutil
+    import tempfile
+
+    machines = [pm.MachinePM25MV(), pm.MachinePM25MV_DMMServo(), pm.MachinePM25MV_HS()]
+    tasks = pm.report_tasks(machines, stock_materials)
+    with tempfile.TemporaryDirectory() as folder:
+        for label, max_workers in [('serial', 0), ('process pool', None)]:
+            shutil.rmtree(folder, ignore_errors=True)
+            print(f'{label:14s}', pm.build_report(fn, tasks, cache_folder=folder, max_workers=max_workers))
+        print(f'{"cached":14s}', pm.build_report(fn, tasks, cache_folder=folder))
+
+
+def benchmark_duty_cycle(m, n=50000, repeat=10):
+    # Duty cycle check of a random job of n cuts and idle periods, then again with the dwells
+    import time
+
+    rng = np.random.default_rng(1)
+    duration = Q_(rng.uniform(1., 30., n), 'second')
+    torque = Q_(np.where(rng.random(n) < .5, rng.uniform(.5, 1., n) * m.torque_range()[1].m_as('N m'), 0.), 'N m')
+    rpm = Q_(rng.uniform(m.min_rpm.m_as('tpm'), m.max_rpm.m_as('tpm') / 2., n), 'tpm')
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        r = pm.check_duty_cycle(m, duration, torque, rpm)
+    t1 = time.perf_counter()
+    print(f'{n} operations: {(t1 - t0) / repeat * 1e3:.1f} ms, ok {r.ok}, max rms {r.max_rms:.2f}, '
+          f'max temperature {r.max_temperature:.2f}, dwell {r.total_dwell.to("minute"):.1f}')
+    r2 = pm.check_duty_cycle(m, *pm.insert_dwells(duration, torque, rpm, r.dwell)[:3])
+    print(f'with dwells: max rms {r2.max_rms:.2f}, max temperature {r2.max_temperature:.2f}')
+
+
+def benchmark_power_trace(m, stock_material, hours=24., sample_rate=Q_(1000, 'hertz'), factor=10000):
+    # Predicted power of a day of drilling, sampled at 1 kHz and reduced to min/max bins
+    import time
+    import tracemalloc
+
+    rng = np.random.default_rng(0)
+    n = int(hours * 3600 / 20.)
+    drill = pm.DrillHSS(Q_(rng.uniform(3., 12., n), 'mm'))
+    op = pm.DrillOp(drill, stock_material)
+    rpm = Q_(rng.choice([1000., 1500., 2500., 3000.], n), 'tpm')
+    P = op.net_power(drill.feed_rate(stock_material), rpm)
+    trace = pm.PowerTrace(m, Q_(rng.uniform(5., 25., n), 'second'), rpm, P, Q_(rng.uniform(1., 5., n), 'second'),
+                          spindle_inertia=Q_(.002, 'kg m ** 2'))
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    bins = trace.min_max(sample_rate, factor)
+    t1 = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n_samples = trace.n_samples(sample_rate)
+    print(f'{trace.duration.to("hour"):.1f}, {n_samples} samples in {t1 - t0:.2f} s, {len(bins)} bins, '
+          f'peak memory {peak / 1e6:.0f} MB (full series {n_samples * 16 / 1e6:.0f} MB)')
+
+
+def benchmark_import(repeat=5):
+    # Cold start in fresh interpreters, with the unit cache disabled and with a warm one
+    import os
+    import subprocess
+    import sys
+    import tempfile
+
+    code = ('import time; t0 = time.perf_counter(); import pymachining as pm; t1 = time.perf_counter(); '
+            'op = pm.DrillOp(pm.DrillHSS(pm.Q_(.25, "inch")), pm.MaterialAluminum()); '
+            'op.net_power(pm.Q_(.005, "inch / turn"), pm.Q_(2000, "tpm")).to("watt"); t2 = time.perf_counter(); '
+            'print(t1 - t0, t2 - t1)')
+    with tempfile.TemporaryDirectory() as folder:
+        for label, cache in [('no unit cache', ''), ('warm unit cache', folder)]:
+            env = dict(os.environ, PYMACHINING_UNIT_CACHE=cache, MPLBACKEND='Agg')
+            # The first run fills the cache
+            subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True)
+            times = []
+            for _ in range(repeat):
+                out = subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True)
+                times.append([float(x) for x in out.stdout.split()])
+            t = np.median(times, axis=0)
+            print(f'{label:16s} import {t[0] * 1e3:7.1f} ms, first calculation {t[1] * 1e3:6.2f} ms')
+
 
 def raw_tests():
     m = pm.MachinePM25MV_DMMServo()
@@ -164,7 +1427,12 @@ def raw_tests():
 
 
 def main():
-    raw_tests()
+    import sys
+
+    if sys.argv[1:] == ['check']:
+        regression_tests()
+    else:
+        raw_tests()
 
 
 if __name__ == "__main__":